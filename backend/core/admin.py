@@ -1,10 +1,34 @@
 from django.contrib import admin
+
+from . import counters, purge, rollups
+from .events import publish_on_commit, task_channel
 from .models import Organization, Project, Task, TaskComment
+from .sync import record_changes
+from .versions import bump_data_version
 
 
 @admin.register(Organization)
 class OrganizationAdmin(admin.ModelAdmin):
-    list_display = ("name", "slug", "contact_email", "created_at")
+    list_display = ("name", "slug", "contact_email", "created_at", "deleted_at")
+    readonly_fields = ("sync_version",)
+
+    def save_model(self, request, obj, form, change):
+        # Write only the edited columns, never sync_version as read when
+        # the form was loaded.
+        obj.save(update_fields=form.changed_data if change else None)
+
+    # Deleting marks the organization like deleteOrganization; the rows go in
+    # the background (purge_organizations), not through the cascade collector.
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {self.model._meta.verbose_name_plural: len(objs)}, set(), []
+
+    def delete_model(self, request, obj):
+        if obj.deleted_at is None:
+            purge.mark_deleted(obj)
+
+    def delete_queryset(self, request, queryset):
+        for organization in queryset.filter(deleted_at__isnull=True):
+            purge.mark_deleted(organization)
 
 
 @admin.register(Project)
@@ -18,6 +42,43 @@ class TaskAdmin(admin.ModelAdmin):
     list_display = ("title", "project", "status", "assignee_email", "due_date")
     list_filter = ("status",)
 
+    # Edits here keep the counters, rollups, change log and subscriptions in
+    # step like updateTask; creates and deletes are counted by core.signals.
+    def save_model(self, request, obj, form, change):
+        old = Task.objects.select_related("project").get(pk=obj.pk) if change else None
+        super().save_model(request, obj, form, change)
+        organization_id = obj.project.organization_id
+        projects = {obj.project_id}
+        if old is not None and old.project_id == obj.project_id:
+            counters.task_status_changed(obj, old.status)
+            rollups.adjust_rollups(organization_id, [(rollups.task_key(old), rollups.task_key(obj))])
+            if old.status == obj.status:
+                projects.clear()
+        elif old is not None:
+            counters.task_deleted(old)
+            counters.task_created(obj)
+            rollups.task_deleted(old)
+            rollups.task_created(obj)
+            projects.add(old.project_id)
+            if old.project.organization_id != organization_id:
+                record_changes(old.project.organization_id, tasks=[obj.pk], deleted=True)
+                record_changes(old.project.organization_id, projects=projects - {obj.project_id})
+                bump_data_version(old.project.organization_id)
+                projects = {obj.project_id}
+        record_changes(organization_id, tasks=[obj.pk], projects=projects)
+        bump_data_version(organization_id)
+        publish_on_commit(task_channel(obj.project_id), {"taskId": obj.pk})
+
+    def delete_model(self, request, obj):
+        organization_id = obj.project.organization_id
+        super().delete_model(request, obj)
+        bump_data_version(organization_id)
+
+    def delete_queryset(self, request, queryset):
+        organization_ids = set(queryset.values_list("project__organization_id", flat=True))
+        super().delete_queryset(request, queryset)
+        bump_data_version(*organization_ids)
+
 
 @admin.register(TaskComment)
 class TaskCommentAdmin(admin.ModelAdmin):
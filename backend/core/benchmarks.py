@@ -0,0 +1,23 @@
+"""Helpers shared by the benchmark_* management commands."""
+import json
+import statistics
+
+DEFAULT_QUERY = (
+    "{ projects(first: 20) { edges { node { id name status taskCount completedTasks completionRate "
+    "tasks(first: 20) { edges { node { id title status commentCount } } } } } } }"
+)
+
+
+def ok(status_ok, content):
+    return status_ok and "errors" not in json.loads(content)
+
+
+def summarize(elapsed, results):
+    latencies = [seconds * 1000 for seconds, _ in results]
+    return elapsed, latencies, sum(1 for _, success in results if not success)
+
+
+def percentile(values, pct):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[pct - 1]
@@ -0,0 +1,67 @@
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Project, Task
+
+STATUS_COUNTER_FIELDS = {
+    "TODO": "todo_count",
+    "IN_PROGRESS": "in_progress_count",
+    "DONE": "done_count",
+}
+COUNTER_FIELDS = ("task_count",) + tuple(STATUS_COUNTER_FIELDS.values())
+
+
+def shifted(field, delta):
+    """``field + delta``, never below 0: a task written around the counters
+    (raw SQL, ``QuerySet.update()``) must not fail every later delete; the
+    rebuild command repairs such drift.
+    """
+    return F(field) + delta if delta > 0 else Greatest(F(field) + delta, 0)
+
+
+def adjust_task_counters(project_id, deltas):
+    """Apply per-status task deltas, e.g. ``{"TODO": -1, "DONE": 1}``.
+
+    Must run in the same transaction as the task write it accounts for.
+    """
+    updates = {}
+    total = sum(deltas.values())
+    if total:
+        updates["task_count"] = shifted("task_count", total)
+    for status, delta in deltas.items():
+        if delta:
+            field = STATUS_COUNTER_FIELDS[status]
+            updates[field] = shifted(field, delta)
+    if updates:
+        Project.objects.filter(pk=project_id).update(updated_at=timezone.now(), **updates)
+
+
+def task_created(task):
+    adjust_task_counters(task.project_id, {task.status: 1})
+
+
+def task_status_changed(task, old_status):
+    if old_status != task.status:
+        adjust_task_counters(task.project_id, {task.status: 1, old_status: -1})
+
+
+def task_deleted(task):
+    adjust_task_counters(task.project_id, {task.status: -1})
+
+
+def count_tasks(project_ids):
+    """Count tasks from scratch, returning ``{project_id: {field: value}}``."""
+    aggregates = {"task_count": Count("id")}
+    for status, field in STATUS_COUNTER_FIELDS.items():
+        aggregates[field] = Count("id", filter=Q(status=status))
+    rows = (
+        Task.objects.filter(project_id__in=project_ids)
+        .values("project_id")
+        .annotate(**aggregates)
+        .order_by()
+    )
+    counts = {project_id: dict.fromkeys(COUNTER_FIELDS, 0) for project_id in project_ids}
+    for row in rows:
+        counts[row.pop("project_id")] = row
+    return counts
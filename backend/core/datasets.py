@@ -0,0 +1,200 @@
+import csv
+import io
+import math
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .counters import COUNTER_FIELDS, count_tasks
+from .models import Organization, Project, Task, TaskComment
+from .rollups import rebuild_rollups
+from .versions import GLOBAL, bump_data_version
+
+PROJECT_STATUSES = (("ACTIVE", 70), ("COMPLETED", 20), ("ON_HOLD", 10))
+# Task status weights for tasks due in the past and for the others.
+OVERDUE_TASK_STATUSES = (("TODO", 15), ("IN_PROGRESS", 25), ("DONE", 60))
+UPCOMING_TASK_STATUSES = (("TODO", 50), ("IN_PROGRESS", 30), ("DONE", 20))
+VERBS = ("Review", "Design", "Implement", "Test", "Document", "Fix", "Plan", "Migrate", "Deploy", "Refactor")
+NOUNS = (
+    "onboarding flow", "billing page", "search index", "API client", "release notes",
+    "login form", "dashboard", "export job", "mobile layout", "audit log",
+)
+
+
+def skewed_counts(total, buckets, skew):
+    """Split ``total`` over ``buckets`` with Zipf-like weights 1/(i+1)**skew.
+
+    ``skew=0`` splits evenly; the first bucket gets the rounding remainder.
+    """
+    weights = [1 / (i + 1) ** skew for i in range(buckets)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    counts[0] += total - sum(counts)
+    return counts
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class DatasetGenerator:
+    """Reproducible synthetic tenants for load testing.
+
+    Totals are spread over organizations, projects and tasks with a Zipf-like
+    ``skew``, so a few large tenants and projects hold most of the rows, and
+    comments per task follow a geometric distribution. The same ``seed``
+    always produces the same rows. Tasks and comments are written in batches
+    with ``bulk_create``, or with COPY on PostgreSQL.
+    """
+
+    def __init__(self, seed=0, skew=1.0, batch_size=5000, use_copy=None):
+        self.rng = random.Random(seed)
+        self.skew = skew
+        self.batch_size = batch_size
+        if use_copy is None:
+            use_copy = connection.vendor == "postgresql"
+        self.use_copy = use_copy
+        self.now = timezone.now()
+
+    def generate(self, prefix, orgs, projects, tasks, comments):
+        """Create organizations ``<prefix>-1`` to ``<prefix>-<orgs>``, yielding each with its row counts."""
+        project_counts = skewed_counts(projects, orgs, self.skew)
+        task_counts = skewed_counts(tasks, orgs, self.skew)
+        for i in range(orgs):
+            comment_total = round(comments * task_counts[i] / tasks) if tasks else 0
+            yield self.generate_organization(
+                f"{prefix}-{i + 1}", max(project_counts[i], 1), task_counts[i], comment_total
+            )
+
+    def generate_organization(self, slug, projects, tasks, comments):
+        rng = self.rng
+        with transaction.atomic():
+            organization = Organization.objects.create(
+                name=slug.replace("-", " ").title(), slug=slug, contact_email=f"admin@{slug}.test"
+            )
+            project_objects = Project.objects.bulk_create(
+                Project(
+                    organization=organization,
+                    name=f"Project {i + 1}",
+                    description=f"{rng.choice(VERBS)} the {rng.choice(NOUNS)}",
+                    status=self.choose(PROJECT_STATUSES),
+                    due_date=self.due_date(0.2, dates=True),
+                )
+                for i in range(projects)
+            )
+            assignees = [f"user{n}@{slug}.test" for n in range(max(5, int(math.sqrt(tasks))))]
+            comment_rate = math.log1p(tasks / comments) if comments else None
+            comment_count = 0
+
+            task_rows = self.task_rows(project_objects, tasks, assignees)
+            for batch in batched(task_rows, self.batch_size):
+                task_ids = self.insert(Task, batch)
+                if comment_rate is None:
+                    continue
+                # floor(Exp(log(1 + tasks/comments))) is geometric with the requested mean.
+                comment_rows = [
+                    {
+                        "task_id": task_id,
+                        "content": f"{rng.choice(VERBS)} {rng.choice(NOUNS)}: update {n + 1}",
+                        "author_email": self.zipf_choice(assignees),
+                    }
+                    for task_id in task_ids
+                    for n in range(int(rng.expovariate(comment_rate)))
+                ]
+                for comments_batch in batched(comment_rows, self.batch_size):
+                    self.insert(TaskComment, comments_batch)
+                comment_count += len(comment_rows)
+
+            # Bulk inserts skip the counter signals; count the tasks once at the end.
+            counts = count_tasks([project.id for project in project_objects])
+            for project in project_objects:
+                for field, value in counts[project.id].items():
+                    setattr(project, field, value)
+            Project.objects.bulk_update(project_objects, COUNTER_FIELDS, batch_size=self.batch_size)
+            rebuild_rollups(organization.pk)
+        bump_data_version(GLOBAL, organization.pk)
+        return organization, {"projects": projects, "tasks": tasks, "comments": comment_count}
+
+    def task_rows(self, projects, tasks, assignees):
+        rng = self.rng
+        for project, count in zip(projects, skewed_counts(tasks, len(projects), self.skew)):
+            for n in range(count):
+                due_date = self.due_date(0.15)
+                overdue = due_date is not None and due_date < self.now
+                yield {
+                    "project_id": project.id,
+                    "title": f"{rng.choice(VERBS)} {rng.choice(NOUNS)} #{n + 1}",
+                    "description": rng.choice(("", f"Follow-up on the {rng.choice(NOUNS)}.")),
+                    "status": self.choose(OVERDUE_TASK_STATUSES if overdue else UPCOMING_TASK_STATUSES),
+                    "assignee_email": self.zipf_choice(assignees) if rng.random() < 0.8 else "",
+                    "due_date": due_date,
+                }
+
+    def choose(self, weighted):
+        values, weights = zip(*weighted)
+        return self.rng.choices(values, weights)[0]
+
+    def zipf_choice(self, values):
+        # Inverse-CDF sample of a 1/rank distribution, so a few values dominate.
+        index = int(len(values) ** self.rng.random()) - 1
+        return values[index]
+
+    def due_date(self, missing, dates=False):
+        """A due date from 60 days ago to 120 days ahead, or None with probability ``missing``."""
+        if self.rng.random() < missing:
+            return None
+        due = self.now + timedelta(days=self.rng.uniform(-60, 120))
+        return due.date() if dates else due
+
+    def insert(self, model, rows):
+        """Insert ``rows`` (dicts of column values) and return their ids, in order."""
+        if not self.use_copy:
+            objects = model.objects.bulk_create(model(**row) for row in rows)
+            return [obj.pk for obj in objects]
+
+        table = model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+                [table, len(rows)],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            # COPY bypasses auto_now and auto_now_add, so fill those columns here.
+            timestamps = [
+                field.column
+                for field in model._meta.concrete_fields
+                if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+            ]
+            columns = ["id", *timestamps, *rows[0]]
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row_id, row in zip(ids, rows):
+                writer.writerow(
+                    [row_id, *[self.now.isoformat()] * len(timestamps)]
+                    + ["\\N" if value is None else value for value in row.values()]
+                )
+            buffer.seek(0)
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer
+            )
+        return ids
+
+
+def seed_tenant(slug, tasks, comments_per_task=1, seed=0):
+    """Return organization ``slug``, generating it with ``tasks`` tasks if it is new.
+
+    Tasks are spread evenly over about sqrt(tasks) projects, so both the
+    number of projects and the tasks per project grow with the dataset.
+    """
+    organization = Organization.objects.filter(slug=slug).first()
+    if organization is None:
+        generator = DatasetGenerator(seed=seed, skew=0)
+        organization, _ = generator.generate_organization(
+            slug, max(1, math.isqrt(tasks)), tasks, tasks * comments_per_task
+        )
+    return organization
@@ -0,0 +1,66 @@
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from graphql import GraphQLError
+
+from .models import Project, Task
+
+# Soonest deadline first; "id" breaks ties so the keyset order is total.
+DUE_ORDERING = ("due_date", "id")
+
+MAX_WITHIN_DAYS = 366
+
+# The conditions of the partial due date indexes on Task and Project.
+# Querysets filter on them verbatim, so the planner can prove the index applies.
+OPEN_TASK = Q(due_date__isnull=False) & ~Q(status="DONE")
+OPEN_PROJECT = Q(due_date__isnull=False) & ~Q(status="COMPLETED")
+
+
+def _open_tasks(organization):
+    # Either ranges of the (project, due_date, id) partial index, one per
+    # project of the organization, then sorted; or the (due_date, id) one
+    # walked in page order, keeping the organization's tasks, when its open
+    # tasks in the window are too many to sort.
+    return Task.objects.filter(
+        OPEN_TASK, project__in=Project.objects.filter(organization=organization).values("id")
+    )
+
+
+def _open_projects(organization):
+    return Project.objects.filter(OPEN_PROJECT, organization=organization)
+
+
+def _window(within_days):
+    if within_days < 1 or within_days > MAX_WITHIN_DAYS:
+        raise GraphQLError(f"'withinDays' must be between 1 and {MAX_WITHIN_DAYS}")
+    return timedelta(days=within_days)
+
+
+def overdue_cutoff():
+    """The start of today in TIME_ZONE: an open task due before it is overdue.
+
+    A task turns overdue once its due day is over, so overdueTasks lists
+    the tasks the due day rollups count in overdueCount.
+    """
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+
+def overdue_tasks(organization):
+    return _open_tasks(organization).filter(due_date__lt=overdue_cutoff())
+
+
+def upcoming_tasks(organization, within_days):
+    # From the start of today, so tasks due earlier today are still listed.
+    return _open_tasks(organization).filter(
+        due_date__gte=overdue_cutoff(), due_date__lt=timezone.now() + _window(within_days)
+    )
+
+
+def overdue_projects(organization):
+    return _open_projects(organization).filter(due_date__lt=timezone.localdate())
+
+
+def upcoming_projects(organization, within_days):
+    today = timezone.localdate()
+    return _open_projects(organization).filter(due_date__gte=today, due_date__lte=today + _window(within_days))
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+SEQUENCE_KEY = "pmtool:events:sequence"
+# Events a subscriber may fall behind by; older ones are dropped.
+MAX_PENDING_EVENTS = 100
+
+
+def task_channel(project_id):
+    return f"task:{project_id}"
+
+
+def comment_channel(task_id):
+    return f"comment:{task_id}"
+
+
+class Subscriber:
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(MAX_PENDING_EVENTS)
+
+    def put(self, event):
+        # Called from any thread; the queue belongs to the subscriber's loop.
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            pass  # the loop is closed
+
+    def _put(self, event):
+        if not self.queue.full():
+            self.queue.put_nowait(event)
+
+
+class InMemoryBroker:
+    """Delivers events to the subscribers of this process only.
+
+    Enough for a single ASGI process; use ``CacheBroker`` (or another broker
+    with the same interface) when several processes serve subscriptions.
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+    def deliver(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            subscriber.put(event)
+
+    def has_subscribers(self, channel=None):
+        with self._lock:
+            return bool(self._subscribers.get(channel) if channel else self._subscribers)
+
+    def listen(self):
+        """Hook run when a subscription starts, e.g. to start polling."""
+
+    async def subscribe(self, channel):
+        """Yield the events published to ``channel`` from now on."""
+        subscriber = Subscriber()
+        with self._lock:
+            self._subscribers[channel].add(subscriber)
+        self.listen()
+        try:
+            while True:
+                yield await subscriber.queue.get()
+        finally:
+            with self._lock:
+                self._subscribers[channel].discard(subscriber)
+                if not self._subscribers[channel]:
+                    del self._subscribers[channel]
+
+
+class CacheBroker(InMemoryBroker):
+    """Shares events between processes through the GRAPHQL_SUBSCRIPTION_CACHE alias.
+
+    ``publish()`` stores each event under the next number of a shared
+    sequence. While a process has subscribers it polls the sequence every
+    GRAPHQL_SUBSCRIPTION_POLL_INTERVAL seconds and delivers the events it has
+    not seen yet. Delivery is at most once: events that expire before a poll
+    are skipped.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._poller = None
+
+    @property
+    def cache(self):
+        return caches[settings.GRAPHQL_SUBSCRIPTION_CACHE]
+
+    def publish(self, channel, event):
+        self.cache.add(SEQUENCE_KEY, 0, timeout=None)
+        sequence = self.cache.incr(SEQUENCE_KEY)
+        self.cache.set(f"{SEQUENCE_KEY}:{sequence}", (channel, event), timeout=60)
+
+    def listen(self):
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.get_running_loop().create_task(self.poll())
+
+    async def poll(self):
+        seen = await self.cache.aget(SEQUENCE_KEY, 0)
+        while self.has_subscribers():
+            await asyncio.sleep(settings.GRAPHQL_SUBSCRIPTION_POLL_INTERVAL)
+            latest = await self.cache.aget(SEQUENCE_KEY, 0)
+            if latest <= seen:
+                continue
+            keys = [f"{SEQUENCE_KEY}:{sequence}" for sequence in range(seen + 1, latest + 1)]
+            events = await self.cache.aget_many(keys)
+            for key in keys:
+                if key in events:
+                    self.deliver(*events[key])
+            seen = latest
+
+
+_brokers = {}
+
+
+def get_broker():
+    """The broker named by GRAPHQL_SUBSCRIPTION_BROKER, one instance per process."""
+    path = settings.GRAPHQL_SUBSCRIPTION_BROKER
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+def publish_on_commit(channel, event):
+    """Publish ``event`` once the current transaction commits, so subscribers read committed rows."""
+    transaction.on_commit(lambda: get_broker().publish(channel, event))
@@ -0,0 +1,114 @@
+import csv
+import io
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .models import Project, Task, TaskComment
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Columns exported per kind, parents referenced by id.
+EXPORT_COLUMNS = {
+    "projects": (
+        "id", "name", "description", "status", "due_date", "created_at", "updated_at",
+        "task_count", "todo_count", "in_progress_count", "done_count",
+    ),
+    "tasks": (
+        "id", "project_id", "title", "description", "status", "assignee_email", "due_date",
+        "created_at", "updated_at",
+    ),
+    "comments": ("id", "task_id", "content", "author_email", "created_at", "updated_at"),
+}
+KINDS = tuple(EXPORT_COLUMNS)
+
+# Output is sent in pieces of roughly this many bytes.
+BUFFER_SIZE = 64 * 1024
+
+
+def export_queryset(organization, kind):
+    if kind == "projects":
+        queryset = Project.objects.filter(organization=organization)
+    elif kind == "tasks":
+        queryset = Task.objects.filter(project__organization=organization)
+    else:
+        queryset = TaskComment.objects.filter(task__project__organization=organization)
+    return queryset.order_by("id").values_list(*EXPORT_COLUMNS[kind])
+
+
+def export_rows(organization, kind):
+    """Yield ``kind`` rows as tuples, reading EXPORT_CHUNK_SIZE rows at a time.
+
+    ``iterator()`` uses a server-side cursor on PostgreSQL, so memory stays
+    flat however large the organization is.
+    """
+    return export_queryset(organization, kind).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+
+def _value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def ndjson_lines(organization, kinds):
+    for kind in kinds:
+        columns = EXPORT_COLUMNS[kind]
+        for row in export_rows(organization, kind):
+            record = {"type": kind[:-1], **{column: _value(value) for column, value in zip(columns, row)}}
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def csv_lines(organization, kind):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS[kind])
+    for row in export_rows(organization, kind):
+        writer.writerow([_value(value) for value in row])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def buffered(lines, size=BUFFER_SIZE):
+    """Join text lines into UTF-8 chunks of about ``size`` bytes."""
+    chunk, length = [], 0
+    for line in lines:
+        data = line.encode()
+        chunk.append(data)
+        length += len(data)
+        if length >= size:
+            yield b"".join(chunk)
+            chunk, length = [], 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+def gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(organization, export_format, kinds, compress=False):
+    """The export as an iterator of byte chunks."""
+    lines = csv_lines(organization, kinds[0]) if export_format == "csv" else ndjson_lines(organization, kinds)
+    chunks = buffered(lines)
+    return gzipped(chunks) if compress else chunks
+
+
+async def iterate_in_thread(iterator):
+    """Iterate a synchronous (database reading) iterator from async code.
+
+    Every step runs in the thread of Django's synchronous code, where the
+    iterator's connection and server-side cursor live; an ASGI response
+    would otherwise read the whole iterator into memory first.
+    """
+    step = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    while (chunk := await step(iterator, done)) is not done:
+        yield chunk
@@ -0,0 +1,251 @@
+import codecs
+import csv
+import json
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, rollups
+from .models import Project, Task, TaskComment
+from .schema import comment_input_error, normalize_email, parse_id, task_input_error
+from .sync import record_changes
+from .versions import bump_data_version
+
+FORMATS = ("ndjson", "csv")
+# Kinds a CSV import can hold, one per file.
+CSV_KINDS = ("tasks", "comments")
+
+
+def text_lines(chunks):
+    """Decode an iterable of UTF-8 byte lines (a request, a binary file) lazily."""
+    return codecs.iterdecode(chunks, "utf-8")
+
+
+def ndjson_records(lines):
+    """Yield ``(line_number, record)`` per non-blank line; ``record`` is None when the line is not a JSON object."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield number, record if isinstance(record, dict) else None
+
+
+def csv_records(lines, kind):
+    """Yield ``(line_number, record)`` per CSV row, typed as ``kind`` ("tasks" or "comments")."""
+    reader = csv.DictReader(lines)
+    for row in reader:
+        row["type"] = kind[:-1]
+        yield reader.line_num, row
+
+
+def read_records(lines, import_format, kind=None):
+    return csv_records(lines, kind) if import_format == "csv" else ndjson_records(lines)
+
+
+def _text(record, key):
+    value = record.get(key)
+    return "" if value is None else str(value)
+
+
+class Importer:
+    """Import task and comment records into an organization in batched transactions.
+
+    Records use the format of /export/: tasks name their project by
+    ``project_id`` or by ``project`` (created when no project has that name),
+    comments their task by ``task_id``. A ``task_id`` matching the ``id`` of a
+    task line imported earlier in the same stream refers to that task,
+    otherwise to an existing task of the organization. Rows are validated
+    like ``createTask`` and ``addTaskComment``; only the pending batch and a
+    map of imported task ids stay in memory.
+    """
+
+    def __init__(self, organization, batch_size=1000):
+        self.organization = organization
+        self.batch_size = batch_size
+        self.counts = {"tasks": 0, "comments": 0, "rejected": 0}
+        self.projects = {}  # ("id", pk) or ("name", name) -> project id
+        self.task_ids = {}  # source id of an imported task -> its id, None if rejected
+        self.pending_tasks = []
+        self.pending_comments = []
+
+    def run(self, records):
+        """Import ``(line_number, record)`` pairs, yielding events as it goes.
+
+        ``{"line": n, "error": message}`` reports a rejected line and the
+        running ``counts`` follow every committed batch.
+        """
+        for number, record in records:
+            error = self.add(number, record)
+            if error:
+                yield self.reject(number, error)
+            if len(self.pending_tasks) + len(self.pending_comments) >= self.batch_size:
+                yield from self.flush()
+        yield from self.flush()
+
+    def reject(self, number, message):
+        self.counts["rejected"] += 1
+        return {"line": number, "error": message}
+
+    def add(self, number, record):
+        """Validate one record and queue it, returning an error message if it is rejected."""
+        if record is None:
+            return "Invalid record"
+        kind = record.get("type")
+        if kind == "task":
+            return self.add_task(number, record)
+        if kind == "comment":
+            return self.add_comment(number, record)
+        return "Invalid type. Must be one of: task, comment"
+
+    def add_task(self, number, record):
+        source_id = _text(record, "id") or None
+        error, project, task = self.parse_task(record)
+        if error:
+            if source_id is not None:
+                self.task_ids[source_id] = None
+            return error
+        self.pending_tasks.append((number, source_id, project, task))
+        return None
+
+    def parse_task(self, record):
+        title = _text(record, "title")
+        status = _text(record, "status") or "TODO"
+        assignee_email = _text(record, "assignee_email")
+        error = task_input_error(title, status, assignee_email)
+        if error:
+            return error, None, None
+        due_date = None
+        if record.get("due_date"):
+            due_date = parse_datetime(_text(record, "due_date"))
+            if due_date is None:
+                return "Invalid due date", None, None
+            if timezone.is_naive(due_date):
+                due_date = timezone.make_aware(due_date)
+        if record.get("project_id"):
+            project = ("id", parse_id(record["project_id"]))
+        elif len(_text(record, "project").strip()) >= 2:
+            project = ("name", _text(record, "project").strip())
+        else:
+            return "Task needs a project_id or a project name of at least 2 characters", None, None
+        task = Task(
+            title=title.strip(),
+            description=_text(record, "description"),
+            status=status,
+            assignee_email=normalize_email(assignee_email),
+            due_date=due_date,
+        )
+        return None, project, task
+
+    def add_comment(self, number, record):
+        content = _text(record, "content")
+        author_email = _text(record, "author_email")
+        error = comment_input_error(content, author_email)
+        if error:
+            return error
+        task_ref = _text(record, "task_id")
+        if not task_ref:
+            return "Task not found"
+        self.pending_comments.append(
+            (number, task_ref, TaskComment(content=content, author_email=author_email))
+        )
+        return None
+
+    def flush(self):
+        if not self.pending_tasks and not self.pending_comments:
+            return
+        rejects = []
+        with transaction.atomic():
+            projects, tasks = self.save_tasks(rejects)
+            comments = self.save_comments(rejects)
+            record_changes(self.organization.pk, projects=projects, tasks=tasks, comments=comments)
+        bump_data_version(self.organization.pk)
+        self.pending_tasks, self.pending_comments = [], []
+        for number, message in sorted(rejects):
+            yield self.reject(number, message)
+        yield dict(self.counts)
+
+    def resolve_projects(self, refs):
+        """Map project references to ids, creating the projects named but missing."""
+        refs = set(refs) - set(self.projects)
+        ids = [value for kind, value in refs if kind == "id" and value is not None]
+        names = [value for kind, value in refs if kind == "name"]
+        projects = Project.objects.filter(organization=self.organization)
+        for pk in projects.filter(id__in=ids).values_list("id", flat=True):
+            self.projects[("id", pk)] = pk
+        for name, pk in projects.filter(name__in=names).values_list("name", "id"):
+            self.projects[("name", name)] = pk
+        created = []
+        for name in sorted(name for name in names if ("name", name) not in self.projects):
+            pk, was_created = self.create_project(name)
+            if was_created:
+                created.append(pk)
+            if pk is not None:
+                self.projects[("name", name)] = pk
+        return created
+
+    def create_project(self, name):
+        """Create the project ``name``, returning ``(id, created)``.
+
+        Another import or a mutation may have created it since it was looked
+        up; its id is returned then (None if that transaction rolled back).
+        """
+        try:
+            with transaction.atomic():
+                return Project.objects.create(organization=self.organization, name=name).pk, True
+        except IntegrityError:
+            projects = Project.objects.filter(organization=self.organization, name=name)
+            return projects.values_list("id", flat=True).first(), False
+
+    def save_tasks(self, rejects):
+        """Insert the pending tasks, returning the ids of the changed projects and of the new tasks."""
+        created_projects = self.resolve_projects(project for _, _, project, _ in self.pending_tasks)
+        new_tasks = []
+        deltas = defaultdict(lambda: defaultdict(int))
+        for number, source_id, project, task in self.pending_tasks:
+            task.project_id = self.projects.get(project)
+            if task.project_id is None:
+                rejects.append((number, "Project not found"))
+                if source_id is not None:
+                    self.task_ids[source_id] = None
+                continue
+            new_tasks.append((source_id, task))
+            deltas[task.project_id][task.status] += 1
+
+        Task.objects.bulk_create([task for _, task in new_tasks])
+        for source_id, task in new_tasks:
+            if source_id is not None:
+                self.task_ids[source_id] = task.id
+        # In id order, as concurrent imports lock the same project rows.
+        for project_id, project_deltas in sorted(deltas.items()):
+            counters.adjust_task_counters(project_id, project_deltas)
+        rollups.tasks_added(self.organization.pk, [task for _, task in new_tasks])
+        self.counts["tasks"] += len(new_tasks)
+        return created_projects + list(deltas), [task.id for _, task in new_tasks]
+
+    def save_comments(self, rejects):
+        existing_refs = {ref for _, ref, _ in self.pending_comments if ref not in self.task_ids}
+        existing = set(
+            Task.objects.filter(
+                project__organization=self.organization,
+                id__in={parse_id(ref) for ref in existing_refs} - {None},
+            ).values_list("id", flat=True)
+        )
+        new_comments = []
+        for number, ref, comment in self.pending_comments:
+            if ref in self.task_ids:
+                comment.task_id = self.task_ids[ref]
+            else:
+                comment.task_id = parse_id(ref) if parse_id(ref) in existing else None
+            if comment.task_id is None:
+                rejects.append((number, "Task not found"))
+                continue
+            new_comments.append(comment)
+
+        TaskComment.objects.bulk_create(new_comments)
+        self.counts["comments"] += len(new_comments)
+        return [comment.id for comment in new_comments]
@@ -0,0 +1,93 @@
+from collections import defaultdict
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from graphene.utils.dataloader import DataLoader as AsyncDataLoader
+
+from .models import TaskComment
+from .pagination import keyset_filter, order_expressions, page_size
+
+
+class DataLoader:
+    """Per-request memoizing loader for the synchronous executor.
+
+    The query planner (core.planner) prefetches what a query selects, so
+    resolvers only get here for rows it did not load; ``load()`` fetches
+    the one key with ``batch_load_fn`` (a list of keys in, one value per key
+    out, as for the async loaders) and caches the value for the request.
+    """
+
+    def __init__(self, batch_load_fn):
+        self.batch_load_fn = batch_load_fn
+        self._cache = {}
+
+    def load(self, key):
+        if key not in self._cache:
+            self._cache[key] = self.batch_load_fn([key])[0]
+        return self._cache[key]
+
+
+def async_loader(batch_load_fn):
+    """asyncio loader running the synchronous ``batch_load_fn`` off the event loop.
+
+    Loads made in the same tick of the loop are batched into one call.
+    """
+
+    async def load(keys):
+        return await sync_to_async(batch_load_fn)(list(keys))
+
+    return AsyncDataLoader(load)
+
+
+class Loaders:
+    """The set of loaders shared by every resolver of one request.
+
+    With ``is_async`` the loaders return awaitables, for resolvers executed
+    by the async GraphQL view.
+    """
+
+    def __init__(self, is_async=False):
+        self.is_async = is_async
+        self.comment_counts = self._loader(self._load_comment_counts)
+        self._pages = {}
+
+    def _loader(self, batch_load_fn):
+        return async_loader(batch_load_fn) if self.is_async else DataLoader(batch_load_fn)
+
+    def page(self, model, parent_field, first, after):
+        """Loader returning one connection page of ``model`` rows per parent id."""
+        key = (model, parent_field, first, after)
+        if key not in self._pages:
+            self._pages[key] = self._loader(partial(self._load_pages, *key))
+        return self._pages[key]
+
+    def _load_pages(self, model, parent_field, first, after, parent_ids):
+        column = f"{parent_field}_id"
+        queryset = keyset_filter(model._default_manager.filter(**{f"{column}__in": parent_ids}), after)
+        queryset = queryset.annotate(
+            page_row=Window(RowNumber(), partition_by=F(column), order_by=order_expressions())
+        ).filter(page_row__lte=page_size(first) + 1)
+        by_parent = defaultdict(list)
+        for row in queryset:
+            by_parent[getattr(row, column)].append(row)
+        return [by_parent[parent_id] for parent_id in parent_ids]
+
+    def _load_comment_counts(self, task_ids):
+        rows = (
+            TaskComment.objects.filter(task_id__in=task_ids)
+            .values("task_id")
+            .annotate(count=Count("id"))
+            .order_by()
+        )
+        counts = {row["task_id"]: row["count"] for row in rows}
+        return [counts.get(task_id, 0) for task_id in task_ids]
+
+
+def get_loaders(info):
+    context = info.context
+    loaders = getattr(context, "loaders", None)
+    if loaders is None:
+        loaders = context.loaders = Loaders()
+    return loaders
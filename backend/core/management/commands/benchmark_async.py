@@ -0,0 +1,139 @@
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import path
+
+from core.benchmarks import DEFAULT_QUERY, ok, percentile, summarize
+from core.models import Organization
+from pmtool.graphql_view import AsyncContextGraphQLView, ContextGraphQLView
+
+
+# URLconfs serving /graphql/ with each view, whatever GRAPHQL_ASYNC says.
+class SyncURLConf:
+    urlpatterns = [path("graphql/", ContextGraphQLView.as_view())]
+
+
+class AsyncURLConf:
+    urlpatterns = [path("graphql/", AsyncContextGraphQLView.as_view())]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare GraphQL throughput of the WSGI application (sync view, a fixed pool "
+        "of worker threads) with the ASGI application (async view, one event loop)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", required=True, help="Organization slug sent as the org header.")
+        parser.add_argument("--query", default=DEFAULT_QUERY)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=50, help="Requests in flight at once.")
+        parser.add_argument(
+            "--wsgi-threads", type=int, default=4, help="Worker threads of the simulated WSGI server."
+        )
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=0.0,
+            help="Extra milliseconds added to every SQL query, to emulate a slow database.",
+        )
+
+    def handle(self, *args, org, query, requests, concurrency, wsgi_threads, db_latency, **options):
+        if not Organization.objects.filter(slug=org).exists():
+            raise CommandError(f"Organization '{org}' does not exist")
+        body = json.dumps({"query": query}).encode()
+
+        def delay(execute, sql, params, many, context):
+            time.sleep(db_latency / 1000)
+            return execute(sql, params, many, context)
+
+        def add_delay(sender, connection, **kwargs):
+            connection.execute_wrappers.append(delay)
+
+        if db_latency:
+            connection_created.connect(add_delay)
+        try:
+            with override_settings(ROOT_URLCONF=SyncURLConf):
+                wsgi = self.run_wsgi(body, org, requests, wsgi_threads)
+            with override_settings(ROOT_URLCONF=AsyncURLConf):
+                asgi = asyncio.run(self.run_asgi(body, org, requests, concurrency))
+        finally:
+            connection_created.disconnect(add_delay)
+
+        self.stdout.write(f"{'path':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7}")
+        for name, (elapsed, latencies, errors) in (("wsgi", wsgi), ("asgi", asgi)):
+            self.stdout.write(
+                f"{name:<6} {len(latencies) / elapsed:>9.1f} {percentile(latencies, 50):>9.1f} "
+                f"{percentile(latencies, 95):>9.1f} {errors:>7}"
+            )
+
+    def run_wsgi(self, body, org, requests, threads):
+        application = get_wsgi_application()
+
+        def request(_):
+            environ = {
+                "REQUEST_METHOD": "POST",
+                "PATH_INFO": "/graphql/",
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "CONTENT_TYPE": "application/json",
+                "CONTENT_LENGTH": str(len(body)),
+                "HTTP_X_ORG_SLUG": org,
+                "wsgi.input": BytesIO(body),
+                "wsgi.url_scheme": "http",
+            }
+            statuses = []
+            started = time.perf_counter()
+            response = application(environ, lambda status, headers: statuses.append(status))
+            content = b"".join(response)
+            return time.perf_counter() - started, ok(statuses[0].startswith("200"), content)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            results = list(pool.map(request, range(requests)))
+        return summarize(time.perf_counter() - started, results)
+
+    async def run_asgi(self, body, org, requests, concurrency):
+        application = get_asgi_application()
+        slots = asyncio.Semaphore(concurrency)
+        scope = {
+            "type": "http",
+            "method": "POST",
+            "path": "/graphql/",
+            "query_string": b"",
+            "server": ("localhost", 80),
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-org-slug", org.encode()),
+            ],
+        }
+
+        async def request():
+            messages = []
+
+            async def receive():
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            async def send(message):
+                messages.append(message)
+
+            async with slots:
+                started = time.perf_counter()
+                await application(dict(scope), receive, send)
+                elapsed = time.perf_counter() - started
+            status = messages[0]["status"]
+            content = b"".join(m.get("body", b"") for m in messages if m["type"] == "http.response.body")
+            return elapsed, ok(status == 200, content)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(request() for _ in range(requests)))
+        return summarize(time.perf_counter() - started, results)
@@ -0,0 +1,122 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from core.benchmarks import DEFAULT_QUERY, ok, percentile, summarize
+from core.models import Organization
+from pmtool.db.base import close_pools, pool_stats
+
+# The DB_CONN_MODE settings, applied to the default database in turn.
+MODES = {
+    "none": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False},
+    "persistent": {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True},
+    "pool": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare per-request latency of the WSGI application with each DB_CONN_MODE: "
+        "a connection per request, persistent connections and the connection pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", required=True, help="Organization slug sent as the org header.")
+        parser.add_argument("--query", default=DEFAULT_QUERY)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--threads", type=int, default=8, help="Worker threads of the simulated WSGI server.")
+        parser.add_argument("--pool-size", type=int, default=4)
+        parser.add_argument("--modes", default=",".join(MODES))
+
+    def handle(self, *args, org, query, requests, threads, pool_size, modes, **options):
+        settings_dict = connections.settings["default"]
+        if settings_dict["ENGINE"] != "pmtool.db":
+            raise CommandError("The default database must use the pmtool.db engine")
+        modes = modes.split(",")
+        if any(mode not in MODES for mode in modes):
+            raise CommandError(f"Invalid modes. Must be a list of: {', '.join(MODES)}")
+        if not Organization.objects.filter(slug=org).exists():
+            raise CommandError(f"Organization '{org}' does not exist")
+        connections.close_all()
+        body = json.dumps({"query": query}).encode()
+        application = get_wsgi_application()
+
+        attached = []
+
+        def count(sender, connection, **kwargs):
+            attached.append(connection.alias)
+
+        original = {key: settings_dict.get(key) for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "POOL")}
+        results = {}
+        connection_created.connect(count)
+        try:
+            for mode in modes:
+                settings_dict.update(MODES[mode])
+                settings_dict.pop("POOL", None)
+                if mode == "pool":
+                    settings_dict["POOL"] = {"SIZE": pool_size, "TIMEOUT": 30}
+                close_pools()
+                attached.clear()
+                elapsed, latencies, errors = self.run(application, body, org, requests, threads)
+                stats = pool_stats().get("default", {})
+                opened = stats["opened"] if mode == "pool" else len(attached)
+                results[mode] = (elapsed, latencies, errors, len(attached), opened, stats)
+        finally:
+            connection_created.disconnect(count)
+            close_pools()
+            settings_dict.pop("POOL", None)
+            settings_dict.update({key: value for key, value in original.items() if value is not None})
+
+        self.stdout.write(
+            f"{'mode':<11} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'errors':>7} {'connects':>9} {'opened':>7}"
+        )
+        for mode, (elapsed, latencies, errors, connects, opened, _) in results.items():
+            self.stdout.write(
+                f"{mode:<11} {len(latencies) / elapsed:>9.1f} {percentile(latencies, 50):>9.1f} "
+                f"{percentile(latencies, 95):>9.1f} {errors:>7} {connects:>9} {opened:>7}"
+            )
+        if "pool" in results:
+            stats = results["pool"][-1]
+            self.stdout.write(
+                f"pool: size {stats['size']}, {stats['waits']} waits, "
+                f"{stats['wait_seconds'] * 1000:.1f} ms waited (max {stats['max_wait_seconds'] * 1000:.1f} ms), "
+                f"{stats['timeouts']} timeouts"
+            )
+
+    def run(self, application, body, org, requests, threads):
+        def request(_):
+            environ = {
+                "REQUEST_METHOD": "POST",
+                "PATH_INFO": "/graphql/",
+                "SERVER_NAME": "localhost",
+                "SERVER_PORT": "80",
+                "CONTENT_TYPE": "application/json",
+                "CONTENT_LENGTH": str(len(body)),
+                "HTTP_X_ORG_SLUG": org,
+                "wsgi.input": BytesIO(body),
+                "wsgi.url_scheme": "http",
+            }
+            statuses = []
+            started = time.perf_counter()
+            response = application(environ, lambda status, headers: statuses.append(status))
+            content = b"".join(response)
+            # Sends request_finished, which closes (or returns) the connection.
+            response.close()
+            return time.perf_counter() - started, ok(statuses[0].startswith("200"), content)
+
+        def finish(_):
+            connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            results = list(executor.map(request, range(requests)))
+            elapsed = time.perf_counter() - started
+            # Drop the persistent connections the worker threads still hold.
+            list(executor.map(finish, range(threads * 4)))
+        return summarize(elapsed, results)
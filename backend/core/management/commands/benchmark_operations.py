@@ -0,0 +1,222 @@
+import json
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from graphql import NonNullTypeNode, OperationDefinitionNode, OperationType, parse
+
+from core.benchmarks import percentile
+from core.datasets import seed_tenant
+from core.management.commands.extract_persisted_queries import operations_in
+from core.models import Project, Task
+
+# Operation variables filled from the seeded tenant, by variable name and, for
+# a bare "id", by the operation's root field.
+FIXTURE_VARIABLES = {"projectId": "project", "taskId": "task"}
+FIXTURE_IDS = {
+    "organization": "organization",
+    "updateOrganization": "organization",
+    "deleteOrganization": "organization",
+    "updateProject": "project",
+    "updateTask": "task",
+}
+
+
+class Operation:
+    def __init__(self, text):
+        self.text = text
+        self.definition = next(
+            d for d in parse(text).definitions if isinstance(d, OperationDefinitionNode)
+        )
+        self.name = self.definition.name.value
+        self.is_mutation = self.definition.operation == OperationType.MUTATION
+        self.is_subscription = self.definition.operation == OperationType.SUBSCRIPTION
+        self.root_field = self.definition.selection_set.selections[0].name.value
+
+    def variables(self, fixtures, iteration):
+        """Values for the required variables; optional ones are left out."""
+        values = {}
+        for definition in self.definition.variable_definitions:
+            if not isinstance(definition.type, NonNullTypeNode):
+                continue
+            name = definition.variable.name.value
+            if name == "id":
+                values[name] = fixtures[FIXTURE_IDS[self.root_field]].pk
+            elif name in FIXTURE_VARIABLES:
+                values[name] = fixtures[FIXTURE_VARIABLES[name]].pk
+            elif name.endswith("Email"):
+                values[name] = "bench@example.com"
+            elif name == "slug":
+                values[name] = f"bench-op-{iteration}"
+            else:
+                values[name] = f"Benchmark {iteration}"
+        return values
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the frontend's GraphQL operations against seeded tenants of growing size, "
+        "report latency percentiles, SQL query counts and peak memory, and fail when query "
+        "counts grow with the data or latency regresses past the stored baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="10,1000,100000", help="Comma-separated task counts of the seeded tenants."
+        )
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--source",
+            default=str(Path(settings.BASE_DIR).parent / "frontend" / "src"),
+            help="Directory scanned for gql`` operations.",
+        )
+        parser.add_argument(
+            "--skip",
+            default="DeleteOrganization",
+            help="Comma-separated operations not to replay. Deleting a whole seeded tenant is skipped by default.",
+        )
+        parser.add_argument("--baseline", default=str(Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"))
+        parser.add_argument("--update-baseline", action="store_true", help="Store this run as the new baseline.")
+        parser.add_argument(
+            "--tolerance", type=float, default=0.25, help="Allowed p95 latency growth over the baseline (0.25 = 25%%)."
+        )
+        parser.add_argument(
+            "--min-regression-ms",
+            type=float,
+            default=2.0,
+            help="Ignore p95 regressions smaller than this many milliseconds.",
+        )
+
+    def handle(self, *args, sizes, iterations, source, skip, baseline, update_baseline, tolerance,
+               min_regression_ms, **options):
+        sizes = sorted(int(size) for size in sizes.split(","))
+        skipped = set(filter(None, skip.split(",")))
+        operations = [
+            Operation(text)
+            for path in sorted(Path(source).rglob("*.ts*"))
+            for text in operations_in(path.read_text())
+        ]
+        # Subscriptions only run over WebSocket.
+        operations = [
+            operation for operation in operations
+            if operation.name not in skipped and not operation.is_subscription
+        ]
+        if not operations:
+            raise CommandError(f"No GraphQL operations found in {source}")
+
+        results = {}
+        self.stdout.write(
+            f"{'tasks':>7} {'operation':<22} {'p50 ms':>8} {'p95 ms':>8} {'queries':>8} {'peak KiB':>9}"
+        )
+        for size in sizes:
+            organization = seed_tenant(f"bench-{size}", size)
+            project = Project.objects.filter(organization=organization).order_by("-task_count", "id").first()
+            fixtures = {
+                "organization": organization,
+                "project": project,
+                "task": Task.objects.filter(project=project).order_by("id").first(),
+            }
+            client = Client(HTTP_X_ORG_SLUG=organization.slug, HTTP_CACHE_CONTROL="no-cache")
+            for operation in operations:
+                result = self.measure(client, operation, fixtures, iterations)
+                results.setdefault(operation.name, {})[str(size)] = result
+                self.stdout.write(
+                    f"{size:>7} {operation.name:<22} {result['p50']:>8.2f} {result['p95']:>8.2f} "
+                    f"{result['queries']:>8} {result['peak_kib']:>9.0f}"
+                )
+
+        failures = self.query_growth(results, sizes)
+        baseline_path = Path(baseline)
+        if update_baseline:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(f"Stored baseline in {baseline_path}")
+        elif baseline_path.exists():
+            failures += self.regressions(results, json.loads(baseline_path.read_text()), tolerance, min_regression_ms)
+        else:
+            failures.append(f"No baseline at {baseline_path}; run with --update-baseline to store one")
+
+        if failures:
+            raise CommandError("\n".join(failures))
+        self.stdout.write(self.style.SUCCESS("No query count growth or latency regressions"))
+
+    def execute_operation(self, client, operation, fixtures, iteration):
+        response = client.post(
+            "/graphql/",
+            data={"query": operation.text, "variables": operation.variables(fixtures, iteration)},
+            content_type="application/json",
+        )
+        data = response.json()
+        if data.get("errors"):
+            raise CommandError(f"{operation.name}: {data['errors'][0]['message']}")
+
+    def run_once(self, client, operation, fixtures, iteration):
+        # Mutations are rolled back so every iteration sees the same data.
+        if not operation.is_mutation:
+            return self.execute_operation(client, operation, fixtures, iteration)
+        with transaction.atomic():
+            self.execute_operation(client, operation, fixtures, iteration)
+            transaction.set_rollback(True)
+
+    def measure(self, client, operation, fixtures, iterations):
+        self.run_once(client, operation, fixtures, 0)  # warm the document and organization caches
+        latencies, queries = [], 0
+        for iteration in range(1, iterations + 1):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                self.run_once(client, operation, fixtures, iteration)
+                latencies.append((time.perf_counter() - started) * 1000)
+            queries = max(queries, len([q for q in captured.captured_queries if not is_transaction_control(q)]))
+
+        tracemalloc.start()
+        try:
+            self.run_once(client, operation, fixtures, iterations + 1)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {
+            "p50": statistics.median(latencies),
+            "p95": percentile(latencies, 95),
+            "queries": queries,
+            "peak_kib": peak / 1024,
+        }
+
+    def query_growth(self, results, sizes):
+        failures = []
+        for name, by_size in results.items():
+            smallest = by_size[str(sizes[0])]["queries"]
+            for size in sizes[1:]:
+                if by_size[str(size)]["queries"] > smallest:
+                    failures.append(
+                        f"{name}: {smallest} queries with {sizes[0]} tasks but "
+                        f"{by_size[str(size)]['queries']} with {size}"
+                    )
+        return failures
+
+    def regressions(self, results, baseline, tolerance, min_regression_ms):
+        failures = []
+        for name, by_size in results.items():
+            for size, result in by_size.items():
+                expected = baseline.get(name, {}).get(size)
+                if expected is None:
+                    continue
+                if result["queries"] > expected["queries"]:
+                    failures.append(
+                        f"{name} ({size} tasks): {result['queries']} queries, baseline {expected['queries']}"
+                    )
+                allowed = max(expected["p95"] * (1 + tolerance), expected["p95"] + min_regression_ms)
+                if result["p95"] > allowed:
+                    failures.append(
+                        f"{name} ({size} tasks): p95 {result['p95']:.2f}ms, baseline {expected['p95']:.2f}ms"
+                    )
+        return failures
+
+
+def is_transaction_control(query):
+    return query["sql"].startswith(("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT"))
@@ -0,0 +1,66 @@
+import json
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from graphql import FieldNode, GraphQLSyntaxError, NameNode, OperationDefinitionNode, parse, print_ast
+
+from pmtool.documents import query_hash
+
+GQL_TEMPLATE = re.compile(r"gql`([^`]*)`")
+TYPENAME_FIELD = FieldNode(name=NameNode(value="__typename"), arguments=(), directives=())
+
+
+def add_typename(node, parent=None):
+    """Add __typename to every selection set below the operation, as Apollo's cache does."""
+    selection_set = getattr(node, "selection_set", None)
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        add_typename(selection, node)
+    if isinstance(node, OperationDefinitionNode):
+        return
+    if any(
+        isinstance(selection, FieldNode) and selection.name.value.startswith("__")
+        for selection in selection_set.selections
+    ):
+        return
+    selection_set.selections = tuple(selection_set.selections) + (TYPENAME_FIELD,)
+
+
+def operations_in(source):
+    for match in GQL_TEMPLATE.finditer(source):
+        text = match.group(1)
+        if "${" in text:
+            raise CommandError("Interpolated gql templates are not supported")
+        document = parse(text)
+        for definition in document.definitions:
+            add_typename(definition)
+        yield print_ast(document)
+
+
+class Command(BaseCommand):
+    help = "Build the persisted query registry from the frontend's gql`` operations."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            default=str(Path(settings.BASE_DIR).parent / "frontend" / "src"),
+            help="Directory scanned for .ts/.tsx files.",
+        )
+        parser.add_argument("--output", default=settings.GRAPHQL_PERSISTED_QUERIES_FILE)
+
+    def handle(self, *args, source, output, **options):
+        registry = {}
+        for path in sorted(Path(source).rglob("*.ts*")):
+            try:
+                for query in operations_in(path.read_text()):
+                    registry[query_hash(query)] = query
+            except (CommandError, GraphQLSyntaxError) as e:
+                raise CommandError(f"{path}: {e}")
+
+        with open(output, "w") as registry_file:
+            json.dump(registry, registry_file, indent=2, sort_keys=True)
+            registry_file.write("\n")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(registry)} operation(s) to {output}"))
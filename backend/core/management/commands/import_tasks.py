@@ -0,0 +1,62 @@
+import gzip
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import CSV_KINDS, FORMATS, Importer, read_records
+from core.models import Organization
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream tasks and comments from an NDJSON or CSV file (the formats of /export/) into an "
+        "organization. Rows are validated like createTask/addTaskComment and written in batched "
+        "transactions; rejected lines are reported with their line number."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, '-' for stdin; a .gz suffix is decompressed.")
+        parser.add_argument("--org", required=True, help="Slug of the organization to import into.")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to csv for .csv files, ndjson otherwise.")
+        parser.add_argument("--type", choices=CSV_KINDS, default="tasks", help="What the rows of a CSV file are.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--rejects", help="Write rejected lines as NDJSON to this file instead of stderr.")
+
+    def handle(self, *args, path, org, format, type, batch_size, rejects, **options):
+        try:
+            organization = Organization.objects.get(slug=org, deleted_at__isnull=True)
+        except Organization.DoesNotExist:
+            raise CommandError(f"Organization '{org}' not found")
+        import_format = format or ("csv" if path.removesuffix(".gz").endswith(".csv") else "ndjson")
+
+        if path == "-":
+            source = sys.stdin
+        elif path.endswith(".gz"):
+            source = gzip.open(path, "rt", encoding="utf-8", newline="")
+        else:
+            source = open(path, encoding="utf-8", newline="")
+        rejects_file = open(rejects, "w") if rejects else None
+        started = time.perf_counter()
+        try:
+            importer = Importer(organization, batch_size=batch_size)
+            for event in importer.run(read_records(source, import_format, type)):
+                if "error" not in event:
+                    self.stdout.write(
+                        f"{event['tasks']} tasks, {event['comments']} comments, {event['rejected']} rejected "
+                        f"({time.perf_counter() - started:.1f}s)"
+                    )
+                elif rejects_file:
+                    rejects_file.write(json.dumps(event) + "\n")
+                else:
+                    self.stderr.write(f"line {event['line']}: {event['error']}")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if rejects_file:
+                rejects_file.close()
+
+        counts = importer.counts
+        message = f"Imported {counts['tasks']} tasks and {counts['comments']} comments, rejected {counts['rejected']} line(s)"
+        self.stdout.write(self.style.WARNING(message) if counts["rejected"] else self.style.SUCCESS(message))
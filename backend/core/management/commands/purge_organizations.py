@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.purge import pending_organizations, purge_organization
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the projects, tasks, comments and history of organizations removed with "
+        "deleteOrganization, in small transactions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--org", type=int, help="Id of a single deleted organization to purge.")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.ORG_PURGE_CHUNK_SIZE,
+            help="Rows deleted per statement and transaction.",
+        )
+        parser.add_argument(
+            "--watch",
+            type=float,
+            metavar="SECONDS",
+            help="Keep running as a worker, checking for newly deleted organizations every SECONDS.",
+        )
+        parser.add_argument(
+            "--status", action="store_true", help="Only list the organizations waiting to be purged."
+        )
+
+    def handle(self, *args, org=None, chunk_size, watch=None, status=False, **options):
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1")
+        organizations = pending_organizations()
+        if org:
+            organizations = organizations.filter(pk=org)
+            if not organizations.exists():
+                raise CommandError(f"Organization {org} is not marked for deletion")
+        if status:
+            for organization in organizations:
+                self.stdout.write(
+                    f"Organization {organization.pk} ({organization.name}): "
+                    f"deleted {organization.deleted_at:%Y-%m-%d %H:%M:%S}, "
+                    f"{organization.purged_rows} rows purged so far"
+                )
+            return
+
+        while True:
+            for organization in organizations.all():
+                self.purge(organization, chunk_size, options["verbosity"])
+            if watch is None:
+                return
+            time.sleep(watch)
+
+    def purge(self, organization, chunk_size, verbosity):
+        self.stdout.write(f"Purging organization {organization.pk} ({organization.name})")
+        purged = organization.purged_rows
+        totals = {}
+        started = time.monotonic()
+        for label, deleted in purge_organization(organization, chunk_size):
+            purged += deleted
+            totals[label] = totals.get(label, 0) + deleted
+            if verbosity:
+                self.stdout.write(f"  {deleted} {label} deleted, {purged} rows so far")
+        summary = ", ".join(f"{count} {label}" for label, count in totals.items())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged organization {organization.pk} in {time.monotonic() - started:.1f}s: {summary}"
+            )
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from core.counters import COUNTER_FIELDS, count_tasks
+from core.models import Project
+
+
+class Command(BaseCommand):
+    help = "Recount the denormalized task counters stored on each project."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report projects whose counters drifted; exit non-zero if any did.",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, verify=False, batch_size=500, **options):
+        project_ids = list(Project.objects.order_by("id").values_list("id", flat=True))
+        drifted = 0
+        for start in range(0, len(project_ids), batch_size):
+            batch = project_ids[start:start + batch_size]
+            with transaction.atomic():
+                projects = Project.objects.select_for_update().filter(id__in=batch)
+                expected = count_tasks(batch)
+                stale = []
+                for project in projects:
+                    actual = {field: getattr(project, field) for field in COUNTER_FIELDS}
+                    if actual == expected[project.id]:
+                        continue
+                    drifted += 1
+                    self.stdout.write(f"Project {project.id}: stored {actual}, counted {expected[project.id]}")
+                    for field, value in expected[project.id].items():
+                        setattr(project, field, value)
+                    stale.append(project)
+                if stale and not verify:
+                    Project.objects.bulk_update(stale, COUNTER_FIELDS)
+
+        if verify and drifted:
+            raise CommandError(f"{drifted} project(s) have stale task counters")
+        action = "Found" if verify else "Rebuilt"
+        self.stdout.write(self.style.SUCCESS(f"{action} {drifted} stale project counter(s)"))
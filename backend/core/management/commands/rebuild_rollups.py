@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Organization
+from core.rollups import count_rollups, rebuild_rollups, stored_rollups
+
+
+class Command(BaseCommand):
+    help = "Recount the per-organization rollup tables behind the organizationStats query."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report organizations whose rollups drifted; exit non-zero if any did.",
+        )
+        parser.add_argument("--org", help="Slug of a single organization to check or rebuild.")
+
+    def handle(self, *args, verify=False, org=None, **options):
+        organizations = Organization.objects.filter(deleted_at__isnull=True).order_by("id")
+        if org:
+            organizations = organizations.filter(slug=org)
+            if not organizations.exists():
+                raise CommandError(f"Organization '{org}' not found")
+        drifted = 0
+        for organization in organizations.only("id", "slug"):
+            if verify:
+                if stored_rollups(organization.pk) != count_rollups(organization.pk):
+                    drifted += 1
+                    self.stdout.write(f"Organization {organization.slug}: rollups differ from the tasks")
+            else:
+                rebuild_rollups(organization.pk)
+
+        if verify and drifted:
+            raise CommandError(f"{drifted} organization(s) have stale rollups")
+        if verify:
+            self.stdout.write(self.style.SUCCESS("Rollups match the tasks"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt the rollups of {organizations.count()} organization(s)"))
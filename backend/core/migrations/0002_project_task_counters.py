@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:11
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_task_counters(apps, schema_editor):
+    Project = apps.get_model("core", "Project")
+    Task = apps.get_model("core", "Task")
+    rows = (
+        Task.objects.values("project_id")
+        .annotate(
+            total=Count("id"),
+            todo=Count("id", filter=Q(status="TODO")),
+            in_progress=Count("id", filter=Q(status="IN_PROGRESS")),
+            done=Count("id", filter=Q(status="DONE")),
+        )
+        .order_by()
+    )
+    for row in rows:
+        Project.objects.filter(pk=row["project_id"]).update(
+            task_count=row["total"],
+            todo_count=row["todo"],
+            in_progress_count=row["in_progress"],
+            done_count=row["done"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="done_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="in_progress_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="task_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="todo_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_task_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_project_task_counters"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                fields=["organization", "created_at", "id"],
+                name="core_projec_organiz_d67465_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["project", "created_at", "id"],
+                name="core_task_project_c7df90_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taskcomment",
+            index=models.Index(
+                fields=["task", "created_at", "id"],
+                name="core_taskco_task_id_30a645_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_keyset_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="organization",
+            name="query_cost_budget",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="GraphQL query cost allowed per GRAPHQL_COST_WINDOW; empty uses GRAPHQL_COST_BUDGET, 0 is unlimited.",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,202 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# The SQL is frozen here rather than imported from core.search, so this
+# migration always creates the same index whatever the app code becomes.
+# The index is maintained by triggers, so every write path (the ORM,
+# bulk_create, COPY, cascading deletes) updates it in the same transaction.
+# Each task has one row holding its title (weight A), description (B) and
+# comments (C), plus the organization it belongs to.
+POSTGRESQL_INDEX = [
+    """
+    CREATE TABLE core_task_search (
+        task_id bigint PRIMARY KEY REFERENCES core_task (id) ON DELETE CASCADE,
+        organization_id bigint NOT NULL,
+        document tsvector NOT NULL
+    )
+    """,
+    "CREATE INDEX core_task_search_document ON core_task_search USING gin (document)",
+    """
+    CREATE FUNCTION core_task_search_refresh(target bigint) RETURNS void AS $$
+        INSERT INTO core_task_search (task_id, organization_id, document)
+        SELECT t.id, p.organization_id,
+               setweight(to_tsvector('english', t.title), 'A')
+               || setweight(to_tsvector('english', t.description), 'B')
+               || setweight(to_tsvector('english', coalesce(
+                   (SELECT string_agg(c.content, ' ') FROM core_taskcomment c WHERE c.task_id = t.id), ''
+               )), 'C')
+        FROM core_task t JOIN core_project p ON p.id = t.project_id
+        WHERE t.id = target
+        ON CONFLICT (task_id) DO UPDATE
+        SET organization_id = EXCLUDED.organization_id, document = EXCLUDED.document
+    $$ LANGUAGE sql
+    """,
+    """
+    CREATE FUNCTION core_task_search_task() RETURNS trigger AS $$
+    BEGIN
+        PERFORM core_task_search_refresh(NEW.id);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_task_search_task
+    AFTER INSERT OR UPDATE OF title, description, project_id ON core_task
+    FOR EACH ROW EXECUTE FUNCTION core_task_search_task()
+    """,
+    # A new comment is appended; edits and deletes rebuild the task's row.
+    """
+    CREATE FUNCTION core_task_search_comment() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE core_task_search
+            SET document = document || setweight(to_tsvector('english', NEW.content), 'C')
+            WHERE task_id = NEW.task_id;
+            RETURN NULL;
+        END IF;
+        PERFORM core_task_search_refresh(OLD.task_id);
+        IF TG_OP = 'UPDATE' AND NEW.task_id <> OLD.task_id THEN
+            PERFORM core_task_search_refresh(NEW.task_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER core_task_search_comment
+    AFTER INSERT OR UPDATE OF content, task_id OR DELETE ON core_taskcomment
+    FOR EACH ROW EXECUTE FUNCTION core_task_search_comment()
+    """,
+    """
+    INSERT INTO core_task_search (task_id, organization_id, document)
+    SELECT t.id, p.organization_id,
+           setweight(to_tsvector('english', t.title), 'A')
+           || setweight(to_tsvector('english', t.description), 'B')
+           || setweight(to_tsvector('english', coalesce(c.content, '')), 'C')
+    FROM core_task t
+    JOIN core_project p ON p.id = t.project_id
+    LEFT JOIN (
+        SELECT task_id, string_agg(content, ' ') AS content FROM core_taskcomment GROUP BY task_id
+    ) c ON c.task_id = t.id
+    """,
+]
+POSTGRESQL_DROP = [
+    "DROP TRIGGER IF EXISTS core_task_search_comment ON core_taskcomment",
+    "DROP TRIGGER IF EXISTS core_task_search_task ON core_task",
+    "DROP FUNCTION IF EXISTS core_task_search_comment()",
+    "DROP FUNCTION IF EXISTS core_task_search_task()",
+    "DROP FUNCTION IF EXISTS core_task_search_refresh(bigint)",
+    "DROP TABLE IF EXISTS core_task_search",
+]
+
+# SQLite (local development and tests): an FTS5 table whose rowid is also the task id.
+SQLITE_COMMENTS = "(SELECT coalesce(group_concat(content, ' '), '') FROM core_taskcomment WHERE task_id = {task})"
+SQLITE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE core_task_search USING fts5(
+        task_id UNINDEXED, organization_id UNINDEXED, title, description, comments,
+        tokenize = 'porter unicode61'
+    )
+    """,
+    # The rank column scores matches with these per-column bm25() weights.
+    "INSERT INTO core_task_search (core_task_search, rank) VALUES ('rank', 'bm25(0, 0, 10, 5, 1)')",
+    f"""
+    CREATE TRIGGER core_task_search_task_insert AFTER INSERT ON core_task BEGIN
+        INSERT INTO core_task_search (rowid, task_id, organization_id, title, description, comments)
+        SELECT NEW.id, NEW.id, organization_id, NEW.title, NEW.description, {SQLITE_COMMENTS.format(task="NEW.id")}
+        FROM core_project WHERE id = NEW.project_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER core_task_search_task_update AFTER UPDATE OF title, description, project_id ON core_task BEGIN
+        DELETE FROM core_task_search WHERE rowid = OLD.id;
+        INSERT INTO core_task_search (rowid, task_id, organization_id, title, description, comments)
+        SELECT NEW.id, NEW.id, organization_id, NEW.title, NEW.description, {SQLITE_COMMENTS.format(task="NEW.id")}
+        FROM core_project WHERE id = NEW.project_id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_task_search_task_delete AFTER DELETE ON core_task BEGIN
+        DELETE FROM core_task_search WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER core_task_search_comment_insert AFTER INSERT ON core_taskcomment BEGIN
+        UPDATE core_task_search SET comments = {SQLITE_COMMENTS.format(task="NEW.task_id")}
+        WHERE rowid = NEW.task_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER core_task_search_comment_update AFTER UPDATE OF content, task_id ON core_taskcomment BEGIN
+        UPDATE core_task_search SET comments = {SQLITE_COMMENTS.format(task="OLD.task_id")}
+        WHERE rowid = OLD.task_id;
+        UPDATE core_task_search SET comments = {SQLITE_COMMENTS.format(task="NEW.task_id")}
+        WHERE rowid = NEW.task_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER core_task_search_comment_delete AFTER DELETE ON core_taskcomment BEGIN
+        UPDATE core_task_search SET comments = {SQLITE_COMMENTS.format(task="OLD.task_id")}
+        WHERE rowid = OLD.task_id;
+    END
+    """,
+    f"""
+    INSERT INTO core_task_search (rowid, task_id, organization_id, title, description, comments)
+    SELECT t.id, t.id, p.organization_id, t.title, t.description, {SQLITE_COMMENTS.format(task="t.id")}
+    FROM core_task t JOIN core_project p ON p.id = t.project_id
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS core_task_search_comment_delete",
+    "DROP TRIGGER IF EXISTS core_task_search_comment_update",
+    "DROP TRIGGER IF EXISTS core_task_search_comment_insert",
+    "DROP TRIGGER IF EXISTS core_task_search_task_delete",
+    "DROP TRIGGER IF EXISTS core_task_search_task_update",
+    "DROP TRIGGER IF EXISTS core_task_search_task_insert",
+    "DROP TABLE IF EXISTS core_task_search",
+]
+
+INDEX_SQL = {"postgresql": (POSTGRESQL_INDEX, POSTGRESQL_DROP), "sqlite": (SQLITE_INDEX, SQLITE_DROP)}
+
+
+def install(apps, schema_editor):
+    create, drop = INDEX_SQL.get(schema_editor.connection.vendor, ((), ()))
+    for sql in drop + create:
+        schema_editor.execute(sql)
+
+
+def drop(apps, schema_editor):
+    for sql in INDEX_SQL.get(schema_editor.connection.vendor, ((), ()))[1]:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_organization_query_cost_budget"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TaskSearch",
+            fields=[
+                (
+                    "task",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search",
+                        serialize=False,
+                        to="core.task",
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "core_task_search",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(install, drop),
+    ]
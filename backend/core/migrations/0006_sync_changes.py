@@ -0,0 +1,170 @@
+# Generated by Django 4.2.30 on 2026-10-18 06:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Adding updated_at rebuilds core_project, core_task and core_taskcomment on
+# SQLite, which the search triggers reference; drop the index meanwhile.
+# The SQLite index of 0005, copied rather than imported from core.search so
+# this migration never changes.
+SQLITE_COMMENTS = "(SELECT coalesce(group_concat(content, ' '), '') FROM core_taskcomment WHERE task_id = {task})"
+SQLITE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE core_task_search USING fts5(
+        task_id UNINDEXED, organization_id UNINDEXED, title, description, comments,
+        tokenize = 'porter unicode61'
+    )
+    """,
+    # The rank column scores matches with these per-column bm25() weights.
+    "INSERT INTO core_task_search (core_task_search, rank) VALUES ('rank', 'bm25(0, 0, 10, 5, 1)')",
+    f"""
+    CREATE TRIGGER core_task_search_task_insert AFTER INSERT ON core_task BEGIN
+        INSERT INTO core_task_search (rowid, task_id, organization_id, title, description, comments)
+        SELECT NEW.id, NEW.id, organization_id, NEW.title, NEW.description, {SQLITE_COMMENTS.format(task="NEW.id")}
+        FROM core_project WHERE id = NEW.project_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER core_task_search_task_update AFTER UPDATE OF title, description, project_id ON core_task BEGIN
+        DELETE FROM core_task_search WHERE rowid = OLD.id;
+        INSERT INTO core_task_search (rowid, task_id, organization_id, title, description, comments)
+        SELECT NEW.id, NEW.id, organization_id, NEW.title, NEW.description, {SQLITE_COMMENTS.format(task="NEW.id")}
+        FROM core_project WHERE id = NEW.project_id;
+    END
+    """,
+    """
+    CREATE TRIGGER core_task_search_task_delete AFTER DELETE ON core_task BEGIN
+        DELETE FROM core_task_search WHERE rowid = OLD.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER core_task_search_comment_insert AFTER INSERT ON core_taskcomment BEGIN
+        UPDATE core_task_search SET comments = {SQLITE_COMMENTS.format(task="NEW.task_id")}
+        WHERE rowid = NEW.task_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER core_task_search_comment_update AFTER UPDATE OF content, task_id ON core_taskcomment BEGIN
+        UPDATE core_task_search SET comments = {SQLITE_COMMENTS.format(task="OLD.task_id")}
+        WHERE rowid = OLD.task_id;
+        UPDATE core_task_search SET comments = {SQLITE_COMMENTS.format(task="NEW.task_id")}
+        WHERE rowid = NEW.task_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER core_task_search_comment_delete AFTER DELETE ON core_taskcomment BEGIN
+        UPDATE core_task_search SET comments = {SQLITE_COMMENTS.format(task="OLD.task_id")}
+        WHERE rowid = OLD.task_id;
+    END
+    """,
+    f"""
+    INSERT INTO core_task_search (rowid, task_id, organization_id, title, description, comments)
+    SELECT t.id, t.id, p.organization_id, t.title, t.description, {SQLITE_COMMENTS.format(task="t.id")}
+    FROM core_task t JOIN core_project p ON p.id = t.project_id
+    """,
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS core_task_search_comment_delete",
+    "DROP TRIGGER IF EXISTS core_task_search_comment_update",
+    "DROP TRIGGER IF EXISTS core_task_search_comment_insert",
+    "DROP TRIGGER IF EXISTS core_task_search_task_delete",
+    "DROP TRIGGER IF EXISTS core_task_search_task_update",
+    "DROP TRIGGER IF EXISTS core_task_search_task_insert",
+    "DROP TABLE IF EXISTS core_task_search",
+]
+
+
+def drop_sqlite_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_DROP:
+            schema_editor.execute(sql)
+
+
+def install_sqlite_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in SQLITE_DROP + SQLITE_INDEX:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_task_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_sqlite_search_index, install_sqlite_search_index),
+        migrations.AddField(
+            model_name="organization",
+            name="sync_version",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="task",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="taskcomment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.CreateModel(
+            name="Change",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "kind",
+                    models.CharField(
+                        choices=[
+                            ("project", "Project"),
+                            ("task", "Task"),
+                            ("comment", "Comment"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("object_id", models.BigIntegerField()),
+                ("version", models.PositiveBigIntegerField()),
+                ("deleted", models.BooleanField(default=False)),
+                ("changed_at", models.DateTimeField(auto_now=True)),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.organization",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["organization", "version", "id"],
+                        name="core_change_organiz_f6726c_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="change",
+            constraint=models.UniqueConstraint(
+                fields=("organization", "kind", "object_id"),
+                name="uniq_change_per_object",
+            ),
+        ),
+        migrations.RunPython(install_sqlite_search_index, drop_sqlite_search_index),
+    ]
@@ -0,0 +1,126 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    Task = apps.get_model("core", "Task")
+    AssigneeRollup = apps.get_model("core", "AssigneeRollup")
+    DueDateRollup = apps.get_model("core", "DueDateRollup")
+    rows = (
+        Task.objects.values("project__organization_id", "assignee_email", "status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    AssigneeRollup.objects.bulk_create(
+        AssigneeRollup(
+            organization_id=row["project__organization_id"],
+            assignee_email=row["assignee_email"],
+            status=row["status"],
+            task_count=row["count"],
+        )
+        for row in rows
+    )
+    rows = (
+        Task.objects.exclude(status="DONE")
+        .filter(due_date__isnull=False)
+        .annotate(day=TruncDate("due_date", tzinfo=timezone.get_current_timezone()))
+        .values("project__organization_id", "day")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    DueDateRollup.objects.bulk_create(
+        DueDateRollup(
+            organization_id=row["project__organization_id"],
+            due_date=row["day"],
+            open_count=row["count"],
+        )
+        for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_sync_changes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DueDateRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("due_date", models.DateField()),
+                ("open_count", models.IntegerField(default=0)),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.organization",
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="AssigneeRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("assignee_email", models.EmailField(blank=True, max_length=254)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("TODO", "To Do"),
+                            ("IN_PROGRESS", "In Progress"),
+                            ("DONE", "Done"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("task_count", models.IntegerField(default=0)),
+                (
+                    "organization",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="core.organization",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="duedaterollup",
+            constraint=models.UniqueConstraint(
+                fields=("organization", "due_date"), name="uniq_due_date_rollup"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="assigneerollup",
+            constraint=models.UniqueConstraint(
+                fields=("organization", "assignee_email", "status"),
+                name="uniq_assignee_rollup",
+            ),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
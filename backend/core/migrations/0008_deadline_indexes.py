@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0007_stats_rollups"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(
+                    ("due_date__isnull", False),
+                    models.Q(("status", "COMPLETED"), _negated=True),
+                ),
+                fields=["organization", "due_date", "id"],
+                name="core_project_open_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(
+                    ("due_date__isnull", False),
+                    models.Q(("status", "DONE"), _negated=True),
+                ),
+                fields=["project", "due_date", "id"],
+                name="core_task_open_due_idx",
+            ),
+        ),
+    ]
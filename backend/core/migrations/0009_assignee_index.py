@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0008_deadline_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["assignee_email", "status", "created_at", "id"],
+                name="core_task_assigne_6985ea_idx",
+            ),
+        ),
+    ]
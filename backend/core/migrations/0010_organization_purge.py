@@ -0,0 +1,73 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:15
+
+from django.db import migrations, models
+
+# The search index skips tasks of organizations being purged by core.purge:
+# their rows go with the tasks, and rebuilding them on every deleted comment
+# would dominate the purge. Copied rather than imported from core.search so
+# this migration never changes.
+REFRESH = """
+    CREATE OR REPLACE FUNCTION core_task_search_refresh(target bigint) RETURNS void AS $$
+        INSERT INTO core_task_search (task_id, organization_id, document)
+        SELECT t.id, p.organization_id,
+               setweight(to_tsvector('english', t.title), 'A')
+               || setweight(to_tsvector('english', t.description), 'B')
+               || setweight(to_tsvector('english', coalesce(
+                   (SELECT string_agg(c.content, ' ') FROM core_taskcomment c WHERE c.task_id = t.id), ''
+               )), 'C')
+        FROM core_task t
+        JOIN core_project p ON p.id = t.project_id
+        JOIN core_organization o ON o.id = p.organization_id AND o.deleted_at IS NULL
+        WHERE t.id = target
+        ON CONFLICT (task_id) DO UPDATE
+        SET organization_id = EXCLUDED.organization_id, document = EXCLUDED.document
+    $$ LANGUAGE sql
+"""
+
+# core_task_search_refresh as 0005 created it, restored when migrating back.
+PREVIOUS_REFRESH = """
+    CREATE OR REPLACE FUNCTION core_task_search_refresh(target bigint) RETURNS void AS $$
+        INSERT INTO core_task_search (task_id, organization_id, document)
+        SELECT t.id, p.organization_id,
+               setweight(to_tsvector('english', t.title), 'A')
+               || setweight(to_tsvector('english', t.description), 'B')
+               || setweight(to_tsvector('english', coalesce(
+                   (SELECT string_agg(c.content, ' ') FROM core_taskcomment c WHERE c.task_id = t.id), ''
+               )), 'C')
+        FROM core_task t JOIN core_project p ON p.id = t.project_id
+        WHERE t.id = target
+        ON CONFLICT (task_id) DO UPDATE
+        SET organization_id = EXCLUDED.organization_id, document = EXCLUDED.document
+    $$ LANGUAGE sql
+"""
+
+
+def replace_search_refresh(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(REFRESH)
+
+
+def restore_search_refresh(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(PREVIOUS_REFRESH)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_assignee_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="organization",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="organization",
+            name="purged_rows",
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(replace_search_refresh, restore_search_refresh),
+    ]
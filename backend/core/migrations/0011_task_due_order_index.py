@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_organization_purge"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(
+                    ("due_date__isnull", False),
+                    models.Q(("status", "DONE"), _negated=True),
+                ),
+                fields=["due_date", "id"],
+                name="core_task_open_due_order_idx",
+            ),
+        ),
+    ]
@@ -6,6 +6,18 @@ class Organization(models.Model):
     slug = models.SlugField(unique=True)
     contact_email = models.EmailField()
     created_at = models.DateTimeField(auto_now_add=True)
+    query_cost_budget = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="GraphQL query cost allowed per GRAPHQL_COST_WINDOW; empty uses GRAPHQL_COST_BUDGET, 0 is unlimited.",
+    )
+    # Last version handed out by core.sync.record_changes.
+    sync_version = models.PositiveBigIntegerField(default=0, editable=False)
+    # Set by deleteOrganization: the organization is hidden at once and its
+    # rows are removed in the background by core.purge, which counts them in
+    # purged_rows as it goes.
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    purged_rows = models.PositiveBigIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
@@ -26,6 +38,13 @@ class Project(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="ACTIVE")
     due_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Denormalized task counters, maintained by core.counters.
+    task_count = models.PositiveIntegerField(default=0, editable=False)
+    todo_count = models.PositiveIntegerField(default=0, editable=False)
+    in_progress_count = models.PositiveIntegerField(default=0, editable=False)
+    done_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         constraints = [
@@ -33,7 +52,16 @@ class Project(models.Model):
                 fields=["organization", "name"], name="uniq_project_name_per_org"
             )
         ]
-        indexes = [models.Index(fields=["organization", "status"])]
+        indexes = [
+            models.Index(fields=["organization", "status"]),
+            models.Index(fields=["organization", "created_at", "id"]),
+            # Deadline views only read projects still open (core/deadlines.py).
+            models.Index(
+                fields=["organization", "due_date", "id"],
+                condition=models.Q(due_date__isnull=False) & ~models.Q(status="COMPLETED"),
+                name="core_project_open_due_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.organization.slug})"
@@ -57,9 +85,31 @@ class Task(models.Model):
     assignee_email = models.EmailField(blank=True)
     due_date = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        indexes = [models.Index(fields=["project", "status"])]
+        indexes = [
+            models.Index(fields=["project", "status"]),
+            models.Index(fields=["project", "created_at", "id"]),
+            # tasksByAssignee: an assignee's tasks of one status in page order,
+            # narrowed to the organization's projects by a semi-join.
+            models.Index(fields=["assignee_email", "status", "created_at", "id"]),
+            # Deadline views only read tasks still open (core/deadlines.py);
+            # done tasks, most of a mature tenant, stay out of both indexes.
+            # Per project, a small organization's window is a few short
+            # ranges to sort; in (due_date, id) order, an organization with
+            # many open tasks reads one page and stops.
+            models.Index(
+                fields=["project", "due_date", "id"],
+                condition=models.Q(due_date__isnull=False) & ~models.Q(status="DONE"),
+                name="core_task_open_due_idx",
+            ),
+            models.Index(
+                fields=["due_date", "id"],
+                condition=models.Q(due_date__isnull=False) & ~models.Q(status="DONE"),
+                name="core_task_open_due_order_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -70,9 +120,96 @@ class TaskComment(models.Model):
     content = models.TextField()
     author_email = models.EmailField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [models.Index(fields=["task", "created_at", "id"])]
 
     def __str__(self):
         return f"Comment by {self.author_email}"
+
+
+class Change(models.Model):
+    """The latest change of one project, task or comment, read by ``changesSince``.
+
+    Each row is stamped with its organization's sync version (see core.sync);
+    a deleted row keeps its entry as a tombstone.
+    """
+
+    KIND_CHOICES = [
+        ("project", "Project"),
+        ("task", "Task"),
+        ("comment", "Comment"),
+    ]
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="+"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    version = models.PositiveBigIntegerField()
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["organization", "kind", "object_id"], name="uniq_change_per_object"
+            )
+        ]
+        indexes = [models.Index(fields=["organization", "version", "id"])]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} @ {self.version}"
+
+
+class AssigneeRollup(models.Model):
+    """Tasks of an organization per assignee and status, maintained by core.rollups."""
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="+"
+    )
+    assignee_email = models.EmailField(blank=True)
+    status = models.CharField(max_length=20, choices=Task.TASK_STATUS_CHOICES)
+    task_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["organization", "assignee_email", "status"],
+                name="uniq_assignee_rollup",
+            )
+        ]
+
+
+class DueDateRollup(models.Model):
+    """Open (not done) tasks of an organization per due day, maintained by core.rollups."""
+
+    organization = models.ForeignKey(
+        Organization, on_delete=models.CASCADE, related_name="+"
+    )
+    due_date = models.DateField()
+    open_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["organization", "due_date"], name="uniq_due_date_rollup"
+            )
+        ]
+
+
+class TaskSearch(models.Model):
+    """A task's row in the full-text index, maintained by triggers (see core.search)."""
+
+    task = models.OneToOneField(
+        Task, on_delete=models.DO_NOTHING, primary_key=True, related_name="search"
+    )
+    organization = models.ForeignKey(
+        Organization, on_delete=models.DO_NOTHING, related_name="+"
+    )
+
+    class Meta:
+        managed = False
+        db_table = "core_task_search"
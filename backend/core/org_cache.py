@@ -0,0 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Organization
+
+GENERATION_KEY = "pmtool:org-cache:generation"
+
+
+class OrganizationCache:
+    """In-process slug -> Organization cache with a TTL and LRU eviction.
+
+    When ``ORG_CACHE_INVALIDATION_CHANNEL`` names a shared Django cache alias,
+    invalidations also bump a generation counter there; every process reads
+    it at most once per ``ORG_CACHE_POLL_INTERVAL`` and drops its entries
+    when another process wrote, so lookups rarely wait on the shared cache.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._next_poll = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ttl(self):
+        return getattr(settings, "ORG_CACHE_TTL", 60)
+
+    @property
+    def max_size(self):
+        return getattr(settings, "ORG_CACHE_MAX_SIZE", 1024)
+
+    @property
+    def poll_interval(self):
+        return getattr(settings, "ORG_CACHE_POLL_INTERVAL", 1.0)
+
+    def _channel(self):
+        alias = getattr(settings, "ORG_CACHE_INVALIDATION_CHANNEL", None)
+        return caches[alias] if alias else None
+
+    def _claim_poll(self):
+        """The channel when this lookup is the one to read its generation, else None."""
+        channel = self._channel()
+        if channel is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_poll:
+                return None
+            self._next_poll = now + self.poll_interval
+        return channel
+
+    def _sync(self, generation):
+        with self._lock:
+            if generation != self._generation:
+                self._entries.clear()
+                self._generation = generation
+
+    def get(self, slug):
+        channel = self._claim_poll()
+        if channel is not None:
+            self._sync(channel.get(GENERATION_KEY, 0))
+        return self._lookup(slug)
+
+    async def aget(self, slug):
+        channel = self._claim_poll()
+        if channel is not None:
+            self._sync(await channel.aget(GENERATION_KEY, 0))
+        return self._lookup(slug)
+
+    def _lookup(self, slug):
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(slug)
+                self.hits += 1
+                return entry[0]
+            self._entries.pop(slug, None)
+            self.misses += 1
+            return None
+
+    def set(self, slug, organization):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[slug] = (organization, time.monotonic() + self.ttl)
+            self._entries.move_to_end(slug)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, organization_id, slug=None):
+        with self._lock:
+            self._entries.pop(slug, None)
+            for cached_slug, (organization, _) in list(self._entries.items()):
+                if organization.pk == organization_id:
+                    del self._entries[cached_slug]
+        channel = self._channel()
+        if channel is not None:
+            channel.add(GENERATION_KEY, 0, timeout=None)
+            channel.incr(GENERATION_KEY)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+            self._next_poll = 0.0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+organization_cache = OrganizationCache()
+
+
+def get_organization(slug):
+    organization = organization_cache.get(slug)
+    if organization is None:
+        organization = Organization.objects.filter(slug=slug, deleted_at__isnull=True).first()
+        if organization is not None:
+            organization_cache.set(slug, organization)
+    return organization
+
+
+async def aget_organization(slug):
+    organization = await organization_cache.aget(slug)
+    if organization is None:
+        organization = await Organization.objects.filter(slug=slug, deleted_at__isnull=True).afirst()
+        if organization is not None:
+            organization_cache.set(slug, organization)
+    return organization
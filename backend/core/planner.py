@@ -0,0 +1,193 @@
+import hashlib
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Count, Prefetch
+from graphene.utils.str_converters import to_snake_case
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode, Undefined, value_from_ast_untyped
+
+from .models import Project, Task
+from .pagination import DEFAULT_ORDERING, fetch_page
+
+# Columns that computed GraphQL fields read from the instance.
+FIELD_DEPENDENCIES = {
+    Project: {
+        "completed_tasks": ("done_count",),
+        "completion_rate": ("task_count", "done_count"),
+    },
+}
+
+# Aggregates computed in SQL, only when the field is selected.
+FIELD_ANNOTATIONS = {
+    Task: {"comment_count": lambda: Count("comments")},
+}
+
+
+class Selection(dict):
+    """Selected subfields as ``{response_key: Selection}``, plus the field's name and arguments.
+
+    Aliases of one field are separate entries, each with its own arguments.
+    """
+
+    def __init__(self, name=None):
+        super().__init__()
+        self.name = name
+        self.arguments = {}
+
+    def child(self, name):
+        """The merged subfields of every entry selecting field ``name``."""
+        return merge(subtree for subtree in self.values() if subtree.name == name)
+
+
+def merge(selections):
+    """One Selection holding the subfields of all ``selections``, which select the same field."""
+    merged = Selection()
+    for selection in selections:
+        merged.name = selection.name
+        merged.arguments = selection.arguments
+        for key, subtree in selection.items():
+            merged[key] = merge([merged[key], subtree]) if key in merged else subtree
+    return merged
+
+
+def get_selections(info, *path):
+    """Return the fields selected below the current field.
+
+    ``path`` descends into a nested field first, e.g. ``("project",)`` for a
+    mutation payload or ``("edges", "node")`` for a connection.
+    """
+    tree = Selection()
+    for node in info.field_nodes:
+        _collect(info, node.selection_set, tree)
+    for name in path:
+        tree = tree.child(name)
+    return tree
+
+
+def _collect(info, selection_set, tree):
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            key = (selection.alias or selection.name).value
+            subtree = tree.setdefault(key, Selection(to_snake_case(selection.name.value)))
+            for argument in selection.arguments:
+                value = value_from_ast_untyped(argument.value, info.variable_values)
+                # An optional variable the request left out omits the argument.
+                if value is not Undefined:
+                    subtree.arguments[argument.name.value] = value
+            _collect(info, selection.selection_set, subtree)
+        elif isinstance(selection, FragmentSpreadNode):
+            _collect(info, info.fragments[selection.name.value].selection_set, tree)
+        elif isinstance(selection, InlineFragmentNode):
+            _collect(info, selection.selection_set, tree)
+
+
+class Plan:
+    """What a queryset must load to answer one selection set."""
+
+    def __init__(self, model, selections, required=()):
+        self.model = model
+        self.columns = {model._meta.pk.name, *required}
+        self.annotations = {}
+        dependencies = FIELD_DEPENDENCIES.get(model, {})
+        annotations = FIELD_ANNOTATIONS.get(model, {})
+        # Connection selections by (field, first, after): each argument set is
+        # one prefetch, shared by the aliases requesting that same page.
+        pages = {}
+
+        for subtree in selections.values():
+            name = subtree.name
+            self.columns.update(dependencies.get(name, ()))
+            if name in annotations:
+                self.annotations[name] = annotations[name]()
+                continue
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.one_to_many:
+                page = (field, subtree.arguments.get("first"), subtree.arguments.get("after"))
+                pages.setdefault(page, []).append(subtree)
+            elif field.concrete:
+                self.columns.add(field.name)
+        self.prefetches = [self._prefetch_page(field, merge(subtrees)) for (field, _, _), subtrees in pages.items()]
+
+    @staticmethod
+    def _prefetch_page(field, subtree):
+        """Prefetch the requested connection page of a reverse foreign key."""
+        first = subtree.arguments.get("first")
+        after = subtree.arguments.get("after")
+        related = Plan(
+            field.related_model,
+            subtree.child("edges").child("node"),
+            required=(field.field.name, *ordering_columns()),
+        )
+        queryset = related.apply(field.related_model._default_manager.all())
+        return Prefetch(
+            field.name,
+            queryset=fetch_page(queryset, first, after),
+            to_attr=page_attr(field.name, first, after),
+        )
+
+    @property
+    def needs_refetch(self):
+        return bool(self.prefetches or self.annotations)
+
+    def apply(self, queryset):
+        queryset = queryset.only(*self.columns)
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        if self.prefetches:
+            queryset = queryset.prefetch_related(*self.prefetches)
+        return queryset
+
+
+def ordering_columns(ordering=DEFAULT_ORDERING):
+    return [field.lstrip("-") for field in ordering]
+
+
+def plan_queryset(queryset, info, *path):
+    return Plan(queryset.model, get_selections(info, *path)).apply(queryset)
+
+
+def plan_page(queryset, info, first, after, ordering=DEFAULT_ORDERING):
+    """Plan the nodes of a root connection and fetch one page of them."""
+    annotations = queryset.query.annotations
+    plan = Plan(
+        queryset.model,
+        get_selections(info, "edges", "node"),
+        # Annotations used for ordering (a search rank) are selected anyway.
+        required=[column for column in ordering_columns(ordering) if column not in annotations],
+    )
+    return fetch_page(plan.apply(queryset), first, after, ordering)
+
+
+def plan_instance(instance, info, *path):
+    """Load what a mutation payload selects onto an instance the mutation already holds."""
+    plan = Plan(type(instance), get_selections(info, *path))
+    if not plan.needs_refetch:
+        return instance
+    return plan.apply(type(instance)._default_manager.filter(pk=instance.pk)).get()
+
+
+def plan_instances(instances, info, *path):
+    """``plan_instance`` for a list payload, refetching all rows in one query."""
+    if not instances:
+        return instances
+    model = type(instances[0])
+    plan = Plan(model, get_selections(info, *path))
+    if not plan.needs_refetch:
+        return instances
+    fetched = plan.apply(model._default_manager.filter(pk__in=[obj.pk for obj in instances])).in_bulk()
+    return [fetched[obj.pk] for obj in instances]
+
+
+def page_attr(name, first, after):
+    # One attribute per argument set, so differently paged aliases never mix.
+    digest = hashlib.md5(repr((first, after)).encode()).hexdigest()[:8]
+    return f"_{name}_page_{digest}"
+
+
+def prefetched_page(instance, name, first, after):
+    """Return the prefetched rows of a connection page, or None if not prefetched."""
+    return getattr(instance, page_attr(name, first, after), None)
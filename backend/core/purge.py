@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AssigneeRollup, Change, DueDateRollup, Organization, Project, Task, TaskComment
+from .versions import GLOBAL, bump_data_version
+
+
+def deleted_slug(organization):
+    # "~" is not a slug character, so no organization can be created with it.
+    return f"deleted~{organization.pk}"
+
+
+def mark_deleted(organization):
+    """Hide ``organization`` at once and free its slug; purge_organization removes its rows later.
+
+    Processes whose organization cache still holds it (for up to
+    ORG_CACHE_TTL without ORG_CACHE_INVALIDATION_CHANNEL) keep resolving it,
+    but their writes fail: record_changes, part of every write, only
+    advances the sync version of an organization not marked deleted.
+    """
+    organization.deleted_at = timezone.now()
+    organization.slug = deleted_slug(organization)
+    organization.save(update_fields=["deleted_at", "slug"])
+    bump_data_version(GLOBAL, organization.pk)
+
+
+def pending_organizations():
+    """Organizations marked deleted whose rows are not purged yet, oldest first."""
+    return Organization.objects.filter(deleted_at__isnull=False).order_by("deleted_at", "id")
+
+
+def purge_steps(organization_id):
+    """``(label, model, rows)`` to delete in order: children before their parents.
+
+    Comments and tasks go one project at a time, so every chunk is found
+    through the (project) and (task) foreign key indexes.
+    """
+    project_ids = Project.objects.filter(organization_id=organization_id).order_by("id").values_list("id", flat=True)
+    for project_id in list(project_ids):
+        yield "comments", TaskComment, TaskComment.objects.filter(task__project_id=project_id)
+        yield "tasks", Task, Task.objects.filter(project_id=project_id)
+    yield "projects", Project, Project.objects.filter(organization_id=organization_id)
+    yield "changes", Change, Change.objects.filter(organization_id=organization_id)
+    yield "rollups", AssigneeRollup, AssigneeRollup.objects.filter(organization_id=organization_id)
+    yield "rollups", DueDateRollup, DueDateRollup.objects.filter(organization_id=organization_id)
+
+
+def delete_chunk(organization_id, model, rows, chunk_size):
+    """Delete up to ``chunk_size`` of ``rows`` in one statement and transaction, returning the count.
+
+    A raw DELETE skips the collector and the delete signals: the counters,
+    rollups and change log they maintain are purged along with the rows.
+    """
+    ids, params = rows.order_by().values("pk")[:chunk_size].query.sql_with_params()
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk = connection.ops.quote_name(model._meta.pk.column)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {pk} IN ({ids})", params)
+        deleted = cursor.rowcount
+        Organization.objects.filter(pk=organization_id).update(purged_rows=F("purged_rows") + deleted)
+    return deleted
+
+
+def purge_organization(organization, chunk_size=None):
+    """Delete the rows of an organization marked by mark_deleted, yielding ``(label, deleted)`` per chunk.
+
+    Each chunk commits on its own, so the purge holds no long locks, runs
+    alongside normal traffic and resumes where it stopped when interrupted.
+    The organization row goes last.
+    """
+    if organization.deleted_at is None:
+        raise ValueError(f"Organization {organization.pk} is not marked for deletion")
+    chunk_size = chunk_size or settings.ORG_PURGE_CHUNK_SIZE
+    for label, model, rows in purge_steps(organization.pk):
+        while True:
+            deleted = delete_chunk(organization.pk, model, rows, chunk_size)
+            if deleted:
+                yield label, deleted
+            if deleted < chunk_size:
+                break
+    Organization.objects.filter(pk=organization.pk).delete()
+    yield "organization", 1
@@ -0,0 +1,124 @@
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .counters import shifted
+from .models import AssigneeRollup, DueDateRollup, Project, Task
+
+
+def due_day(due_date):
+    return timezone.localdate(due_date) if due_date else None
+
+
+def task_key(task):
+    """What the rollups count a task under: ``(assignee_email, status, due day)``."""
+    return task.assignee_email, task.status, due_day(task.due_date)
+
+
+def _increment(model, field, filters, delta):
+    if model.objects.filter(**filters).update(**{field: shifted(field, delta)}) or delta < 0:
+        # A missing row with a negative delta belongs to an organization being
+        # deleted (or to drift that rebuild_rollups repairs); never insert it.
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**filters, **{field: delta})
+    except IntegrityError:
+        # Inserted concurrently; add to that row instead.
+        model.objects.filter(**filters).update(**{field: F(field) + delta})
+
+
+def adjust_rollups(organization_id, changes):
+    """Apply task changes given as ``(old_key, new_key)`` pairs from ``task_key``.
+
+    ``old_key`` is None for a new task and ``new_key`` None for a deleted
+    one. Must run in the same transaction as the task writes it accounts for.
+    """
+    assignees, due_days = Counter(), Counter()
+    for old, new in changes:
+        for key, sign in ((old, -1), (new, 1)):
+            if key is None:
+                continue
+            assignee_email, status, day = key
+            assignees[assignee_email, status] += sign
+            if status != "DONE" and day is not None:
+                due_days[day] += sign
+    for (assignee_email, status), delta in sorted(assignees.items()):
+        if delta:
+            filters = {"organization_id": organization_id, "assignee_email": assignee_email, "status": status}
+            _increment(AssigneeRollup, "task_count", filters, delta)
+    for day, delta in sorted(due_days.items()):
+        if delta:
+            filters = {"organization_id": organization_id, "due_date": day}
+            _increment(DueDateRollup, "open_count", filters, delta)
+
+
+def tasks_added(organization_id, tasks):
+    adjust_rollups(organization_id, [(None, task_key(task)) for task in tasks])
+
+
+def task_organization_id(task):
+    if Task.project.is_cached(task):
+        return task.project.organization_id
+    return Project.objects.filter(pk=task.project_id).values_list("organization_id", flat=True).first()
+
+
+def task_created(task):
+    adjust_rollups(task_organization_id(task), [(None, task_key(task))])
+
+
+def task_deleted(task):
+    organization_id = task_organization_id(task)
+    if organization_id is not None:
+        adjust_rollups(organization_id, [(task_key(task), None)])
+
+
+def count_rollups(organization_id):
+    """Compute an organization's rollup rows from scratch, as ``(assignee, due date)`` dicts."""
+    tasks = Task.objects.filter(project__organization_id=organization_id)
+    assignees = {
+        (row["assignee_email"], row["status"]): row["count"]
+        for row in tasks.values("assignee_email", "status").annotate(count=Count("id")).order_by()
+    }
+    open_tasks = tasks.exclude(status="DONE").filter(due_date__isnull=False)
+    due_days = {
+        row["day"]: row["count"]
+        for row in open_tasks.annotate(day=TruncDate("due_date", tzinfo=timezone.get_current_timezone()))
+        .values("day")
+        .annotate(count=Count("id"))
+        .order_by()
+    }
+    return assignees, due_days
+
+
+def stored_rollups(organization_id):
+    assignees = {
+        (row.assignee_email, row.status): row.task_count
+        for row in AssigneeRollup.objects.filter(organization_id=organization_id)
+        if row.task_count
+    }
+    due_days = {
+        row.due_date: row.open_count
+        for row in DueDateRollup.objects.filter(organization_id=organization_id)
+        if row.open_count
+    }
+    return assignees, due_days
+
+
+def rebuild_rollups(organization_id):
+    """Replace an organization's rollup rows with freshly counted ones."""
+    with transaction.atomic():
+        assignees, due_days = count_rollups(organization_id)
+        AssigneeRollup.objects.filter(organization_id=organization_id).delete()
+        DueDateRollup.objects.filter(organization_id=organization_id).delete()
+        AssigneeRollup.objects.bulk_create(
+            AssigneeRollup(organization_id=organization_id, assignee_email=email, status=status, task_count=count)
+            for (email, status), count in assignees.items()
+        )
+        DueDateRollup.objects.bulk_create(
+            DueDateRollup(organization_id=organization_id, due_date=day, open_count=count)
+            for day, count in due_days.items()
+        )
@@ -1,10 +1,29 @@
+from collections import defaultdict
+from inspect import isawaitable
+
 import graphene
 from graphene_django import DjangoObjectType
 from graphql import GraphQLError
-from django.db.models import Count, Q
-from django.core.exceptions import ValidationError
+from django.core.validators import slug_re
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+from django.db import transaction
 from django.utils import timezone
-from .models import Organization, Project, Task, TaskComment
+from .models import AssigneeRollup, Change, DueDateRollup, Organization, Project, Task, TaskComment
+from .loaders import get_loaders
+from .pagination import DEFAULT_ORDERING, cursor_for, encode_cursor, fetch_page, make_connection, page_size
+from .planner import plan_instance, plan_instances, plan_page, plan_queryset, prefetched_page
+from . import counters, deadlines, purge, rollups
+from .events import comment_channel, get_broker, publish_on_commit, task_channel
+from .deadlines import DUE_ORDERING
+from .search import RANK_ORDERING, search_tasks
+from .sync import COMMENT, PROJECT, SYNC_ORDERING, TASK, record_changes
+from .versions import GLOBAL, bump_data_version
+
+
+TASK_STATUSES = ["TODO", "IN_PROGRESS", "DONE"]
+PROJECT_STATUSES = ["ACTIVE", "COMPLETED", "ON_HOLD"]
+MAX_BULK_ITEMS = 500
 
 
 # Helpers
@@ -15,6 +34,102 @@ def require_org(info):
     return org
 
 
+def task_input_error(title=None, status=None, assignee_email=None):
+    """Return the first validation message for the given task fields, or None."""
+    if title is not None and len(title.strip()) < 2:
+        return "Task title must be at least 2 characters long"
+    if status is not None and status not in TASK_STATUSES:
+        return "Invalid status. Must be one of: TODO, IN_PROGRESS, DONE"
+    if assignee_email and "@" not in assignee_email:
+        return "Invalid email format for assignee"
+    return None
+
+
+def normalize_email(email):
+    """An assignee email as stored and looked up: stripped, "" for none."""
+    return (email or "").strip()
+
+
+def comment_input_error(content, author_email):
+    if not content or not content.strip():
+        return "Comment content cannot be empty"
+    if "@" not in author_email:
+        return "Invalid email format for author"
+    return None
+
+
+def slug_error(slug):
+    # Deleted organizations free their slug by taking one no client can pick
+    # (core.purge.deleted_slug).
+    if not slug_re.match(slug.strip()):
+        return "Organization slug may only contain letters, numbers, underscores and hyphens"
+    return None
+
+
+def raise_for(message):
+    if message:
+        raise GraphQLError(message)
+
+
+def parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def check_bulk_size(items):
+    if len(items) > MAX_BULK_ITEMS:
+        raise GraphQLError(f"At most {MAX_BULK_ITEMS} items per bulk mutation")
+
+
+# Queries run by the async view must not touch the ORM synchronously. These
+# helpers keep a single resolver body for both views: on the async path they
+# return awaitables backed by Django's async ORM instead of values.
+def is_async(info):
+    return getattr(info.context, "is_async", False)
+
+
+def then(value, callback):
+    """Return ``callback(value)``, awaiting ``value`` (and the result) first if needed."""
+    if isawaitable(value):
+        async def chain():
+            result = callback(await value)
+            return (await result) if isawaitable(result) else result
+
+        return chain()
+    return callback(value)
+
+
+def fetch_one(info, queryset, message):
+    """``queryset.get()``, raising ``GraphQLError(message)`` when there is no row."""
+    if is_async(info):
+        async def fetch():
+            try:
+                return await queryset.aget()
+            except queryset.model.DoesNotExist:
+                raise GraphQLError(message)
+
+        return fetch()
+    try:
+        return queryset.get()
+    except queryset.model.DoesNotExist:
+        raise GraphQLError(message)
+
+
+def fetch_all(info, queryset):
+    if is_async(info):
+        async def fetch():
+            return [row async for row in queryset]
+
+        return fetch()
+    return queryset
+
+
+def connection(connection_type, rows, first, after, ordering=DEFAULT_ORDERING):
+    return then(rows, lambda rows: make_connection(connection_type, rows, first, after, ordering))
+
+
 # GraphQL Types
 class OrganizationType(DjangoObjectType):
     class Meta:
@@ -23,12 +138,25 @@ class OrganizationType(DjangoObjectType):
 
 
 class TaskCommentType(DjangoObjectType):
+    task_id = graphene.ID()
+
     class Meta:
         model = TaskComment
-        fields = ("id", "content", "author_email", "created_at")
+        fields = ("id", "content", "author_email", "created_at", "updated_at")
+
+
+class TaskCommentConnection(graphene.relay.Connection):
+    class Meta:
+        node = TaskCommentType
 
 
 class TaskType(DjangoObjectType):
+    project_id = graphene.ID()
+    comment_count = graphene.Int()
+    comments = graphene.Field(
+        TaskCommentConnection, first=graphene.Int(), after=graphene.String()
+    )
+
     class Meta:
         model = Task
         fields = (
@@ -39,66 +167,326 @@ class TaskType(DjangoObjectType):
             "assignee_email",
             "due_date",
             "created_at",
+            "updated_at",
             "comments",
         )
 
+    def resolve_comments(self, info, first=None, after=None):
+        comments = prefetched_page(self, "comments", first, after)
+        if comments is None:
+            comments = get_loaders(info).page(TaskComment, "task", first, after).load(self.id)
+        return connection(TaskCommentConnection, comments, first, after)
+
+    def resolve_comment_count(self, info):
+        if hasattr(self, "comment_count"):
+            return self.comment_count
+        return get_loaders(info).comment_counts.load(self.id)
+
+
+class TaskConnection(graphene.relay.Connection):
+    class Meta:
+        node = TaskType
+
 
 class ProjectType(DjangoObjectType):
     task_count = graphene.Int()
     completed_tasks = graphene.Int()
     completion_rate = graphene.Float()
+    tasks = graphene.Field(TaskConnection, first=graphene.Int(), after=graphene.String())
 
     class Meta:
         model = Project
-        fields = ("id", "name", "description", "status", "due_date", "created_at", "tasks")
+        fields = ("id", "name", "description", "status", "due_date", "created_at", "updated_at", "tasks")
 
-    def resolve_task_count(self, info):
-        return self.tasks.count()
+    def resolve_tasks(self, info, first=None, after=None):
+        tasks = prefetched_page(self, "tasks", first, after)
+        if tasks is None:
+            tasks = get_loaders(info).page(Task, "project", first, after).load(self.id)
+        return connection(TaskConnection, tasks, first, after)
 
     def resolve_completed_tasks(self, info):
-        return self.tasks.filter(status="DONE").count()
+        return self.done_count
 
     def resolve_completion_rate(self, info):
-        total = self.tasks.count()
-        done = self.tasks.filter(status="DONE").count()
-        return (done / total) if total else 0.0
+        return (self.done_count / self.task_count) if self.task_count else 0.0
+
+
+class ProjectConnection(graphene.relay.Connection):
+    class Meta:
+        node = ProjectType
+
+
+class StatusCount(graphene.ObjectType):
+    status = graphene.String()
+    count = graphene.Int()
+
+
+def status_counts(statuses, rows):
+    counts = {row["status"]: row["count"] for row in rows}
+    return [StatusCount(status=status, count=counts.get(status) or 0) for status in statuses]
+
+
+class AssigneeWorkload(graphene.ObjectType):
+    assignee_email = graphene.String()
+    open_count = graphene.Int()
+    todo_count = graphene.Int()
+    in_progress_count = graphene.Int()
+    done_count = graphene.Int()
+
+
+class AssigneeTaskConnection(graphene.relay.Connection):
+    """One assignee's tasks, with their task counts per status."""
+
+    class Meta:
+        node = TaskType
+
+    counts = graphene.List(StatusCount)
+
+    def resolve_counts(connection, info):
+        # One rollup row per status, whatever the number of tasks.
+        rows = AssigneeRollup.objects.filter(
+            organization=connection.organization, assignee_email=connection.assignee_email
+        ).values("status", count=F("task_count"))
+        return then(fetch_all(info, rows), lambda rows: status_counts(TASK_STATUSES, rows))
+
+
+class OrganizationStats(graphene.ObjectType):
+    """Dashboard figures of the organization it resolves on.
+
+    Task figures read the rollup tables kept by core.rollups, so their cost
+    depends on the number of assignees and due days, not of tasks.
+    """
+
+    tasks_by_status = graphene.List(StatusCount)
+    projects_by_status = graphene.List(StatusCount)
+    overdue_count = graphene.Int()
+    workload = graphene.List(AssigneeWorkload, first=graphene.Int())
+
+    def resolve_tasks_by_status(org, info):
+        rows = (
+            AssigneeRollup.objects.filter(organization=org)
+            .values("status")
+            .annotate(count=Sum("task_count"))
+            .order_by()
+        )
+        return then(fetch_all(info, rows), lambda rows: status_counts(TASK_STATUSES, rows))
+
+    def resolve_projects_by_status(org, info):
+        # Served by the (organization, status) index; organizations have few projects.
+        rows = Project.objects.filter(organization=org).values("status").annotate(count=Count("id")).order_by()
+        return then(fetch_all(info, rows), lambda rows: status_counts(PROJECT_STATUSES, rows))
+
+    def resolve_overdue_count(org, info):
+        rows = (
+            DueDateRollup.objects.filter(organization=org, due_date__lt=rollups.due_day(deadlines.overdue_cutoff()))
+            .values("organization")
+            .annotate(count=Sum("open_count"))
+            .order_by()
+        )
+        return then(fetch_all(info, rows), lambda rows: rows[0]["count"] if rows else 0)
+
+    def resolve_workload(org, info, first=None):
+        """Assignees with the most open tasks first; unassigned tasks count under ""."""
+        def total(*statuses):
+            return Coalesce(Sum("task_count", filter=Q(status__in=statuses)), 0)
+
+        rows = (
+            AssigneeRollup.objects.filter(organization=org, task_count__gt=0)
+            .values("assignee_email")
+            .annotate(
+                open_count=total("TODO", "IN_PROGRESS"),
+                todo_count=total("TODO"),
+                in_progress_count=total("IN_PROGRESS"),
+                done_count=total("DONE"),
+            )
+            .order_by("-open_count", "assignee_email")
+        )
+        return fetch_all(info, rows[:page_size(first)])
+
+
+class DeletedObject(graphene.ObjectType):
+    kind = graphene.String()
+    id = graphene.ID()
+
+
+class ChangeSet(graphene.ObjectType):
+    """Rows changed after a sync cursor, and tombstones of the rows deleted since."""
+
+    cursor = graphene.String()
+    has_more = graphene.Boolean()
+    projects = graphene.List(ProjectType)
+    tasks = graphene.List(TaskType)
+    comments = graphene.List(TaskCommentType)
+    deleted = graphene.List(DeletedObject)
+
+
+def change_set(info, org, changes, first, after):
+    """Build a ``ChangeSet`` from Change rows fetched with ``fetch_page``."""
+    changes = list(changes)
+    page = changes[:page_size(first)]
+    changed = defaultdict(list)
+    deleted = []
+    for change in page:
+        if change.deleted:
+            deleted.append(DeletedObject(kind=change.kind, id=change.object_id))
+        else:
+            changed[change.kind].append(change.object_id)
+    querysets = {
+        "projects": (PROJECT, Project.objects.filter(organization=org)),
+        "tasks": (TASK, Task.objects.filter(project__organization=org)),
+        "comments": (COMMENT, TaskComment.objects.filter(task__project__organization=org)),
+    }
+    rows = {
+        name: fetch_all(info, plan_queryset(queryset.filter(id__in=changed[kind]), info, name)) if changed[kind] else []
+        for name, (kind, queryset) in querysets.items()
+    }
+    return ChangeSet(
+        cursor=cursor_for(page[-1], SYNC_ORDERING) if page else after,
+        has_more=len(changes) > len(page),
+        deleted=deleted,
+        **rows,
+    )
 
 
 # Queries
 class Query(graphene.ObjectType):
     organizations = graphene.List(OrganizationType)
     organization = graphene.Field(OrganizationType, id=graphene.ID(required=True))
-    projects = graphene.List(ProjectType)
+    projects = graphene.Field(ProjectConnection, first=graphene.Int(), after=graphene.String())
     project = graphene.Field(ProjectType, id=graphene.ID(required=True))
-    tasks = graphene.List(TaskType, project_id=graphene.ID(required=True))
+    task = graphene.Field(TaskType, id=graphene.ID(required=True))
+    tasks = graphene.Field(
+        TaskConnection,
+        project_id=graphene.ID(required=True),
+        first=graphene.Int(),
+        after=graphene.String(),
+    )
+    search_tasks = graphene.Field(
+        TaskConnection,
+        query=graphene.String(required=True),
+        first=graphene.Int(),
+        after=graphene.String(),
+    )
+    tasks_by_assignee = graphene.Field(
+        AssigneeTaskConnection,
+        email=graphene.String(required=True),
+        status=graphene.String(),
+        first=graphene.Int(),
+        after=graphene.String(),
+    )
+    overdue_tasks = graphene.Field(TaskConnection, first=graphene.Int(), after=graphene.String())
+    upcoming_tasks = graphene.Field(
+        TaskConnection,
+        within_days=graphene.Int(default_value=7),
+        first=graphene.Int(),
+        after=graphene.String(),
+    )
+    overdue_projects = graphene.Field(ProjectConnection, first=graphene.Int(), after=graphene.String())
+    upcoming_projects = graphene.Field(
+        ProjectConnection,
+        within_days=graphene.Int(default_value=7),
+        first=graphene.Int(),
+        after=graphene.String(),
+    )
+    changes_since = graphene.Field(ChangeSet, cursor=graphene.String(), first=graphene.Int())
+    organization_stats = graphene.Field(OrganizationStats)
 
     def resolve_organizations(self, info):
-        return Organization.objects.all()
+        return fetch_all(info, plan_queryset(Organization.objects.filter(deleted_at__isnull=True), info))
 
     def resolve_organization(self, info, id):
-        try:
-            return Organization.objects.get(id=id)
-        except Organization.DoesNotExist:
-            raise GraphQLError("Organization not found")
+        organizations = plan_queryset(Organization.objects.filter(id=id, deleted_at__isnull=True), info)
+        return fetch_one(info, organizations, "Organization not found")
 
-    def resolve_projects(self, info):
+    def resolve_projects(self, info, first=None, after=None):
         org = require_org(info)
-        return Project.objects.filter(organization=org).prefetch_related("tasks")
+        projects = plan_page(Project.objects.filter(organization=org), info, first, after)
+        return connection(ProjectConnection, fetch_all(info, projects), first, after)
 
     def resolve_project(self, info, id):
         org = require_org(info)
-        try:
-            return Project.objects.prefetch_related("tasks").get(id=id, organization=org)
-        except Project.DoesNotExist:
-            raise GraphQLError("Project not found")
+        projects = plan_queryset(Project.objects.filter(id=id, organization=org), info)
+        return fetch_one(info, projects, "Project not found")
 
-    def resolve_tasks(self, info, project_id):
+    def resolve_task(self, info, id):
         org = require_org(info)
-        try:
-            project = Project.objects.get(id=project_id, organization=org)
-        except Project.DoesNotExist:
-            raise GraphQLError("Project not found")
-        return project.tasks.all().prefetch_related("comments")
+        tasks = plan_queryset(Task.objects.filter(id=id, project__organization=org), info)
+        return fetch_one(info, tasks, "Task not found")
+
+    def resolve_tasks(self, info, project_id, first=None, after=None):
+        org = require_org(info)
+        project = fetch_one(
+            info, Project.objects.only("id").filter(id=project_id, organization=org), "Project not found"
+        )
+
+        def page(project):
+            tasks = plan_page(Task.objects.filter(project=project), info, first, after)
+            return connection(TaskConnection, fetch_all(info, tasks), first, after)
+
+        return then(project, page)
+
+    def resolve_search_tasks(self, info, query, first=None, after=None):
+        org = require_org(info)
+        if not query.strip():
+            raise GraphQLError("Search query cannot be empty")
+        tasks = search_tasks(Task.objects.all(), org, query)
+        tasks = plan_page(tasks, info, first, after, RANK_ORDERING)
+        return connection(TaskConnection, fetch_all(info, tasks), first, after, RANK_ORDERING)
+
+    def resolve_tasks_by_assignee(self, info, email, status=None, first=None, after=None):
+        org = require_org(info)
+        email = normalize_email(email)
+        error = task_input_error(status=status)
+        if error:
+            raise GraphQLError(error)
+        tasks = Task.objects.filter(
+            assignee_email=email, project__in=Project.objects.filter(organization=org).values("id")
+        )
+        if status is not None:
+            tasks = tasks.filter(status=status)
+        tasks = plan_page(tasks, info, first, after)
+
+        def page(rows):
+            page = make_connection(AssigneeTaskConnection, rows, first, after)
+            page.organization, page.assignee_email = org, email
+            return page
+
+        return then(fetch_all(info, tasks), page)
+
+    def resolve_overdue_tasks(self, info, first=None, after=None):
+        tasks = plan_page(deadlines.overdue_tasks(require_org(info)), info, first, after, DUE_ORDERING)
+        return connection(TaskConnection, fetch_all(info, tasks), first, after, DUE_ORDERING)
+
+    def resolve_upcoming_tasks(self, info, within_days, first=None, after=None):
+        tasks = deadlines.upcoming_tasks(require_org(info), within_days)
+        tasks = plan_page(tasks, info, first, after, DUE_ORDERING)
+        return connection(TaskConnection, fetch_all(info, tasks), first, after, DUE_ORDERING)
+
+    def resolve_overdue_projects(self, info, first=None, after=None):
+        projects = plan_page(deadlines.overdue_projects(require_org(info)), info, first, after, DUE_ORDERING)
+        return connection(ProjectConnection, fetch_all(info, projects), first, after, DUE_ORDERING)
+
+    def resolve_upcoming_projects(self, info, within_days, first=None, after=None):
+        projects = deadlines.upcoming_projects(require_org(info), within_days)
+        projects = plan_page(projects, info, first, after, DUE_ORDERING)
+        return connection(ProjectConnection, fetch_all(info, projects), first, after, DUE_ORDERING)
+
+    def resolve_organization_stats(self, info):
+        return require_org(info)
+
+    def resolve_changes_since(self, info, cursor=None, first=None):
+        org = require_org(info)
+        changes = Change.objects.filter(organization=org)
+        if cursor is None:
+            # No cursor yet: answer with the current position, which a client
+            # reads before its initial load and syncs from afterwards.
+            latest = fetch_all(info, changes.order_by("-version", "-id")[:1])
+            return then(latest, lambda latest: ChangeSet(
+                cursor=cursor_for(latest[0], SYNC_ORDERING) if latest else encode_cursor([0, 0]),
+                has_more=False, projects=[], tasks=[], comments=[], deleted=[],
+            ))
+        changes = fetch_page(changes, first, cursor, SYNC_ORDERING)
+        return then(fetch_all(info, changes), lambda changes: change_set(info, org, changes, first, cursor))
 
 
 # Mutations
@@ -117,6 +505,7 @@ class CreateOrganization(graphene.Mutation):
         
         if not slug or len(slug.strip()) < 2:
             raise GraphQLError("Organization slug must be at least 2 characters long")
+        raise_for(slug_error(slug))
         
         if "@" not in contact_email:
             raise GraphQLError("Invalid email format")
@@ -130,7 +519,8 @@ class CreateOrganization(graphene.Mutation):
             slug=slug.strip(),
             contact_email=contact_email.strip()
         )
-        return CreateOrganization(organization=organization)
+        bump_data_version(GLOBAL)
+        return CreateOrganization(organization=plan_instance(organization, info, "organization"))
 
 
 class UpdateOrganization(graphene.Mutation):
@@ -144,7 +534,7 @@ class UpdateOrganization(graphene.Mutation):
 
     def mutate(self, info, id, name=None, slug=None, contact_email=None):
         try:
-            organization = Organization.objects.get(id=id)
+            organization = Organization.objects.get(id=id, deleted_at__isnull=True)
         except Organization.DoesNotExist:
             raise GraphQLError("Organization not found")
 
@@ -156,6 +546,7 @@ class UpdateOrganization(graphene.Mutation):
         if slug is not None:
             if len(slug.strip()) < 2:
                 raise GraphQLError("Organization slug must be at least 2 characters long")
+            raise_for(slug_error(slug))
             # Check for duplicate slug (excluding current organization)
             if Organization.objects.filter(slug=slug).exclude(id=id).exists():
                 raise GraphQLError("An organization with this slug already exists")
@@ -166,8 +557,11 @@ class UpdateOrganization(graphene.Mutation):
                 raise GraphQLError("Invalid email format")
             organization.contact_email = contact_email.strip()
         
-        organization.save()
-        return UpdateOrganization(organization=organization)
+        # Only the editable columns: a full save would write back the
+        # sync_version read above over a concurrent record_changes().
+        organization.save(update_fields=["name", "slug", "contact_email"])
+        bump_data_version(GLOBAL, organization.pk)
+        return UpdateOrganization(organization=plan_instance(organization, info, "organization"))
 
 
 class DeleteOrganization(graphene.Mutation):
@@ -178,11 +572,13 @@ class DeleteOrganization(graphene.Mutation):
 
     def mutate(self, info, id):
         try:
-            organization = Organization.objects.get(id=id)
-            organization.delete()
-            return DeleteOrganization(success=True)
+            organization = Organization.objects.get(id=id, deleted_at__isnull=True)
         except Organization.DoesNotExist:
             raise GraphQLError("Organization not found")
+        # Deleting every row at once would hold locks for minutes on a large
+        # organization; hide it now and let purge_organizations remove the rows.
+        purge.mark_deleted(organization)
+        return DeleteOrganization(success=True)
 
 
 class CreateProject(graphene.Mutation):
@@ -201,7 +597,7 @@ class CreateProject(graphene.Mutation):
         if not name or len(name.strip()) < 2:
             raise GraphQLError("Project name must be at least 2 characters long")
         
-        if status not in ["ACTIVE", "COMPLETED", "ON_HOLD"]:
+        if status not in PROJECT_STATUSES:
             raise GraphQLError("Invalid status. Must be one of: ACTIVE, COMPLETED, ON_HOLD")
         
         if due_date and due_date < timezone.now().date():
@@ -211,14 +607,17 @@ class CreateProject(graphene.Mutation):
         if Project.objects.filter(organization=org, name=name).exists():
             raise GraphQLError("A project with this name already exists in your organization")
         
-        project = Project.objects.create(
-            name=name.strip(),
-            description=description or "",
-            status=status,
-            due_date=due_date,
-            organization=org
-        )
-        return CreateProject(project=project)
+        with transaction.atomic():
+            project = Project.objects.create(
+                name=name.strip(),
+                description=description or "",
+                status=status,
+                due_date=due_date,
+                organization=org
+            )
+            record_changes(org.pk, projects=[project.id])
+        bump_data_version(org.pk)
+        return CreateProject(project=plan_instance(project, info, "project"))
 
 
 class UpdateProject(graphene.Mutation):
@@ -238,17 +637,26 @@ class UpdateProject(graphene.Mutation):
         except Project.DoesNotExist:
             raise GraphQLError("Project not found")
 
+        # Only write the edited columns so concurrent task counter updates survive.
+        update_fields = []
         if name is not None:
             project.name = name
+            update_fields.append("name")
         if description is not None:
             project.description = description
+            update_fields.append("description")
         if status is not None:
             project.status = status
+            update_fields.append("status")
         if due_date is not None:
             project.due_date = due_date
+            update_fields.append("due_date")
         
-        project.save()
-        return UpdateProject(project=project)
+        with transaction.atomic():
+            project.save(update_fields=update_fields + ["updated_at"])
+            record_changes(org.pk, projects=[project.id])
+        bump_data_version(org.pk)
+        return UpdateProject(project=plan_instance(project, info, "project"))
 
 
 class CreateTask(graphene.Mutation):
@@ -265,30 +673,27 @@ class CreateTask(graphene.Mutation):
     def mutate(self, info, project_id, title, description=None, status="TODO", assignee_email=None, due_date=None):
         org = require_org(info)
         
-        # Validation
-        if not title or len(title.strip()) < 2:
-            raise GraphQLError("Task title must be at least 2 characters long")
-        
-        if status not in ["TODO", "IN_PROGRESS", "DONE"]:
-            raise GraphQLError("Invalid status. Must be one of: TODO, IN_PROGRESS, DONE")
-        
-        if assignee_email and "@" not in assignee_email:
-            raise GraphQLError("Invalid email format for assignee")
-        
+        raise_for(task_input_error(title, status, assignee_email))
+
         try:
             project = Project.objects.get(id=project_id, organization=org)
         except Project.DoesNotExist:
             raise GraphQLError("Project not found")
 
-        task = Task.objects.create(
-            project=project,
-            title=title.strip(),
-            description=description or "",
-            status=status,
-            assignee_email=assignee_email or "",
-            due_date=due_date
-        )
-        return CreateTask(task=task)
+        with transaction.atomic():
+            task = Task.objects.create(
+                project=project,
+                title=title.strip(),
+                description=description or "",
+                status=status,
+                assignee_email=normalize_email(assignee_email),
+                due_date=due_date
+            )
+            # post_save counted the task in the project counters and rollups.
+            record_changes(org.pk, tasks=[task.id], projects=[project.id])
+        bump_data_version(org.pk)
+        publish_on_commit(task_channel(project.id), {"taskId": task.id})
+        return CreateTask(task=plan_instance(task, info, "task"))
 
 
 class UpdateTask(graphene.Mutation):
@@ -304,24 +709,36 @@ class UpdateTask(graphene.Mutation):
 
     def mutate(self, info, id, title=None, description=None, status=None, assignee_email=None, due_date=None):
         org = require_org(info)
-        try:
-            task = Task.objects.get(id=id, project__organization=org)
-        except Task.DoesNotExist:
-            raise GraphQLError("Task not found")
-
-        if title is not None:
-            task.title = title
-        if description is not None:
-            task.description = description
-        if status is not None:
-            task.status = status
-        if assignee_email is not None:
-            task.assignee_email = assignee_email
-        if due_date is not None:
-            task.due_date = due_date
-        
-        task.save()
-        return UpdateTask(task=task)
+        raise_for(task_input_error(title, status, assignee_email))
+
+        with transaction.atomic():
+            try:
+                task = Task.objects.select_for_update().get(id=id, project__organization=org)
+            except Task.DoesNotExist:
+                raise GraphQLError("Task not found")
+            old_status = task.status
+            old_key = rollups.task_key(task)
+
+            if title is not None:
+                task.title = title
+            if description is not None:
+                task.description = description
+            if status is not None:
+                task.status = status
+            if assignee_email is not None:
+                task.assignee_email = normalize_email(assignee_email)
+            if due_date is not None:
+                task.due_date = due_date
+
+            task.save()
+            counters.task_status_changed(task, old_status)
+            rollups.adjust_rollups(org.pk, [(old_key, rollups.task_key(task))])
+            record_changes(
+                org.pk, tasks=[task.id], projects=[task.project_id] if task.status != old_status else []
+            )
+        bump_data_version(org.pk)
+        publish_on_commit(task_channel(task.project_id), {"taskId": task.id})
+        return UpdateTask(task=plan_instance(task, info, "task"))
 
 
 class AddTaskComment(graphene.Mutation):
@@ -334,17 +751,196 @@ class AddTaskComment(graphene.Mutation):
 
     def mutate(self, info, task_id, content, author_email):
         org = require_org(info)
+        raise_for(comment_input_error(content, author_email))
         try:
             task = Task.objects.get(id=task_id, project__organization=org)
         except Task.DoesNotExist:
             raise GraphQLError("Task not found")
 
-        comment = TaskComment.objects.create(
-            task=task,
-            content=content,
-            author_email=author_email
-        )
-        return AddTaskComment(comment=comment)
+        with transaction.atomic():
+            comment = TaskComment.objects.create(
+                task=task,
+                content=content,
+                author_email=author_email
+            )
+            record_changes(org.pk, comments=[comment.id])
+        bump_data_version(org.pk)
+        publish_on_commit(comment_channel(task.id), {"commentId": comment.id})
+        return AddTaskComment(comment=plan_instance(comment, info, "comment"))
+
+
+class TaskInput(graphene.InputObjectType):
+    project_id = graphene.ID(required=True)
+    title = graphene.String(required=True)
+    description = graphene.String()
+    status = graphene.String()
+    assignee_email = graphene.String()
+    due_date = graphene.DateTime()
+
+
+class TaskUpdateInput(graphene.InputObjectType):
+    id = graphene.ID(required=True)
+    title = graphene.String()
+    description = graphene.String()
+    status = graphene.String()
+    assignee_email = graphene.String()
+    due_date = graphene.DateTime()
+
+
+class TaskCommentInput(graphene.InputObjectType):
+    task_id = graphene.ID(required=True)
+    content = graphene.String(required=True)
+    author_email = graphene.String(required=True)
+
+
+class BulkItemError(graphene.ObjectType):
+    index = graphene.Int()
+    message = graphene.String()
+
+
+class BulkCreateTasks(graphene.Mutation):
+    class Arguments:
+        tasks = graphene.List(graphene.NonNull(TaskInput), required=True)
+
+    tasks = graphene.List(TaskType)
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, tasks):
+        org = require_org(info)
+        check_bulk_size(tasks)
+        project_ids = {parse_id(item.project_id) for item in tasks} - {None}
+        projects = Project.objects.filter(organization=org, id__in=project_ids).only("id").in_bulk()
+
+        errors, new_tasks = [], []
+        for index, item in enumerate(tasks):
+            status = item.status or "TODO"
+            message = task_input_error(item.title, status, item.assignee_email)
+            project = projects.get(parse_id(item.project_id))
+            if message is None and project is None:
+                message = "Project not found"
+            if message:
+                errors.append(BulkItemError(index=index, message=message))
+                continue
+            new_tasks.append(Task(
+                project=project,
+                title=item.title.strip(),
+                description=item.description or "",
+                status=status,
+                assignee_email=normalize_email(item.assignee_email),
+                due_date=item.due_date,
+            ))
+
+        if new_tasks:
+            deltas = defaultdict(lambda: defaultdict(int))
+            for task in new_tasks:
+                deltas[task.project_id][task.status] += 1
+            with transaction.atomic():
+                Task.objects.bulk_create(new_tasks)
+                for project_id, project_deltas in deltas.items():
+                    counters.adjust_task_counters(project_id, project_deltas)
+                rollups.tasks_added(org.pk, new_tasks)
+                record_changes(org.pk, tasks=[task.id for task in new_tasks], projects=deltas)
+            bump_data_version(org.pk)
+            for task in new_tasks:
+                publish_on_commit(task_channel(task.project_id), {"taskId": task.id})
+        return BulkCreateTasks(tasks=plan_instances(new_tasks, info, "tasks"), errors=errors)
+
+
+class BulkUpdateTasks(graphene.Mutation):
+    class Arguments:
+        tasks = graphene.List(graphene.NonNull(TaskUpdateInput), required=True)
+
+    tasks = graphene.List(TaskType)
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, tasks):
+        org = require_org(info)
+        check_bulk_size(tasks)
+        fields = ("title", "description", "status", "assignee_email", "due_date")
+        errors, updated, changed_fields = [], {}, set()
+
+        with transaction.atomic():
+            task_ids = {parse_id(item.id) for item in tasks} - {None}
+            existing = (
+                Task.objects.select_for_update()
+                .filter(id__in=task_ids, project__organization=org)
+                .in_bulk()
+            )
+            old_statuses = {task.id: task.status for task in existing.values()}
+            old_keys = {task.id: rollups.task_key(task) for task in existing.values()}
+
+            for index, item in enumerate(tasks):
+                message = task_input_error(item.title, item.status, item.assignee_email)
+                task = existing.get(parse_id(item.id))
+                if message is None and task is None:
+                    message = "Task not found"
+                if message:
+                    errors.append(BulkItemError(index=index, message=message))
+                    continue
+                for field in fields:
+                    value = getattr(item, field)
+                    if value is not None:
+                        setattr(task, field, normalize_email(value) if field == "assignee_email" else value)
+                        changed_fields.add(field)
+                updated[task.id] = task
+
+            if updated and changed_fields:
+                # bulk_update() skips auto_now, so stamp updated_at here.
+                now = timezone.now()
+                for task in updated.values():
+                    task.updated_at = now
+                Task.objects.bulk_update(updated.values(), sorted(changed_fields) + ["updated_at"])
+                deltas = defaultdict(lambda: defaultdict(int))
+                for task in updated.values():
+                    if task.status != old_statuses[task.id]:
+                        deltas[task.project_id][task.status] += 1
+                        deltas[task.project_id][old_statuses[task.id]] -= 1
+                for project_id, project_deltas in deltas.items():
+                    counters.adjust_task_counters(project_id, project_deltas)
+                rollups.adjust_rollups(
+                    org.pk, [(old_keys[task.id], rollups.task_key(task)) for task in updated.values()]
+                )
+                record_changes(org.pk, tasks=updated, projects=deltas)
+
+        if updated:
+            bump_data_version(org.pk)
+            for task in updated.values():
+                publish_on_commit(task_channel(task.project_id), {"taskId": task.id})
+        return BulkUpdateTasks(tasks=plan_instances(list(updated.values()), info, "tasks"), errors=errors)
+
+
+class BulkAddComments(graphene.Mutation):
+    class Arguments:
+        comments = graphene.List(graphene.NonNull(TaskCommentInput), required=True)
+
+    comments = graphene.List(TaskCommentType)
+    errors = graphene.List(BulkItemError)
+
+    def mutate(self, info, comments):
+        org = require_org(info)
+        check_bulk_size(comments)
+        task_ids = {parse_id(item.task_id) for item in comments} - {None}
+        tasks = Task.objects.filter(project__organization=org, id__in=task_ids).only("id").in_bulk()
+
+        errors, new_comments = [], []
+        for index, item in enumerate(comments):
+            message = comment_input_error(item.content, item.author_email)
+            task = tasks.get(parse_id(item.task_id))
+            if message is None and task is None:
+                message = "Task not found"
+            if message:
+                errors.append(BulkItemError(index=index, message=message))
+                continue
+            new_comments.append(TaskComment(task=task, content=item.content, author_email=item.author_email))
+
+        if new_comments:
+            with transaction.atomic():
+                TaskComment.objects.bulk_create(new_comments)
+                record_changes(org.pk, comments=[comment.id for comment in new_comments])
+            bump_data_version(org.pk)
+            for comment in new_comments:
+                publish_on_commit(comment_channel(comment.task_id), {"commentId": comment.id})
+        return BulkAddComments(comments=plan_instances(new_comments, info, "comments"), errors=errors)
 
 
 class Mutation(graphene.ObjectType):
@@ -356,7 +952,42 @@ class Mutation(graphene.ObjectType):
     create_task = CreateTask.Field()
     update_task = UpdateTask.Field()
     add_task_comment = AddTaskComment.Field()
+    bulk_create_tasks = BulkCreateTasks.Field()
+    bulk_update_tasks = BulkUpdateTasks.Field()
+    bulk_add_comments = BulkAddComments.Field()
+
+
+# Subscriptions
+# Each subscribe_* generator checks access once, then yields the events of its
+# channel; the matching resolve_* loads the changed row for every event.
+class Subscription(graphene.ObjectType):
+    task_changed = graphene.Field(TaskType, project_id=graphene.ID(required=True))
+    comment_added = graphene.Field(TaskCommentType, task_id=graphene.ID(required=True))
+
+    async def subscribe_task_changed(root, info, project_id):
+        org = require_org(info)
+        project = await fetch_one(
+            info, Project.objects.only("id").filter(id=project_id, organization=org), "Project not found"
+        )
+        async for event in get_broker().subscribe(task_channel(project.id)):
+            yield event
+
+    def resolve_task_changed(event, info, project_id):
+        tasks = plan_queryset(Task.objects.filter(id=event["taskId"]), info)
+        return fetch_one(info, tasks, "Task not found")
+
+    async def subscribe_comment_added(root, info, task_id):
+        org = require_org(info)
+        task = await fetch_one(
+            info, Task.objects.only("id").filter(id=task_id, project__organization=org), "Task not found"
+        )
+        async for event in get_broker().subscribe(comment_channel(task.id)):
+            yield event
+
+    def resolve_comment_added(event, info, task_id):
+        comments = plan_queryset(TaskComment.objects.filter(id=event["commentId"]), info)
+        return fetch_one(info, comments, "Comment not found")
 
 
 # Schema
-schema = graphene.Schema(query=Query, mutation=Mutation)
+schema = graphene.Schema(query=Query, mutation=Mutation, subscription=Subscription)
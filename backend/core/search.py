@@ -0,0 +1,45 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from graphql import GraphQLError
+
+# Best match first; "id" breaks ties so the keyset order is total.
+RANK_ORDERING = ("-rank", "-id")
+
+# The core_task_search index is created by migrations 0005 and 0010 and
+# maintained by triggers, so every write path (the ORM, bulk_create, COPY,
+# cascading deletes) updates it in the same transaction. PostgreSQL keeps a
+# tsvector per task holding its title (weight A), description (B) and
+# comments (C); SQLite an FTS5 table whose rowid is also the task id.
+
+
+def search_tasks(tasks, organization, text):
+    """Filter ``tasks`` to the organization's matches for ``text``, annotated with a ``rank``.
+
+    PostgreSQL accepts web search syntax ("quoted phrases", OR, -excluded);
+    SQLite matches tasks containing every word.
+    """
+    vendor = connections[tasks.db].vendor
+    if vendor == "postgresql":
+        query = "websearch_to_tsquery('english', %s)"
+        match = RawSQL(f"core_task_search.document @@ {query}", [text], output_field=BooleanField())
+        # ts_rank_cd() returns real: as double precision, the rank written
+        # to a cursor compares equal to itself again in the keyset filter.
+        rank = RawSQL(
+            f"ts_rank_cd(core_task_search.document, {query})::double precision", [text], output_field=FloatField()
+        )
+    elif vendor == "sqlite":
+        terms = re.findall(r"\w+", text)
+        if not terms:
+            raise GraphQLError("Search query cannot be empty")
+        match = RawSQL(
+            "core_task_search MATCH %s", [" ".join(f'"{term}"' for term in terms)], output_field=BooleanField()
+        )
+        # Lower is better for bm25(); unlike a bm25() call, the rank column
+        # can also be used in grouped queries.
+        rank = RawSQL("-core_task_search.rank", [], output_field=FloatField())
+    else:
+        raise GraphQLError("Search is not supported on this database")
+    return tasks.filter(match, search__organization=organization).annotate(rank=rank)
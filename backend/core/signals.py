@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import counters, rollups, sync
+from .models import Organization, Project, Task, TaskComment
+from .org_cache import organization_cache
+
+
+def deleting_organization(origin):
+    return isinstance(origin, Organization) or (isinstance(origin, QuerySet) and origin.model is Organization)
+
+
+@receiver(post_save, sender=Task)
+def update_counters_on_task_create(sender, instance, created, raw=False, **kwargs):
+    # The counterpart of update_counters_on_task_delete, so a task created
+    # through the ORM or the admin is counted like the delete uncounts it.
+    # bulk_create sends no signal; its callers count the tasks themselves.
+    if created and not raw:
+        counters.task_created(instance)
+        rollups.task_created(instance)
+
+
+@receiver(post_delete, sender=Task)
+def update_counters_on_task_delete(sender, instance, origin=None, **kwargs):
+    counters.task_deleted(instance)
+    # The rollups of a deleted organization go with it.
+    if not deleting_organization(origin):
+        rollups.task_deleted(instance)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=TaskComment)
+def record_tombstone(sender, instance, origin=None, **kwargs):
+    sync.record_deletion(instance, origin)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def invalidate_cached_organization(sender, instance, **kwargs):
+    organization_id, slug = instance.pk, instance.slug
+    organization_cache.invalidate(organization_id, slug)
+    # Again after commit, in case a request re-cached the old row meanwhile.
+    transaction.on_commit(lambda: organization_cache.invalidate(organization_id, slug))
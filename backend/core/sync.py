@@ -0,0 +1,82 @@
+from django.db import transaction
+from django.db.models import F, QuerySet
+
+from .models import Change, Organization, Project, Task
+
+PROJECT, TASK, COMMENT = "project", "task", "comment"
+
+# changesSince pages through an organization's changes in this order.
+SYNC_ORDERING = ("version", "id")
+
+
+class OrganizationDeleted(Exception):
+    """The organization was marked deleted (core.purge) before a write to it committed."""
+
+
+def next_version(organization_id):
+    """Advance the organization's sync version and return the new value.
+
+    The UPDATE locks the organization row until the transaction ends, so an
+    organization's versions commit in order: a reader that sees version N
+    also sees every change up to N, and a cursor never skips a change that
+    commits late. It also serializes writes with core.purge.mark_deleted:
+    once an organization is marked, the UPDATE matches no row and the write
+    is rolled back instead of adding rows behind the purge.
+    """
+    organizations = Organization.objects.filter(pk=organization_id, deleted_at__isnull=True)
+    if not organizations.update(sync_version=F("sync_version") + 1):
+        raise OrganizationDeleted("Organization not found")
+    return organizations.values_list("sync_version", flat=True).get()
+
+
+def record_changes(organization_id, projects=(), tasks=(), comments=(), deleted=False):
+    """Stamp the given object ids with the organization's next sync version.
+
+    Must run in the same transaction as the writes it records. ``deleted``
+    turns the entries into tombstones.
+    """
+    entries = [
+        Change(organization_id=organization_id, kind=kind, object_id=object_id, deleted=deleted)
+        for kind, object_ids in ((PROJECT, projects), (TASK, tasks), (COMMENT, comments))
+        for object_id in set(object_ids)
+    ]
+    if not entries:
+        return
+    with transaction.atomic():
+        version = next_version(organization_id)
+        for entry in entries:
+            entry.version = version
+        Change.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=["organization", "kind", "object_id"],
+            update_fields=["version", "deleted", "changed_at"],
+        )
+
+
+def deleted_directly(instance, origin):
+    """Whether ``instance`` is what was deleted rather than part of a cascade.
+
+    Clients drop the children of a deleted row themselves, so only the row
+    the delete started from gets a tombstone.
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model is type(instance)
+    return origin is instance
+
+
+def record_deletion(instance, origin):
+    if not deleted_directly(instance, origin):
+        return
+    if isinstance(instance, Project):
+        record_changes(instance.organization_id, projects=[instance.pk], deleted=True)
+    elif isinstance(instance, Task):
+        organization_id = Project.objects.values_list("organization_id", flat=True).get(pk=instance.project_id)
+        record_changes(organization_id, tasks=[instance.pk], deleted=True)
+        # The project's task counters changed too.
+        record_changes(organization_id, projects=[instance.project_id])
+    else:
+        organization_id = (
+            Task.objects.filter(pk=instance.task_id).values_list("project__organization_id", flat=True).get()
+        )
+        record_changes(organization_id, comments=[instance.pk], deleted=True)
@@ -1,21 +1,1422 @@
-from django.test import TestCase, Client
-from core.models import Organization, Project
+import asyncio
+import csv
+import gzip
+import json
+import os
+import re
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
 
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from django.utils import timezone
+from graphql import OperationType, parse
+
+from core import counters, deadlines, purge, rollups
+from core.datasets import DatasetGenerator
+from core.events import get_broker, task_channel
+from core.imports import Importer
+from core.loaders import Loaders
+from core.models import AssigneeRollup, Change, DueDateRollup, Organization, Project, Task, TaskComment
+from core.org_cache import GENERATION_KEY, organization_cache
+from core.sync import record_changes
+from pmtool import checks
+from pmtool.db import routers
+from pmtool.db.pool import ConnectionPool, PoolTimeout
+from pmtool.documents import document_cache, persisted_queries, query_hash
+from pmtool.graphql_view import AsyncContextGraphQLView
+from pmtool.response_cache import response_cache
+from pmtool.subscriptions import graphql_websocket
+from pmtool.tracing import TracingMiddleware
+
+# URLconf for AsyncViewTests, serving /graphql/ as with GRAPHQL_ASYNC=True.
+urlpatterns = [path('graphql/', AsyncContextGraphQLView.as_view())]
+
+
+class OrganizationTestCase(TestCase):
+    """Tests acting as organization "org" (``self.org``), with helpers posting to /graphql/."""
 
-class IsolationTests(TestCase):
     def setUp(self):
-        self.org1 = Organization.objects.create(name='Org1', slug='org1', contact_email='o1@x.test')
-        self.org2 = Organization.objects.create(name='Org2', slug='org2', contact_email='o2@x.test')
-        Project.objects.create(organization=self.org1, name='P1', status='ACTIVE')
-        Project.objects.create(organization=self.org2, name='P2', status='ACTIVE')
-        self.client = Client()
+        self.org = self.create_org('org')
+        organization_cache.clear()
+
+    def create_org(self, slug):
+        return Organization.objects.create(name=slug.capitalize(), slug=slug, contact_email=f'{slug}@x.test')
+
+    def post_json(self, body, slug='org', **extra):
+        """POST ``body``, one operation or a batch of them, as JSON; returns the response."""
+        return self.client.post('/graphql/', data=body, content_type='application/json', HTTP_X_ORG_SLUG=slug,
+                                **extra)
+
+    def post_json_async(self, body, slug='org', headers=None):
+        """post_json() through the ASGI handler."""
+        async def request():
+            return await self.async_client.post(
+                '/graphql/', data=body, content_type='application/json', headers={'X-Org-Slug': slug, **(headers or {})}
+            )
+
+        return async_to_sync(request)()
 
+    def post(self, query, variables=None, slug='org', **extra):
+        return self.post_json({'query': query, 'variables': variables or {}}, slug, **extra)
+
+    def gql(self, query, variables=None, slug='org'):
+        """The ``data`` of ``query``, which must not fail."""
+        body = self.post(query, variables, slug).json()
+        self.assertNotIn('errors', body)
+        return body['data']
+
+
+class IsolationTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        Project.objects.create(organization=self.org, name='P1', status='ACTIVE')
+        Project.objects.create(organization=self.create_org('other'), name='P2', status='ACTIVE')
 
     def test_org_isolation(self):
-        q = '{ projects { name } }'
-        res1 = self.client.post('/graphql/', data={'query': q}, HTTP_X_ORG_SLUG='org1')
-        res2 = self.client.post('/graphql/', data={'query': q}, HTTP_X_ORG_SLUG='org2')
+        q = '{ projects { edges { node { name } } } }'
+        res1 = self.post(q)
+        res2 = self.post(q, slug='other')
         self.assertContains(res1, 'P1')
         self.assertNotContains(res1, 'P2')
         self.assertContains(res2, 'P2')
-        self.assertNotContains(res2, 'P1')
\ No newline at end of file
+        self.assertNotContains(res2, 'P1')
+
+
+class DataLoaderTests(OrganizationTestCase):
+    BOARD_QUERY = '{ projects { edges { node { name taskCount completedTasks completionRate tasks { edges { node { title comments { edges { node { content } } } } } } } } } }'
+
+    def add_projects(self, count):
+        for i in range(count):
+            project = Project.objects.create(organization=self.org, name=f'P{Project.objects.count()}')
+            for status in ('TODO', 'DONE'):
+                task = Task.objects.create(project=project, title=f'{status} task', status=status)
+                TaskComment.objects.create(task=task, content='hi', author_email='a@x.test')
+
+    def count_board_queries(self, query=BOARD_QUERY):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.post(query)
+        self.assertEqual(res.status_code, 200)
+        return len(ctx.captured_queries), [edge['node'] for edge in res.json()['data']['projects']['edges']]
+
+    def test_query_count_is_independent_of_project_count(self):
+        self.add_projects(2)
+        self.count_board_queries()  # warm the organization cache
+        small, _ = self.count_board_queries()
+        self.add_projects(5)
+        large, projects = self.count_board_queries()
+        self.assertEqual(small, large)
+        self.assertEqual(len(projects), 7)
+        self.assertEqual(projects[0]['taskCount'], 2)
+        self.assertEqual(projects[0]['completedTasks'], 1)
+        self.assertEqual(projects[0]['completionRate'], 0.5)
+        self.assertEqual(len(projects[0]['tasks']['edges'][0]['node']['comments']['edges']), 1)
+
+    def test_aliased_connections_are_prefetched_per_argument_set(self):
+        query = '{ projects { edges { node { latest: tasks(first: 1) { edges { node { title } } } tasks { edges { node { status } } } all: tasks { edges { node { title comments { edges { node { content } } } } } } } } } }'
+        self.add_projects(2)
+        self.count_board_queries(query)  # warm the organization cache
+        small, _ = self.count_board_queries(query)
+        self.add_projects(5)
+        large, projects = self.count_board_queries(query)
+        self.assertEqual(small, large)
+        self.assertEqual(projects[0]['latest']['edges'], [{'node': {'title': 'TODO task'}}])
+        self.assertEqual([edge['node'] for edge in projects[0]['tasks']['edges']], [{'status': 'TODO'}, {'status': 'DONE'}])
+        self.assertEqual(projects[0]['all']['edges'][1]['node']['comments']['edges'], [{'node': {'content': 'hi'}}])
+
+
+class ProjectCounterTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(organization=self.org, name='P1')
+
+    def assertCounters(self, total, todo, in_progress, done):
+        self.project.refresh_from_db()
+        self.assertEqual(
+            (self.project.task_count, self.project.todo_count, self.project.in_progress_count, self.project.done_count),
+            (total, todo, in_progress, done),
+        )
+
+    def test_mutations_keep_counters_in_sync(self):
+        task_id = self.gql('mutation { createTask(projectId: %d, title: "One") { task { id } } }' % self.project.id)['createTask']['task']['id']
+        self.gql('mutation { createTask(projectId: %d, title: "Two", status: "DONE") { task { id } } }' % self.project.id)
+        self.assertCounters(2, 1, 0, 1)
+
+        self.gql('mutation { updateTask(id: %s, status: "IN_PROGRESS") { task { id } } }' % task_id)
+        self.assertCounters(2, 0, 1, 1)
+
+        Task.objects.get(id=task_id).delete()
+        self.assertCounters(1, 0, 0, 1)
+        self.assertEqual(self.gql('{ projects { edges { node { taskCount completedTasks completionRate } } } }')['projects']['edges'],
+                         [{'node': {'taskCount': 1, 'completedTasks': 1, 'completionRate': 1.0}}])
+
+    def test_orm_and_admin_writes_keep_counters_in_sync(self):
+        task = Task.objects.create(project=self.project, title='ORM', status='DONE', assignee_email='a@x.test')
+        self.assertCounters(1, 0, 0, 1)
+        task.delete()
+        self.assertCounters(0, 0, 0, 0)
+        self.assertFalse(AssigneeRollup.objects.exclude(task_count=0).exists())
+
+        admin = get_user_model().objects.create_superuser('admin', 'admin@x.test', 'pw')
+        self.client.force_login(admin)
+        form = {'project': self.project.id, 'title': 'Admin', 'status': 'TODO', 'assignee_email': 'a@x.test',
+                'description': '', 'due_date_0': '', 'due_date_1': ''}
+        self.assertEqual(self.client.post('/admin/core/task/add/', form).status_code, 302)
+        task = Task.objects.get(title='Admin')
+        self.assertCounters(1, 1, 0, 0)
+        self.client.post(f'/admin/core/task/{task.id}/change/', {**form, 'status': 'IN_PROGRESS'})
+        self.assertCounters(1, 0, 1, 0)
+        self.assertEqual(rollups.stored_rollups(self.org.pk), rollups.count_rollups(self.org.pk))
+        self.assertTrue(Change.objects.filter(organization=self.org, kind='task', object_id=task.id).exists())
+        self.client.post(f'/admin/core/task/{task.id}/delete/', {'post': 'yes'})
+        self.assertFalse(Task.objects.exists())
+        self.assertCounters(0, 0, 0, 0)
+        self.assertTrue(Change.objects.get(organization=self.org, kind='task', object_id=task.id).deleted)
+
+    def test_counters_never_drop_below_zero(self):
+        Project.objects.filter(pk=self.project.pk).update(task_count=0, todo_count=0)
+        counters.adjust_task_counters(self.project.pk, {'TODO': -1})
+        self.assertCounters(0, 0, 0, 0)
+
+    def test_rebuild_command_verifies_and_repairs_drift(self):
+        # bulk_create bypasses the counters, like writes from outside the app.
+        Task.objects.bulk_create([Task(project=self.project, title='Untracked', status='DONE')])
+        with self.assertRaises(CommandError):
+            call_command('rebuild_project_counters', '--verify', stdout=StringIO())
+        self.assertCounters(0, 0, 0, 0)
+
+        call_command('rebuild_project_counters', stdout=StringIO())
+        self.assertCounters(1, 0, 0, 1)
+        call_command('rebuild_project_counters', '--verify', stdout=StringIO())
+
+
+class QueryPlannerTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(organization=self.org, name='P1', description='long text')
+        task = Task.objects.create(project=self.project, title='T1')
+        TaskComment.objects.create(task=task, content='c1', author_email='a@x.test')
+        TaskComment.objects.create(task=task, content='c2', author_email='a@x.test')
+
+    def run_query(self, query):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.post(query)
+        data = res.json()
+        self.assertNotIn('errors', data)
+        # Drop the middleware's organization lookup.
+        return data['data'], [q['sql'] for q in ctx.captured_queries[1:]]
+
+    def test_loads_only_selected_columns_and_relations(self):
+        data, queries = self.run_query('{ projects { edges { node { name } } } }')
+        self.assertEqual(data['projects']['edges'], [{'node': {'name': 'P1'}}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0])
+        self.assertNotIn('core_task', queries[0])
+
+    def test_task_query_pages_its_comments(self):
+        task_id = Task.objects.get(title='T1').id
+        query = '{ task(id: %d) { title comments(first: 1%s) { edges { node { content } } pageInfo { hasNextPage endCursor } } } }'
+        data, queries = self.run_query(query % (task_id, ''))
+        comments = data['task']['comments']
+        self.assertEqual((data['task']['title'], comments['edges']), ('T1', [{'node': {'content': 'c1'}}]))
+        self.assertEqual(len(queries), 2)
+        data, _ = self.run_query(query % (task_id, ', after: "%s"' % comments['pageInfo']['endCursor']))
+        self.assertEqual(data['task']['comments']['edges'], [{'node': {'content': 'c2'}}])
+        self.assertFalse(data['task']['comments']['pageInfo']['hasNextPage'])
+
+        data = self.gql(
+            'query($after: String) { task(id: %d) { comments(first: 1, after: $after) { edges { node { content } } } } }' % task_id
+        )
+        self.assertEqual(data['task']['comments']['edges'], [{'node': {'content': 'c1'}}])
+
+        other = self.create_org('other')
+        res = self.post('{ task(id: %d) { title } }' % task_id, slug=other.slug)
+        self.assertEqual(res.json()['errors'][0]['message'], 'Task not found')
+
+    def test_prefetches_and_annotates_requested_fields(self):
+        query = '{ tasks(projectId: %d) { edges { node { title commentCount ...C } } } } fragment C on TaskType { comments { edges { node { content } } } }'
+        data, queries = self.run_query(query % self.project.id)
+        self.assertEqual(data['tasks']['edges'], [{'node': {
+            'title': 'T1',
+            'commentCount': 2,
+            'comments': {'edges': [{'node': {'content': 'c1'}}, {'node': {'content': 'c2'}}]},
+        }}])
+        self.assertEqual(len(queries), 3)
+        self.assertIn('COUNT', queries[1])
+
+
+class KeysetPaginationTests(OrganizationTestCase):
+    PAGE_QUERY = """
+        query Page($projectId: ID!, $after: String) {
+          tasks(projectId: $projectId, first: 2, after: $after) {
+            edges { cursor node { title comments(first: 1) { edges { node { content } } pageInfo { hasNextPage } } } }
+            pageInfo { hasNextPage endCursor }
+          }
+        }
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(organization=self.org, name='P1')
+        for i in range(5):
+            task = Task.objects.create(project=self.project, title=f'T{i}')
+            for j in range(i % 3):
+                TaskComment.objects.create(task=task, content=f'c{i}.{j}', author_email='a@x.test')
+
+    def fetch(self, after=None):
+        return self.gql(self.PAGE_QUERY, {'projectId': self.project.id, 'after': after})['tasks']
+
+    def test_walks_all_pages_in_creation_order(self):
+        titles, after, pages = [], None, 0
+        while True:
+            page = self.fetch(after)
+            pages += 1
+            titles += [edge['node']['title'] for edge in page['edges']]
+            if not page['pageInfo']['hasNextPage']:
+                break
+            after = page['pageInfo']['endCursor']
+        self.assertEqual(titles, ['T0', 'T1', 'T2', 'T3', 'T4'])
+        self.assertEqual(pages, 3)
+
+    def test_nested_pages_are_limited_per_parent(self):
+        nodes = [edge['node'] for edge in self.fetch()['edges']]
+        self.assertEqual(nodes[0]['comments'], {'edges': [], 'pageInfo': {'hasNextPage': False}})
+        self.assertEqual(nodes[1]['comments'], {'edges': [{'node': {'content': 'c1.0'}}], 'pageInfo': {'hasNextPage': False}})
+
+        page = self.fetch(self.fetch()['pageInfo']['endCursor'])
+        self.assertEqual(page['edges'][0]['node']['comments']['pageInfo'], {'hasNextPage': True})
+
+    def test_rejects_malformed_cursor(self):
+        res = self.post(self.PAGE_QUERY, {'projectId': self.project.id, 'after': 'bogus'})
+        self.assertEqual(res.json()['errors'][0]['message'], 'Invalid cursor')
+
+
+class OrganizationCacheTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        Project.objects.create(organization=self.org, name='P1')
+
+    def test_repeated_requests_skip_the_organization_query(self):
+        self.post('{ projects { edges { node { name } } } }')
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.post('{ projects { edges { node { name } } } }')
+        self.assertContains(res, 'P1')
+        self.assertFalse(any('core_organization' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(organization_cache.stats(), {'hits': 1, 'misses': 1, 'size': 1})
+
+    def test_update_and_delete_invalidate_cached_slug(self):
+        self.post('{ projects { edges { node { name } } } }')
+        self.post('mutation { updateOrganization(id: %d, slug: "renamed") { organization { slug } } }' % self.org.id)
+        self.assertContains(self.post('{ projects { edges { node { name } } } }', slug='renamed'), 'P1')
+        self.assertContains(self.post('{ projects { edges { node { name } } } }'), 'Organization not resolved')
+
+        self.post('mutation { deleteOrganization(id: %d) { success } }' % self.org.id)
+        self.assertContains(self.post('{ projects { edges { node { name } } } }', slug='renamed'), 'Organization not resolved')
+
+    @override_settings(
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+            'orgs': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'orgs'},
+        },
+        ORG_CACHE_INVALIDATION_CHANNEL='orgs',
+        ORG_CACHE_POLL_INTERVAL=60,
+    )
+    def test_invalidation_channel_is_polled_once_per_interval(self):
+        self.assertEqual(organization_cache.get('org'), None)
+        organization_cache.set('org', self.org)
+        caches['orgs'].set(GENERATION_KEY, 5)  # another process invalidated
+        self.assertEqual(async_to_sync(organization_cache.aget)('org'), self.org)
+
+        organization_cache._next_poll = 0  # the interval elapsed
+        self.assertEqual(async_to_sync(organization_cache.aget)('org'), None)
+
+    def test_admin_paths_skip_the_lookup(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/admin/login/', HTTP_X_ORG_SLUG='org')
+        self.assertFalse(any('core_organization' in q['sql'] for q in ctx.captured_queries))
+        self.assertEqual(organization_cache.stats()['misses'], 0)
+
+
+class PersistedQueryTests(OrganizationTestCase):
+    QUERY = '{ projects { edges { node { name } } } }'
+
+    def setUp(self):
+        super().setUp()
+        Project.objects.create(organization=self.org, name='P1')
+        document_cache.clear()
+        persisted_queries.reload()
+        self.addCleanup(persisted_queries.reload)
+
+    def apq(self, digest, query=None):
+        """The response to an automatic persisted query request for ``digest``."""
+        body = {'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': digest}}}
+        if query:
+            body['query'] = query
+        return self.post_json(body).json()
+
+    def test_documents_are_parsed_once(self):
+        with mock.patch('pmtool.documents.parse', wraps=parse) as parse_mock:
+            for _ in range(3):
+                self.gql(self.QUERY)
+        self.assertEqual(parse_mock.call_count, 1)
+
+    def test_automatic_persisted_query_round_trip(self):
+        digest = query_hash(self.QUERY)
+        self.assertEqual(self.apq(digest)['errors'][0]['message'], 'PersistedQueryNotFound')
+        self.assertIn('P1', json.dumps(self.apq(digest, self.QUERY)))
+        self.assertIn('P1', json.dumps(self.apq(digest)))
+
+    def test_trusted_only_mode_uses_extracted_registry(self):
+        with tempfile.TemporaryDirectory() as source:
+            with open(os.path.join(source, 'queries.ts'), 'w') as f:
+                f.write('export const Q = gql`query Names { projects { edges { node { name } } } }`')
+            registry = os.path.join(source, 'registry.json')
+            call_command('extract_persisted_queries', source=source, output=registry, stdout=StringIO())
+            with open(registry) as f:
+                (digest, query), = json.load(f).items()
+            self.assertIn('__typename', query)
+
+            with override_settings(GRAPHQL_PERSISTED_QUERIES_ONLY=True, GRAPHQL_PERSISTED_QUERIES_FILE=registry):
+                persisted_queries.reload()
+                self.assertIn('P1', json.dumps(self.apq(digest)))
+                self.assertEqual(self.post(self.QUERY).json()['errors'][0]['message'], 'PersistedQueryNotAllowed')
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'graphql': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'response-cache-tests'},
+    },
+    GRAPHQL_RESPONSE_CACHE='graphql',
+)
+class ResponseCacheTests(OrganizationTestCase):
+    QUERY = '{ projects { edges { node { name } } } }'
+
+    def setUp(self):
+        super().setUp()
+        Project.objects.create(organization=self.org, name='P1')
+        Project.objects.create(organization=self.create_org('other'), name='P2')
+        response_cache.backend.clear()
+        response_cache.reset_stats()
+
+    def test_repeated_reads_are_served_from_cache_per_organization(self):
+        self.assertEqual(self.post(self.QUERY)['X-GraphQL-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.post(self.QUERY)
+        self.assertEqual(res['X-GraphQL-Cache'], 'HIT')
+        self.assertContains(res, 'P1')
+        self.assertFalse(any('core_project' in q['sql'] for q in ctx.captured_queries))
+
+        res = self.post(self.QUERY, slug='other')
+        self.assertEqual(res['X-GraphQL-Cache'], 'MISS')
+        self.assertContains(res, 'P2')
+        self.assertNotContains(res, 'P1')
+        self.assertEqual(response_cache.stats(), {'hits': 1, 'misses': 2, 'hit_rate': 1 / 3})
+
+    def test_mutations_invalidate_their_organization_only(self):
+        self.post(self.QUERY)
+        self.post(self.QUERY, slug='other')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post('mutation { createProject(name: "New") { project { id } } }')
+
+        res = self.post(self.QUERY)
+        self.assertEqual(res['X-GraphQL-Cache'], 'MISS')
+        self.assertContains(res, 'New')
+        self.assertEqual(self.post(self.QUERY, slug='other')['X-GraphQL-Cache'], 'HIT')
+
+    def test_no_cache_header_bypasses_cache(self):
+        self.post(self.QUERY)
+        res = self.post(self.QUERY, HTTP_CACHE_CONTROL='no-cache')
+        self.assertNotIn('X-GraphQL-Cache', res)
+
+
+class BulkMutationTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(organization=self.org, name='P1')
+        self.foreign_project = Project.objects.create(organization=self.create_org('other'), name='P2')
+
+    def bulk_create(self, tasks):
+        return self.gql(
+            'mutation($tasks: [TaskInput!]!) { bulkCreateTasks(tasks: $tasks) { tasks { id title status } errors { index message } } }',
+            {'tasks': tasks},
+        )['bulkCreateTasks']
+
+    def test_bulk_create_writes_valid_items_in_one_insert(self):
+        tasks = [{'projectId': self.project.id, 'title': f'Task {i}'} for i in range(20)]
+        tasks[3] = {'projectId': self.project.id, 'title': 'x'}
+        tasks[7] = {'projectId': self.foreign_project.id, 'title': 'Elsewhere'}
+        with CaptureQueriesContext(connection) as ctx:
+            result = self.bulk_create(tasks)
+        inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "core_task"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(len(result['tasks']), 18)
+        self.assertEqual(result['errors'], [
+            {'index': 3, 'message': 'Task title must be at least 2 characters long'},
+            {'index': 7, 'message': 'Project not found'},
+        ])
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.task_count, self.project.todo_count), (18, 18))
+
+    def test_bulk_update_moves_tasks_and_counters(self):
+        ids = [task['id'] for task in self.bulk_create(
+            [{'projectId': self.project.id, 'title': f'Task {i}'} for i in range(5)]
+        )['tasks']]
+        result = self.gql(
+            'mutation($tasks: [TaskUpdateInput!]!) { bulkUpdateTasks(tasks: $tasks) { tasks { status } errors { index message } } }',
+            {'tasks': [{'id': task_id, 'status': 'DONE'} for task_id in ids[:3]] + [{'id': '999999', 'status': 'DONE'}]},
+        )['bulkUpdateTasks']
+        self.assertEqual(result['tasks'], [{'status': 'DONE'}] * 3)
+        self.assertEqual(result['errors'], [{'index': 3, 'message': 'Task not found'}])
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.task_count, self.project.todo_count, self.project.done_count), (5, 2, 3))
+
+    def test_bulk_add_comments(self):
+        task_id = self.bulk_create([{'projectId': self.project.id, 'title': 'Task'}])['tasks'][0]['id']
+        result = self.gql(
+            'mutation($comments: [TaskCommentInput!]!) { bulkAddComments(comments: $comments) { comments { content } errors { index message } } }',
+            {'comments': [
+                {'taskId': task_id, 'content': 'one', 'authorEmail': 'a@x.test'},
+                {'taskId': task_id, 'content': ' ', 'authorEmail': 'a@x.test'},
+                {'taskId': task_id, 'content': 'two', 'authorEmail': 'a@x.test'},
+            ]},
+        )['bulkAddComments']
+        self.assertEqual(result['comments'], [{'content': 'one'}, {'content': 'two'}])
+        self.assertEqual(result['errors'], [{'index': 1, 'message': 'Comment content cannot be empty'}])
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTests(OrganizationTestCase):
+    query = '{ projects { edges { node { name taskCount tasks { edges { node { title commentCount comments { edges { node { content } } } } } } } } } }'
+
+    def setUp(self):
+        super().setUp()
+        Project.objects.create(organization=self.create_org('other'), name='Hidden')
+        for p in range(3):
+            project = Project.objects.create(organization=self.org, name=f'P{p}')
+            for t in range(2):
+                task = Task.objects.create(project=project, title=f'T{p}{t}')
+                TaskComment.objects.create(task=task, content=f'C{p}{t}', author_email='a@x.test')
+
+    def post_async(self, query):
+        return self.post_json_async({'query': query}).json()
+
+    def test_queries_match_sync_view_with_same_query_count(self):
+        with override_settings(ROOT_URLCONF='pmtool.urls'):
+            expected = self.post(self.query).json()
+        with self.assertNumQueries(3):
+            data = self.post_async(self.query)
+        self.assertEqual(data, expected)
+        self.assertEqual(len(data['data']['projects']['edges']), 3)
+
+    @override_settings(GRAPHQL_TRACING=True)
+    def test_persistent_connections_fail_the_async_check(self):
+        with mock.patch.dict(settings.DATABASES['default'], CONN_MAX_AGE=60):
+            self.assertEqual(checks.check_async_connections(None), [])
+            with override_settings(GRAPHQL_ASYNC=True):
+                self.assertEqual([error.id for error in checks.check_async_connections(None)], ['pmtool.E002'])
+        with override_settings(GRAPHQL_ASYNC=True):
+            self.assertEqual(checks.check_async_connections(None), [])
+
+    def test_tracing_follows_awaited_resolvers(self):
+        tracing = self.post_json_async({'query': self.query}, headers={'X-GraphQL-Trace': '1'}).json()['extensions']['tracing']
+        fields = {field['path']: field for field in tracing['fields']}
+        self.assertEqual(fields['projects']['sqlCount'], 3)
+        self.assertEqual(tracing['phases']['organization']['sqlCount'], 1)
+
+    def test_errors_and_mutations(self):
+        data = self.post_async('{ project(id: 999999) { name } }')
+        self.assertEqual(data['errors'][0]['message'], 'Project not found')
+        data = self.post_async('mutation { createProject(name: "Async") { project { name taskCount } } }')
+        self.assertEqual(data['data']['createProject']['project'], {'name': 'Async', 'taskCount': 0})
+        self.assertTrue(Project.objects.filter(organization=self.org, name='Async').exists())
+
+    def test_async_loaders_batch_loads_of_one_tick(self):
+        project_ids = list(Project.objects.filter(organization=self.org).values_list('id', flat=True))
+
+        async def load():
+            loader = Loaders(is_async=True).page(Task, 'project', None, None)
+            return await loader.load_many(project_ids)
+
+        with self.assertNumQueries(1):
+            pages = async_to_sync(load)()
+        self.assertEqual([[t.title for t in page] for page in pages], [[f'T{p}0', f'T{p}1'] for p in range(3)])
+
+
+class QueryCostTests(OrganizationTestCase):
+    query = '{ projects(first: 10) { edges { node { tasks(first: 5) { edges { node { title } } } } } } }'
+
+    def setUp(self):
+        super().setUp()
+        self.other = self.create_org('other')
+        Project.objects.create(organization=self.org, name='P1')
+        caches['default'].clear()
+
+    def test_cost_multiplies_pages_and_is_reported(self):
+        data = self.post(self.query).json()
+        self.assertNotIn('errors', data)
+        self.assertEqual(data['extensions']['cost']['requested'], 10 + 10 * 5)
+        self.assertEqual(data['extensions']['cost']['depth'], 7)
+
+        query = '''query($n: Int) { projects(first: $n) { ...Page } }
+            fragment Page on ProjectConnection { edges { node { tasks { edges { node { id } } } } } }'''
+        data = self.post(query, {'n': 4}).json()
+        self.assertEqual(data['extensions']['cost']['requested'], 4 + 4 * 50)
+
+    @override_settings(GRAPHQL_MAX_QUERY_COST=50, GRAPHQL_MAX_QUERY_DEPTH=6)
+    def test_rejects_operations_over_the_limits(self):
+        res = self.post(self.query)
+        self.assertEqual(res.status_code, 400)
+        data = res.json()
+        self.assertNotIn('data', data)
+        self.assertEqual(
+            [e['extensions']['code'] for e in data['errors']], ['QUERY_TOO_COSTLY', 'QUERY_TOO_DEEP']
+        )
+
+    def test_organization_budget_throttles(self):
+        self.org.query_cost_budget = 100
+        self.org.save()
+        first = self.post(self.query)
+        self.assertEqual(first.json()['extensions']['cost']['budget']['remaining'], 40)
+        second = self.post(self.query)
+        self.assertEqual(second.status_code, 429)
+        self.assertIn('Retry-After', second)
+        self.assertIn('budget', second.json()['errors'][0]['message'])
+        self.assertEqual(self.post(self.query, slug='other').status_code, 200)
+
+
+class TracingTests(OrganizationTestCase):
+    query = 'query Board { projects { edges { node { name completionRate tasks { edges { node { title } } } } } } }'
+
+    def setUp(self):
+        super().setUp()
+        for p in range(2):
+            project = Project.objects.create(organization=self.org, name=f'P{p}')
+            Task.objects.create(project=project, title=f'T{p}')
+
+    def board(self, **headers):
+        return self.post(self.query, **headers).json()
+
+    @override_settings(GRAPHQL_TRACING=True)
+    def test_tracing_extension_attributes_sql_to_phases_and_fields(self):
+        self.assertNotIn('tracing', self.board().get('extensions', {}))
+        organization_cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            tracing = self.board(HTTP_X_GRAPHQL_TRACE='1')['extensions']['tracing']
+        self.assertEqual(tracing['sqlCount'], len(ctx.captured_queries))
+        self.assertEqual(set(tracing['phases']), {'organization', 'parse', 'execute'})
+        self.assertEqual(tracing['phases']['organization']['sqlCount'], 1)
+        fields = {field['path']: field for field in tracing['fields']}
+        self.assertEqual(fields['projects']['sqlCount'], 2)  # projects, prefetched tasks
+        self.assertEqual(fields['projects.edges.node.completionRate']['calls'], 2)
+        self.assertEqual(fields['projects.edges.node.completionRate']['sqlCount'], 0)
+
+    @override_settings(GRAPHQL_TRACING=False)
+    def test_header_is_ignored_when_tracing_is_off(self):
+        self.assertNotIn('tracing', self.board(HTTP_X_GRAPHQL_TRACE='1').get('extensions', {}))
+
+    @override_settings(GRAPHQL_SLOW_OPERATION_MS=1)
+    def test_slow_operations_are_logged_with_phases_without_timing_resolvers(self):
+        with mock.patch.object(TracingMiddleware, 'resolve') as resolve, \
+                self.assertLogs('pmtool.slow_operations', 'WARNING') as logs:
+            self.board()
+        resolve.assert_not_called()
+        self.assertIn('Slow GraphQL operation Board org=org', logs.output[0])
+        self.assertIn('phases: organization ', logs.output[0])
+        self.assertIn('execute ', logs.output[0])
+
+    @override_settings(GRAPHQL_SLOW_OPERATION_MS=1, GRAPHQL_SLOW_OPERATION_FIELDS=True)
+    def test_slow_operations_are_logged_with_top_fields_on_request(self):
+        with self.assertLogs('pmtool.slow_operations', 'WARNING') as logs:
+            self.board()
+        self.assertIn('top: projects ', logs.output[0])
+
+
+class BenchmarkOperationsTests(TestCase):
+    def run_benchmark(self, *args):
+        out = StringIO()
+        call_command('benchmark_operations', '--sizes', '4,25', '--iterations', '2', *args, stdout=out)
+        return out.getvalue()
+
+    def test_replays_frontend_operations_without_query_growth(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            output = self.run_benchmark('--baseline', baseline, '--update-baseline')
+            self.assertIn('GetProjects', output)
+            self.assertIn('UpdateTask', output)
+            self.assertNotIn('DeleteOrganization', output)
+            with open(baseline) as f:
+                recorded = json.load(f)
+            self.assertEqual(recorded['GetTasks']['4']['queries'], recorded['GetTasks']['25']['queries'])
+            self.assertEqual(Task.objects.filter(project__organization__slug='bench-25').count(), 25)
+
+            recorded['GetProjects']['25']['queries'] -= 1
+            with open(baseline, 'w') as f:
+                json.dump(recorded, f)
+            with self.assertRaisesMessage(CommandError, 'GetProjects (25 tasks)'):
+                self.run_benchmark('--baseline', baseline)
+            with self.assertRaisesMessage(CommandError, 'No baseline at'):
+                self.run_benchmark('--baseline', os.path.join(directory, 'missing.json'))
+
+
+class GenerateDatasetTests(TestCase):
+    def generate(self, prefix, seed=7):
+        call_command(
+            'generate_dataset', '--orgs', '3', '--projects', '12', '--tasks', '300', '--comments', '600',
+            '--seed', str(seed), '--prefix', prefix, '--batch-size', '50', stdout=StringIO(),
+        )
+        return list(
+            Task.objects.filter(project__organization__slug__startswith=f'{prefix}-')
+            .order_by('id')
+            .values_list('project__name', 'title', 'status', 'assignee_email')
+        )
+
+    def test_generates_skewed_reproducible_tenants(self):
+        first = self.generate('gen-a')
+        self.assertEqual(len(first), 300)
+        by_org = [
+            Task.objects.filter(project__organization__slug=f'gen-a-{i}').count() for i in (1, 2, 3)
+        ]
+        self.assertEqual(sum(by_org), 300)
+        self.assertGreater(by_org[0], by_org[1])
+        self.assertGreater(by_org[1], by_org[2])
+        self.assertTrue(TaskComment.objects.filter(task__project__organization__slug='gen-a-1').exists())
+        for project in Project.objects.filter(organization__slug__startswith='gen-a-'):
+            self.assertEqual(project.task_count, project.tasks.count())
+            self.assertEqual(project.done_count, project.tasks.filter(status='DONE').count())
+
+        self.assertEqual(self.generate('gen-b'), [(p, t, s, a.replace('gen-a-', 'gen-b-')) for p, t, s, a in first])
+        with self.assertRaisesMessage(CommandError, 'gen-a-1'):
+            self.generate('gen-a')
+
+    def test_copy_writes_every_not_null_column(self):
+        cursor = CopyCursor()
+        generator = DatasetGenerator(use_copy=True)
+        with mock.patch.object(connection, 'cursor', return_value=cursor):
+            task_ids = generator.insert(Task, list(generator.task_rows([Project(id=1)], 2, ['a@x.test'])))
+            generator.insert(TaskComment, [{'task_id': task_ids[0], 'content': 'c', 'author_email': 'a@x.test'}])
+        for model, (sql, data) in zip((Task, TaskComment), cursor.copies):
+            columns = re.search(r'\((.*?)\) FROM STDIN', sql).group(1).split(', ')
+            self.assertLessEqual({field.column for field in model._meta.concrete_fields if not field.null}, set(columns))
+            self.assertEqual({len(row) for row in csv.reader(StringIO(data))}, {len(columns)})
+
+
+class CopyCursor:
+    """Stands in for a PostgreSQL cursor in DatasetGenerator.insert, recording the COPY statements."""
+
+    def __init__(self):
+        self.copies = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, sql, params):
+        self.count = params[1]
+
+    def fetchall(self):
+        return [(i + 1,) for i in range(self.count)]
+
+    def copy_expert(self, sql, buffer):
+        self.copies.append((sql, buffer.getvalue()))
+
+
+class SearchTasksTests(OrganizationTestCase):
+    QUERY = 'query($q: String!, $first: Int, $after: String) { searchTasks(query: $q, first: $first, after: $after) { edges { node { title commentCount } } pageInfo { hasNextPage endCursor } } }'
+
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(organization=self.org, name='P1')
+        other = Project.objects.create(organization=self.create_org('other'), name='P2')
+        Task.objects.create(project=other, title='Invoice export')
+
+    def search(self, q, **variables):
+        return self.post(self.QUERY, {'q': q, **variables}).json()
+
+    def titles(self, q, **variables):
+        return [edge['node']['title'] for edge in self.search(q, **variables)['data']['searchTasks']['edges']]
+
+    def test_ranks_title_description_and_comment_matches(self):
+        in_comment = Task.objects.create(project=self.project, title='Weekly sync')
+        Task.objects.create(project=self.project, title='Billing page', description='Check the invoice totals')
+        Task.objects.create(project=self.project, title='Invoice exports')
+        TaskComment.objects.create(task=in_comment, content='Talked about invoices', author_email='a@x.test')
+
+        self.assertEqual(self.titles('invoice'), ['Invoice exports', 'Billing page', 'Weekly sync'])
+        self.assertEqual(self.titles('invoice billing'), ['Billing page'])
+
+        first = self.search('invoice', first=2)['data']['searchTasks']
+        self.assertTrue(first['pageInfo']['hasNextPage'])
+        self.assertEqual(self.titles('invoice', first=2, after=first['pageInfo']['endCursor']), ['Weekly sync'])
+
+    def test_pages_through_tied_ranks(self):
+        for n in range(5):
+            Task.objects.create(project=self.project, title=f'Invoice {n}')
+        titles, after = [], None
+        while True:
+            page = self.search('invoice', first=2, after=after)['data']['searchTasks']
+            titles += [edge['node']['title'] for edge in page['edges']]
+            if not page['pageInfo']['hasNextPage']:
+                break
+            after = page['pageInfo']['endCursor']
+        self.assertEqual(titles, [f'Invoice {n}' for n in reversed(range(5))])
+
+    def test_index_follows_writes(self):
+        task = Task.objects.create(project=self.project, title='Draft roadmap')
+        self.assertEqual(self.titles('roadmap'), ['Draft roadmap'])
+        task.title = 'Draft budget'
+        task.save()
+        self.assertEqual(self.titles('roadmap'), [])
+        comment = TaskComment.objects.create(task=task, content='See the roadmap', author_email='a@x.test')
+        self.assertEqual(self.titles('roadmap'), ['Draft budget'])
+        comment.delete()
+        self.assertEqual(self.titles('roadmap'), [])
+        task.delete()
+        self.assertEqual(self.titles('budget'), [])
+
+    def test_empty_query_is_rejected(self):
+        self.assertEqual(self.search('  ')['errors'][0]['message'], 'Search query cannot be empty')
+
+
+class SubscriptionTests(OrganizationTestCase):
+    TASK_CHANGED = 'subscription($projectId: ID!) { taskChanged(projectId: $projectId) { title status commentCount } }'
+
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(organization=self.org, name='P1')
+
+    def create_task(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.gql('mutation { createTask(projectId: %d, title: "%s") { task { id } } }' % (self.project.id, title))
+
+    async def connect(self, slug='org'):
+        socket = ApplicationCommunicator(graphql_websocket, {
+            'type': 'websocket', 'path': '/graphql/', 'subprotocols': ['graphql-transport-ws'],
+        })
+        await socket.send_input({'type': 'websocket.connect'})
+        self.assertEqual((await socket.receive_output(1))['subprotocol'], 'graphql-transport-ws')
+        await self.send(socket, {'type': 'connection_init', 'payload': {'X-Org-Slug': slug}})
+        self.assertEqual(await self.receive(socket), {'type': 'connection_ack'})
+        return socket
+
+    async def send(self, socket, message):
+        await socket.send_input({'type': 'websocket.receive', 'text': json.dumps(message)})
+
+    async def receive(self, socket):
+        return json.loads((await socket.receive_output(2))['text'])
+
+    def test_task_changes_reach_subscribers_after_commit(self):
+        async def scenario():
+            socket = await self.connect()
+            await self.send(socket, {'id': '1', 'type': 'subscribe', 'payload': {
+                'query': self.TASK_CHANGED, 'variables': {'projectId': str(self.project.id)},
+            }})
+            channel = task_channel(self.project.id)
+            while not get_broker().has_subscribers(channel):
+                await asyncio.sleep(0.01)
+
+            await sync_to_async(self.create_task)('Live task')
+            self.assertEqual(await self.receive(socket), {'id': '1', 'type': 'next', 'payload': {
+                'data': {'taskChanged': {'title': 'Live task', 'status': 'TODO', 'commentCount': 0}},
+            }})
+
+            await self.send(socket, {'id': '1', 'type': 'complete'})
+            while get_broker().has_subscribers(channel):
+                await asyncio.sleep(0.01)
+            await socket.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await socket.wait(1)
+
+        async_to_sync(scenario)()
+
+    def test_subscriptions_are_scoped_to_the_organization(self):
+        self.create_org('other')
+
+        async def scenario():
+            socket = await self.connect('other')
+            await self.send(socket, {'id': '1', 'type': 'subscribe', 'payload': {
+                'query': self.TASK_CHANGED, 'variables': {'projectId': str(self.project.id)},
+            }})
+            message = await self.receive(socket)
+            self.assertEqual((message['type'], message['payload'][0]['message']), ('error', 'Project not found'))
+
+            await self.send(socket, {'id': '2', 'type': 'subscribe', 'payload': {'query': '{ projects { edges { node { id } } } }'}})
+            self.assertEqual((await self.receive(socket))['payload'][0]['message'], 'Only subscriptions are served over WebSocket')
+            await socket.send_input({'type': 'websocket.disconnect', 'code': 1000})
+            await socket.wait(1)
+
+        async_to_sync(scenario)()
+
+    def test_http_rejects_subscriptions(self):
+        res = self.post(self.TASK_CHANGED, {'projectId': 1})
+        self.assertEqual(res.json()['errors'][0]['message'], 'Subscriptions are served over WebSocket at /graphql/')
+
+
+class DeltaSyncTests(OrganizationTestCase):
+    CHANGES = '''query($cursor: String, $first: Int) { changesSince(cursor: $cursor, first: $first) {
+        cursor hasMore projects { name taskCount } tasks { title status projectId updatedAt }
+        comments { content taskId } deleted { kind id } } }'''
+
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(organization=self.org, name='P1')
+        self.other_project = Project.objects.create(organization=self.create_org('other'), name='P2')
+
+    def changes(self, cursor=None, first=None, slug='org'):
+        return self.gql(self.CHANGES, {'cursor': cursor, 'first': first}, slug)['changesSince']
+
+    def test_returns_only_rows_changed_after_the_cursor(self):
+        cursor = self.changes()['cursor']
+        self.assertEqual(self.changes(cursor)['tasks'], [])
+        task_id = self.gql('mutation($p: ID!) { createTask(projectId: $p, title: "Ship") { task { id } } }',
+                           {'p': self.project.id})['createTask']['task']['id']
+        self.gql('mutation($p: ID!) { createTask(projectId: $p, title: "Elsewhere") { task { id } } }',
+                 {'p': self.other_project.id}, slug='other')
+
+        changes = self.changes(cursor)
+        self.assertEqual(changes['projects'], [{'name': 'P1', 'taskCount': 1}])
+        self.assertEqual([(t['title'], t['projectId']) for t in changes['tasks']], [('Ship', str(self.project.id))])
+        cursor = changes['cursor']
+        self.assertEqual(self.changes(cursor)['tasks'], [])
+
+        self.gql('mutation($t: [TaskUpdateInput!]!) { bulkUpdateTasks(tasks: $t) { tasks { id } } }',
+                 {'t': [{'id': task_id, 'status': 'DONE'}]})
+        self.gql('mutation($t: ID!) { addTaskComment(taskId: $t, content: "Done", authorEmail: "a@x.test") { comment { id } } }',
+                 {'t': task_id})
+        first = self.changes(cursor, first=2)
+        self.assertTrue(first['hasMore'])
+        rest = self.changes(first['cursor'])
+        self.assertFalse(rest['hasMore'])
+        self.assertEqual([t['status'] for t in first['tasks'] + rest['tasks']], ['DONE'])
+        self.assertEqual(len(first['projects'] + rest['projects']), 1)
+        self.assertEqual(first['comments'] + rest['comments'], [{'content': 'Done', 'taskId': task_id}])
+        self.assertGreater(Task.objects.get(pk=task_id).updated_at, Task.objects.get(pk=task_id).created_at)
+
+    def test_organization_edits_keep_the_sync_version(self):
+        stale = Organization.objects.get(pk=self.org.pk)
+        self.gql('mutation($p: ID!) { createTask(projectId: $p, title: "New") { task { id } } }', {'p': self.project.id})
+        version = Organization.objects.get(pk=self.org.pk).sync_version
+        with mock.patch.object(Organization.objects, 'get', return_value=stale):
+            self.gql('mutation($id: ID!) { updateOrganization(id: $id, name: "Renamed") { organization { name } } }',
+                     {'id': self.org.id})
+        self.org.refresh_from_db()
+        self.assertEqual((self.org.name, self.org.sync_version), ('Renamed', version))
+
+    def test_deletes_leave_tombstones_for_the_deleted_row_only(self):
+        task = Task.objects.create(project=self.project, title='Old')
+        TaskComment.objects.create(task=task, content='Note', author_email='a@x.test')
+        cursor = self.changes()['cursor']
+        task_id = task.id
+        task.delete()
+
+        changes = self.changes(cursor)
+        self.assertEqual(changes['deleted'], [{'kind': 'task', 'id': str(task_id)}])
+        self.assertEqual(changes['projects'], [{'name': 'P1', 'taskCount': 0}])
+        self.assertEqual(self.changes(cursor, slug='other')['deleted'], [])
+
+
+class ExportTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        Task.objects.create(project=Project.objects.create(organization=self.create_org('other'), name='Hidden'),
+                            title='Hidden')
+        self.project = Project.objects.create(organization=self.org, name='P1')
+        self.tasks = [Task.objects.create(project=self.project, title=f'T{i}, "quoted"') for i in range(5)]
+        TaskComment.objects.create(task=self.tasks[0], content='Line\nbreak', author_email='a@x.test')
+
+    def get(self, **params):
+        return self.client.get('/export/', params, HTTP_X_ORG_SLUG='org')
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_streams_ndjson_of_the_organization(self):
+        res = self.get()
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        records = [json.loads(line) for line in b''.join(res.streaming_content).decode().splitlines()]
+        self.assertEqual([r['type'] for r in records], ['project'] + ['task'] * 5 + ['comment'])
+        self.assertEqual(records[1]['project_id'], self.project.id)
+        self.assertEqual(records[-1]['content'], 'Line\nbreak')
+
+    def test_gzipped_csv_and_invalid_parameters(self):
+        res = self.get(format='csv', include='tasks', gzip='1')
+        self.assertEqual(res['Content-Disposition'], 'attachment; filename="org.csv.gz"')
+        rows = list(csv.reader(gzip.decompress(b''.join(res.streaming_content)).decode().splitlines()))
+        self.assertEqual(rows[0][:3], ['id', 'project_id', 'title'])
+        self.assertEqual([row[2] for row in rows[1:]], [task.title for task in self.tasks])
+
+        self.assertEqual(self.get(format='csv', include='tasks,comments').status_code, 400)
+        self.assertEqual(self.get(format='xml').status_code, 400)
+        self.assertEqual(self.client.get('/export/').status_code, 400)
+
+
+class ImportTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(organization=self.org, name='P1')
+        other = Project.objects.create(organization=self.create_org('other'), name='P2')
+        self.foreign = Task.objects.create(project=other, title='Foreign')
+
+    def test_command_imports_ndjson_in_batches_and_reports_rejects(self):
+        lines = [
+            {'type': 'task', 'id': 'a1', 'project': 'Migrated', 'title': 'First', 'status': 'DONE'},
+            {'type': 'task', 'id': 'a2', 'project_id': self.project.id, 'title': 'Second', 'due_date': '2030-01-01T09:00:00'},
+            {'type': 'task', 'id': 'a3', 'project_id': self.project.id, 'title': 'x'},
+            {'type': 'comment', 'task_id': 'a1', 'content': 'Imported', 'author_email': 'a@x.test'},
+            {'type': 'comment', 'task_id': 'a3', 'content': 'Orphan', 'author_email': 'a@x.test'},
+            {'type': 'comment', 'task_id': self.foreign.id, 'content': 'Leak', 'author_email': 'a@x.test'},
+            {'type': 'task', 'project_id': 999999, 'title': 'Lost'},
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as f:
+            f.write('\n'.join(json.dumps(line) for line in lines) + '\nnot json\n')
+        self.addCleanup(os.unlink, f.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_tasks', f.name, org='org', batch_size=2, stdout=out, stderr=err)
+
+        self.assertIn('Imported 2 tasks and 1 comments, rejected 5 line(s)', out.getvalue())
+        self.assertEqual(err.getvalue().splitlines(), [
+            'line 3: Task title must be at least 2 characters long',
+            'line 5: Task not found',
+            'line 6: Task not found',
+            'line 7: Project not found',
+            'line 8: Invalid record',
+        ])
+        migrated = Project.objects.get(organization=self.org, name='Migrated')
+        self.assertEqual((migrated.task_count, migrated.done_count), (1, 1))
+        self.assertEqual(Project.objects.get(pk=self.project.pk).task_count, 1)
+        self.assertEqual(TaskComment.objects.get(content='Imported').task.title, 'First')
+
+    def test_project_created_concurrently_is_reused(self):
+        importer = Importer(self.org)
+        # P1 was created since the importer looked its name up.
+        self.assertEqual(importer.create_project('P1'), (self.project.pk, False))
+        pk, created = importer.create_project('New')
+        self.assertTrue(created)
+        self.assertEqual(Project.objects.get(pk=pk).name, 'New')
+
+    def test_endpoint_streams_progress_for_gzipped_csv(self):
+        body = gzip.compress(b'project_id,title,status,assignee_email\n'
+                             + f'{self.project.id},"Multi\nline",TODO,\n{self.project.id},Bad,LATER,\n'.encode())
+        res = self.client.post('/import/?format=csv&type=tasks&gzip=1', data=body,
+                               content_type='text/csv', HTTP_X_ORG_SLUG='org')
+        events = [json.loads(line) for line in b''.join(res.streaming_content).decode().splitlines()]
+        self.assertEqual(events, [
+            {'line': 4, 'error': 'Invalid status. Must be one of: TODO, IN_PROGRESS, DONE'},
+            {'tasks': 1, 'comments': 0, 'rejected': 1},
+        ])
+        self.assertEqual(Task.objects.get(project=self.project).title, 'Multi\nline')
+
+
+class OrganizationStatsTests(OrganizationTestCase):
+    STATS = '''{ organizationStats { tasksByStatus { status count } projectsByStatus { status count } overdueCount
+        workload { assigneeEmail openCount doneCount } } }'''
+
+    def setUp(self):
+        super().setUp()
+        self.project = Project.objects.create(organization=self.org, name='P1')
+        Project.objects.create(organization=self.org, name='P2', status='ON_HOLD')
+
+    def test_mutations_maintain_rollups(self):
+        past = '2020-01-01T10:00:00+00:00'
+        create = 'mutation($t: [TaskInput!]!) { bulkCreateTasks(tasks: $t) { tasks { id } } }'
+        ids = [t['id'] for t in self.gql(create, {'t': [
+            {'projectId': self.project.id, 'title': 'Late', 'assigneeEmail': 'a@x.test', 'dueDate': past},
+            {'projectId': self.project.id, 'title': 'Later', 'assigneeEmail': 'a@x.test', 'dueDate': past},
+            {'projectId': self.project.id, 'title': 'Free', 'assigneeEmail': 'b@x.test'},
+        ]})['bulkCreateTasks']['tasks']]
+        self.gql('mutation($id: ID!) { updateTask(id: $id, status: "DONE") { task { id } } }', {'id': ids[0]})
+        self.gql('mutation($id: ID!) { updateTask(id: $id, assigneeEmail: "b@x.test") { task { id } } }', {'id': ids[1]})
+        Task.objects.get(pk=ids[2]).delete()
+
+        with self.assertNumQueries(4):
+            stats = self.gql(self.STATS)['organizationStats']
+        self.assertEqual(stats['tasksByStatus'], [
+            {'status': 'TODO', 'count': 1}, {'status': 'IN_PROGRESS', 'count': 0}, {'status': 'DONE', 'count': 1},
+        ])
+        self.assertEqual(stats['projectsByStatus'], [
+            {'status': 'ACTIVE', 'count': 1}, {'status': 'COMPLETED', 'count': 0}, {'status': 'ON_HOLD', 'count': 1},
+        ])
+        self.assertEqual(stats['overdueCount'], 1)
+        self.assertEqual(stats['workload'], [
+            {'assigneeEmail': 'b@x.test', 'openCount': 1, 'doneCount': 0},
+            {'assigneeEmail': 'a@x.test', 'openCount': 0, 'doneCount': 1},
+        ])
+        call_command('rebuild_rollups', verify=True, stdout=StringIO())
+
+    def test_rebuild_command_repairs_drift(self):
+        Task.objects.bulk_create([Task(project=self.project, title='Unseen', assignee_email='a@x.test')])
+        out = StringIO()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', verify=True, stdout=out)
+        self.assertIn('Organization org', out.getvalue())
+        call_command('rebuild_rollups', org='org', stdout=StringIO())
+        call_command('rebuild_rollups', verify=True, stdout=StringIO())
+        self.assertEqual(self.gql(self.STATS)['organizationStats']['workload'][0]['openCount'], 1)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def make_pool(self, **kwargs):
+        return ConnectionPool(lambda conn, idle: not conn.closed, lambda conn: not conn.closed, **kwargs)
+
+    def test_reuses_released_connections_and_waits_when_full(self):
+        pool = self.make_pool(max_size=1, timeout=0.05)
+        first, _ = pool.acquire(FakeConnection)
+        with self.assertRaises(PoolTimeout), self.assertLogs('pmtool.db', 'WARNING'):
+            pool.acquire(FakeConnection)
+        pool.release(first)
+        second, _ = pool.acquire(FakeConnection)
+        self.assertIs(second, first)
+        stats = pool.snapshot()
+        self.assertEqual((stats['opened'], stats['acquired'], stats['timeouts']), (1, 2, 1))
+        self.assertEqual((stats['size'], stats['in_use'], stats['idle']), (1, 1, 0))
+
+    def test_replaces_broken_connections(self):
+        pool = self.make_pool(max_size=1)
+        first, _ = pool.acquire(FakeConnection)
+        pool.release(first)
+        first.closed = True  # dropped by the server while idle
+        second, _ = pool.acquire(FakeConnection)
+        self.assertIsNot(second, first)
+        pool.discard(second)
+        self.assertTrue(second.closed)
+        stats = pool.snapshot()
+        self.assertEqual((stats['opened'], stats['closed'], stats['size']), (2, 2, 0))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        routers.replica_health.reset()
+        self.addCleanup(routers.replica_health.reset)
+        self.project = Project.objects.create(organization=self.org, name='P1')
+
+    def test_queries_read_replica_until_a_write_pins_the_organization(self):
+        seen = []
+
+        def db_for_read(router, model, **hints):
+            seen.append(routers._replica.get())
+
+        query = '{ projects(first: 5) { edges { node { name } } } }'
+        with mock.patch.object(routers.replica_health, 'lag', return_value=0.0), \
+                mock.patch.object(routers.ReplicaRouter, 'db_for_read', db_for_read):
+            self.gql(query)
+            self.assertIn('replica1', seen)
+            seen.clear()
+            self.gql('mutation { createTask(projectId: %d, title: "New") { task { id } } }' % self.project.id)
+            self.gql(query)
+            self.assertEqual(set(seen), {None})
+        self.assertIsNone(routers.choose_replica(self.org.pk))
+        self.assertIsNone(routers.ReplicaRouter().db_for_read(Task))
+
+    def test_lagging_or_unreachable_replicas_fall_back_to_primary(self):
+        router = routers.ReplicaRouter()
+        with mock.patch.object(routers.replica_health, 'lag', return_value=60.0) as lag, \
+                self.assertLogs('pmtool.db', 'WARNING'):
+            self.assertIsNone(routers.choose_replica(self.org.pk))
+            self.assertIsNone(routers.choose_replica(self.org.pk))
+        self.assertEqual(lag.call_count, 1)  # measured once per DB_REPLICA_CHECK_INTERVAL
+        routers.replica_health.reset()
+        with mock.patch.object(routers.replica_health, 'lag', return_value=None), \
+                self.assertLogs('pmtool.db', 'WARNING'):
+            self.assertIsNone(routers.choose_replica(self.org.pk))
+        routers.replica_health.reset()
+        with mock.patch.object(routers.replica_health, 'lag', return_value=1.0):
+            replica = routers.choose_replica(self.org.pk)
+        self.assertEqual(replica, 'replica1')
+        with routers.replica_reads(replica):
+            self.assertIsNone(router.db_for_read(Task))  # inside the test's transaction
+            with mock.patch.object(connection, 'in_atomic_block', False):
+                self.assertEqual(router.db_for_read(Task), 'replica1')
+        self.assertEqual(router.db_for_write(Task), 'default')
+
+    def test_pin_cache_must_be_shared(self):
+        self.assertEqual([error.id for error in checks.check_replica_pin_cache(None)], ['pmtool.E001'])
+        shared = {**settings.CACHES, 'shared': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                                'LOCATION': tempfile.gettempdir()}}
+        with override_settings(CACHES=shared, DB_REPLICA_PIN_CACHE='shared'):
+            self.assertEqual(checks.check_replica_pin_cache(None), [])
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(checks.check_replica_pin_cache(None), [])
+
+
+class BatchRequestTests(OrganizationTestCase):
+    projects = '{ projects { edges { node { name tasks { edges { node { title commentCount } } } } } } }'
+
+    def setUp(self):
+        super().setUp()
+        for p in range(2):
+            project = Project.objects.create(organization=self.org, name=f'P{p}')
+            Task.objects.create(project=project, title=f'T{p}')
+
+    def names(self, result):
+        return [edge['node']['name'] for edge in result['data']['projects']['edges']]
+
+    def test_operations_execute_in_order_with_one_org_lookup(self):
+        batch = [
+            {'query': self.projects},
+            {'query': 'mutation { createProject(name: "New") { project { name } } }'},
+            {'query': self.projects},
+            {'query': '{ nope }'},
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.post_json(batch)
+        results = res.json()
+        self.assertEqual(res.status_code, 400)  # the worst operation's status
+        self.assertEqual(len(results), 4)
+        self.assertEqual(sorted(self.names(results[0])), ['P0', 'P1'])
+        self.assertEqual(results[1]['data']['createProject']['project']['name'], 'New')
+        self.assertEqual(sorted(self.names(results[2])), ['New', 'P0', 'P1'])
+        self.assertIn('errors', results[3])
+        lookups = [q for q in ctx.captured_queries if 'core_organization' in q['sql'] and '"slug"' in q['sql']]
+        self.assertEqual(len(lookups), 1)
+
+        for body in ([], [{'query': self.projects}] * 21, [1]):
+            self.assertEqual(self.post_json(body).status_code, 400)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_unknown_persisted_query_fails_only_its_entry(self):
+        batch = [{'query': self.projects}, {'extensions': {'persistedQuery': {'version': 1, 'sha256Hash': 'f' * 64}}}]
+        for post in (self.post_json, self.post_json_async):
+            res = post(batch)
+            self.assertEqual(res.status_code, 200)
+            found, missing = res.json()
+            self.assertEqual(len(found['data']['projects']['edges']), 2)
+            self.assertEqual(missing['errors'][0]['message'], 'PersistedQueryNotFound')
+
+    def test_async_view_runs_queries_concurrently(self):
+        single = self.post_json_async({'query': self.projects}).json()
+        mutation = {'query': 'mutation { createProject(name: "New") { project { name } } }'}
+        results = self.post_json_async([{'query': self.projects}, mutation, {'query': self.projects}]).json()
+        self.assertEqual(results[0], single)
+        self.assertEqual(sorted(self.names(results[2])), ['New', 'P0', 'P1'])
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_an_http_error_fails_only_its_operation(self):
+        batch = [{'query': self.projects}, {'query': self.projects}, {'variables': {}}]
+        cost = self.post(self.projects).json()['extensions']['cost']['requested']
+        self.org.query_cost_budget = cost  # room for one of the two queries
+        self.org.save()
+
+        for post in (self.post_json, self.post_json_async):
+            caches[settings.GRAPHQL_COST_CACHE].clear()
+            res = post(batch)
+            self.assertEqual(res.status_code, 429)
+            first, second, third = res.json()
+            self.assertEqual(sorted(self.names(first)), ['P0', 'P1'])
+            self.assertIn('budget', second['errors'][0]['message'])
+            self.assertEqual(third['errors'][0]['message'], 'Must provide query string.')
+
+    def test_queries_of_a_batch_share_loaders_until_a_mutation(self):
+        view = AsyncContextGraphQLView()
+        contexts = view.batch_contexts(RequestFactory().post('/graphql/'), [{}] * 4)
+        for context, operation in zip(contexts, ('query', 'query', 'mutation', 'query')):
+            context.graphql_operation = OperationType(operation)
+        first, second, mutation, after = (view.get_context(c, is_async=True).loaders for c in contexts)
+        self.assertIs(second, first)
+        self.assertIsNot(mutation, first)
+        self.assertIsNot(after, first)
+
+
+class DeadlineQueryTests(OrganizationTestCase):
+    QUERY = '''{ overdueTasks(first: 1) { edges { node { title } } pageInfo { hasNextPage endCursor } }
+        upcomingTasks { edges { node { title } } } month: upcomingTasks(withinDays: 31) { edges { node { title } } }
+        overdueProjects { edges { node { name } } } upcomingProjects { edges { node { name } } } }'''
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        today = timezone.localdate()
+        self.project = Project.objects.create(organization=self.org, name='P1', due_date=today + timedelta(days=3))
+        Project.objects.create(organization=self.org, name='Late', due_date=today - timedelta(days=1))
+        Project.objects.create(organization=self.org, name='Shipped', status='COMPLETED',
+                               due_date=today - timedelta(days=1))
+        hidden = Project.objects.create(organization=self.create_org('other'), name='Hidden')
+        for title, days, status in [('Late1', -2, 'TODO'), ('Late2', -1, 'IN_PROGRESS'), ('Closed', -1, 'DONE'),
+                                    ('Soon', 2, 'TODO'), ('Later', 30, 'TODO')]:
+            Task.objects.create(project=self.project, title=title, status=status, due_date=now + timedelta(days=days))
+        Task.objects.create(project=self.project, title='Undated')
+        Task.objects.create(project=hidden, title='Other late', due_date=now - timedelta(days=1))
+
+    def names(self, connection):
+        return [edge['node'].get('title') or edge['node'].get('name') for edge in connection['edges']]
+
+    def test_overdue_and_upcoming_tasks_and_projects(self):
+        data = self.gql(self.QUERY)
+        self.assertEqual(self.names(data['overdueTasks']), ['Late1'])
+        self.assertTrue(data['overdueTasks']['pageInfo']['hasNextPage'])
+        self.assertEqual(self.names(data['upcomingTasks']), ['Soon'])
+        self.assertEqual(self.names(data['month']), ['Soon', 'Later'])
+        self.assertEqual(self.names(data['overdueProjects']), ['Late'])
+        self.assertEqual(self.names(data['upcomingProjects']), ['P1'])
+
+        after = data['overdueTasks']['pageInfo']['endCursor']
+        data = self.gql('{ overdueTasks(after: "%s") { edges { node { title } } } }' % after)
+        self.assertEqual(self.names(data['overdueTasks']), ['Late2'])
+        errors = self.post('{ upcomingTasks(withinDays: 0) { edges { node { title } } } }').json()['errors']
+        self.assertIn('withinDays', errors[0]['message'])
+
+    def test_overdue_tasks_match_the_overdue_count(self):
+        Task.objects.filter(project__organization=self.org).delete()
+        noon = timezone.make_aware(datetime(2030, 6, 15, 12))
+        with mock.patch('django.utils.timezone.now', return_value=noon):
+            Task.objects.create(project=self.project, title='Morning', due_date=noon - timedelta(hours=3))
+            Task.objects.create(project=self.project, title='Yesterday', due_date=noon - timedelta(hours=13))
+            data = self.gql('''{ overdueTasks { edges { node { title } } } upcomingTasks { edges { node { title } } }
+                organizationStats { overdueCount } }''')
+        self.assertEqual(self.names(data['overdueTasks']), ['Yesterday'])
+        self.assertEqual(self.names(data['upcomingTasks']), ['Morning'])
+        self.assertEqual(data['organizationStats']['overdueCount'], 1)
+
+    def test_queries_use_the_partial_indexes(self):
+        for queryset, index in ((deadlines.overdue_tasks(self.org), 'core_task_open_due_idx'),
+                                (deadlines.upcoming_projects(self.org, 7), 'core_project_open_due_idx')):
+            plan = queryset.order_by(*deadlines.DUE_ORDERING).explain()
+            self.assertIn(index, plan)
+
+
+class TasksByAssigneeTests(OrganizationTestCase):
+    QUERY = '''query($email: String!, $status: String, $after: String) {
+        tasksByAssignee(email: $email, status: $status, first: 2, after: $after) {
+            edges { node { title projectId } } pageInfo { hasNextPage endCursor } counts { status count }
+        } }'''
+
+    def setUp(self):
+        super().setUp()
+        other = self.create_org('other')
+        tasks = []
+        for name in ('P1', 'P2'):
+            project = Project.objects.create(organization=self.org, name=name)
+            tasks += [Task(project=project, title=f'{name} {status}', status=status, assignee_email='a@x.test')
+                      for status in ('TODO', 'DONE')]
+        tasks.append(Task(project=project, title='Theirs', assignee_email='b@x.test'))
+        tasks.append(Task(project=Project.objects.create(organization=other, name='P3'), title='Elsewhere',
+                          assignee_email='a@x.test'))
+        for task in tasks:
+            task.save()
+        for org in (self.org, other):
+            rollups.rebuild_rollups(org.pk)
+
+    def tasks_by_assignee(self, **variables):
+        return self.post(self.QUERY, variables).json()
+
+    def test_pages_across_projects_with_counts(self):
+        with self.assertNumQueries(3):  # organization, page, counts
+            page = self.tasks_by_assignee(email='a@x.test')['data']['tasksByAssignee']
+        self.assertEqual([e['node']['title'] for e in page['edges']], ['P1 TODO', 'P1 DONE'])
+        self.assertEqual(page['counts'], [
+            {'status': 'TODO', 'count': 2}, {'status': 'IN_PROGRESS', 'count': 0}, {'status': 'DONE', 'count': 2},
+        ])
+        after = page['pageInfo']['endCursor']
+        page = self.tasks_by_assignee(email='a@x.test', after=after)['data']['tasksByAssignee']
+        self.assertEqual([e['node']['title'] for e in page['edges']], ['P2 TODO', 'P2 DONE'])
+        self.assertFalse(page['pageInfo']['hasNextPage'])
+
+        page = self.tasks_by_assignee(email='a@x.test', status='TODO')['data']['tasksByAssignee']
+        self.assertEqual([e['node']['title'] for e in page['edges']], ['P1 TODO', 'P2 TODO'])
+        self.assertIn('Invalid status', self.tasks_by_assignee(email='a@x.test', status='LATE')['errors'][0]['message'])
+
+    def test_emails_are_stripped_on_write_as_on_read(self):
+        project = Project.objects.get(organization=self.org, name='P1')
+        for mutation in (
+            'mutation { createTask(projectId: %d, title: "Padded", assigneeEmail: " c@x.test ") { task { id } } }',
+            'mutation { bulkCreateTasks(tasks: [{projectId: %d, title: "Bulk", assigneeEmail: "c@x.test  "}]) '
+            '{ tasks { id } } }',
+        ):
+            self.gql(mutation % project.id)
+        page = self.tasks_by_assignee(email=' c@x.test')['data']['tasksByAssignee']
+        self.assertEqual(sorted(e['node']['title'] for e in page['edges']), ['Bulk', 'Padded'])
+        self.assertEqual(page['counts'][0], {'status': 'TODO', 'count': 2})
+
+
+class PurgeOrganizationTests(OrganizationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.other = self.create_org('other')
+        for org in (self.org, self.other):
+            for name in ('P1', 'P2'):
+                project = Project.objects.create(organization=org, name=name)
+                for i in range(3):
+                    task = Task.objects.create(project=project, title=f'{name} task {i}', assignee_email='a@x.test',
+                                               due_date=timezone.now() + timedelta(days=i))
+                    TaskComment.objects.create(task=task, content='note', author_email='a@x.test')
+                    record_changes(org.pk, tasks=[task.pk])
+            rollups.rebuild_rollups(org.pk)
+
+    def test_delete_hides_the_organization_until_purged(self):
+        self.post('{ projects { edges { node { name } } } }')
+        res = self.post('mutation { deleteOrganization(id: %d) { success } }' % self.org.id, slug='other')
+        self.assertTrue(res.json()['data']['deleteOrganization']['success'])
+        self.assertEqual(Task.objects.filter(project__organization=self.org).count(), 6)
+
+        self.assertContains(self.post('{ projects { edges { node { name } } } }'), 'Organization not resolved')
+        names = self.post('{ organizations { slug } }', slug='other').json()['data']['organizations']
+        self.assertEqual(names, [{'slug': 'other'}])
+        res = self.post('mutation { deleteOrganization(id: %d) { success } }' % self.org.id, slug='other')
+        self.assertEqual(res.json()['errors'][0]['message'], 'Organization not found')
+        res = self.post('mutation { createOrganization(name: "Org", slug: "org", contactEmail: "o@x.test") { organization { id } } }', slug='other')
+        self.assertNotIn('errors', res.json())
+        res = self.post('mutation { createOrganization(name: "Org", slug: "deleted~9", contactEmail: "o@x.test") { organization { id } } }', slug='other')
+        self.assertIn('may only contain', res.json()['errors'][0]['message'])
+
+    def test_writes_through_a_stale_cached_organization_fail(self):
+        stale = Organization.objects.get(pk=self.org.pk)
+        purge.mark_deleted(Organization.objects.get(pk=self.org.pk))
+        organization_cache.set('org', stale)  # as another process may still hold it
+        project = Project.objects.filter(organization=self.org).first()
+        res = self.post('mutation { createTask(projectId: %d, title: "Late") { task { id } } }' % project.id)
+        self.assertEqual(res.json()['errors'][0]['message'], 'Organization not found')
+        self.assertFalse(Task.objects.filter(title='Late').exists())
+
+    def test_admin_delete_marks_the_organization(self):
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@x.test', 'pw'))
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(f'/admin/core/organization/{self.org.id}/delete/').status_code, 200)
+        self.assertFalse(any('core_taskcomment' in q['sql'] for q in ctx.captured_queries))
+        self.client.post(f'/admin/core/organization/{self.org.id}/delete/', {'post': 'yes'})
+        self.org.refresh_from_db()
+        self.assertIsNotNone(self.org.deleted_at)
+        self.assertEqual(Task.objects.filter(project__organization=self.org).count(), 6)
+
+    def test_purge_deletes_every_row_in_chunks(self):
+        self.post('mutation { deleteOrganization(id: %d) { success } }' % self.org.id, slug='other')
+        out = StringIO()
+        call_command('purge_organizations', '--status', stdout=out)
+        self.assertIn('Organization %d (Org): deleted' % self.org.pk, out.getvalue())
+
+        out = StringIO()
+        call_command('purge_organizations', chunk_size=2, stdout=out)
+        self.assertIn('2 comments deleted, 2 rows so far', out.getvalue())
+        self.assertIn('Purged organization %d' % self.org.pk, out.getvalue())
+        self.assertFalse(Organization.objects.filter(pk=self.org.pk).exists())
+        for model in (Project, Change, AssigneeRollup, DueDateRollup):
+            self.assertFalse(model.objects.filter(organization=self.org).exists())
+        self.assertFalse(Task.objects.filter(project__organization_id=self.org.pk).exists())
+        self.assertEqual(TaskComment.objects.count(), 6)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT organization_id FROM core_task_search')
+            self.assertEqual({row[0] for row in cursor.fetchall()}, {self.other.pk})
+
+        self.assertEqual(self.post('{ projects { edges { node { name } } } }', slug='other').json()['data']['projects']['edges'],
+                         [{'node': {'name': 'P1'}}, {'node': {'name': 'P2'}}])
+        with self.assertRaises(CommandError):
+            call_command('purge_organizations', org=self.other.pk, stdout=StringIO())
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from pmtool.db.routers import pin_primary
+
+# Scope for data every organization can read, such as the organization list.
+GLOBAL = "global"
+
+
+def _version_cache():
+    alias = getattr(settings, "GRAPHQL_RESPONSE_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def _key(scope):
+    return f"pmtool:data-version:{scope}"
+
+
+def get_data_versions(*scopes):
+    """Current version of each scope, 0 for scopes never written."""
+    cache = _version_cache()
+    if cache is None:
+        return [0] * len(scopes)
+    versions = cache.get_many([_key(scope) for scope in scopes])
+    return [versions.get(_key(scope), 0) for scope in scopes]
+
+
+def bump_data_version(*scopes):
+    """Invalidate cached reads of ``scopes`` once the current transaction commits.
+
+    Bumping earlier would let a concurrent read cache pre-commit rows under
+    the new version. Reads of ``scopes`` also stick to the primary database
+    for a while, until replicas have caught up with the write.
+    """
+    pin_primary(*scopes)
+    cache = _version_cache()
+    if cache is None:
+        return
+
+    def bump():
+        for scope in scopes:
+            key = _key(scope)
+            cache.add(key, 0, timeout=None)
+            cache.incr(key)
+
+    transaction.on_commit(bump)
@@ -1,3 +1,76 @@
-from django.shortcuts import render
+import gzip
+import json
 
-# Create your views here.
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from . import imports
+from .export import FORMATS, KINDS, export_stream, iterate_in_thread
+
+
+@require_GET
+def export_organization(request):
+    """Stream the organization's projects, tasks and comments as NDJSON or CSV.
+
+    ``?format=ndjson`` (the default) writes one JSON object per line with a
+    ``type`` key; ``?format=csv`` writes a single table, so ``include`` must
+    name one kind. ``?include=`` takes a comma-separated subset of projects,
+    tasks and comments, ``?gzip=1`` compresses the download.
+    """
+    organization = getattr(request, "organization", None)
+    if not organization:
+        return HttpResponseBadRequest("Organization not resolved. Provide header 'X-Org-Slug'.")
+
+    export_format = request.GET.get("format", "ndjson")
+    if export_format not in FORMATS:
+        return HttpResponseBadRequest(f"Invalid format. Must be one of: {', '.join(FORMATS)}")
+    default = "tasks" if export_format == "csv" else ",".join(KINDS)
+    kinds = [kind for kind in request.GET.get("include", default).split(",") if kind]
+    if not kinds or any(kind not in KINDS for kind in kinds):
+        return HttpResponseBadRequest(f"Invalid include. Must be a list of: {', '.join(KINDS)}")
+    if export_format == "csv" and len(kinds) > 1:
+        return HttpResponseBadRequest("A CSV export includes one of: projects, tasks, comments")
+    compress = request.GET.get("gzip") in ("1", "true")
+
+    stream = export_stream(organization, export_format, kinds, compress)
+    if isinstance(request, ASGIRequest):
+        stream = iterate_in_thread(stream)
+    filename = f"{organization.slug}.{export_format}" + (".gz" if compress else "")
+    response = StreamingHttpResponse(
+        stream, content_type="application/gzip" if compress else FORMATS[export_format]
+    )
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+@csrf_exempt
+@require_POST
+def import_tasks(request):
+    """Import tasks and comments from the request body, streaming NDJSON progress back.
+
+    The body is NDJSON (the default) or, with ``?format=csv``, a CSV file of
+    the ``?type=`` given (tasks or comments); ``?gzip=1`` marks a gzipped
+    body. Each response line is a rejected input line (``{"line", "error"}``)
+    or the running counts after a committed batch.
+    """
+    organization = getattr(request, "organization", None)
+    if not organization:
+        return HttpResponseBadRequest("Organization not resolved. Provide header 'X-Org-Slug'.")
+    import_format = request.GET.get("format", "ndjson")
+    if import_format not in imports.FORMATS:
+        return HttpResponseBadRequest(f"Invalid format. Must be one of: {', '.join(imports.FORMATS)}")
+    kind = request.GET.get("type", "tasks")
+    if kind not in imports.CSV_KINDS:
+        return HttpResponseBadRequest(f"Invalid type. Must be one of: {', '.join(imports.CSV_KINDS)}")
+
+    body = gzip.GzipFile(fileobj=request, mode="rb") if request.GET.get("gzip") in ("1", "true") else request
+    records = imports.read_records(imports.text_lines(body), import_format, kind)
+    events = (
+        json.dumps(event) + "\n"
+        for event in imports.Importer(organization).run(records)
+    )
+    if isinstance(request, ASGIRequest):
+        events = iterate_in_thread(events)
+    return StreamingHttpResponse(events, content_type="application/x-ndjson")
@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "pmtool.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported once Django is set up.
+from pmtool.subscriptions import graphql_websocket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """HTTP goes to Django; WebSockets carry GraphQL subscriptions."""
+    if scope["type"] == "websocket":
+        return await graphql_websocket(scope, receive, send)
+    return await django_application(scope, receive, send)
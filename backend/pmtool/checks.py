@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+LOCMEM_CACHE = "django.core.cache.backends.locmem.LocMemCache"
+
+
+@register(Tags.caches)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Read replicas need a pin cache every worker sees, or a write only pins reads of its own process."""
+    if not settings.DATABASE_REPLICAS:
+        return []
+    alias = settings.DB_REPLICA_PIN_CACHE
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if backend is None:
+        return [Error(f"DB_REPLICA_PIN_CACHE names an unknown cache alias {alias!r}.", id="pmtool.E001")]
+    if backend == LOCMEM_CACHE:
+        return [
+            Error(
+                "DB_REPLICA_PIN_CACHE is a per-process cache, so reads on other workers miss the writes it pins.",
+                hint="Point DB_REPLICA_PIN_CACHE at a shared cache alias, e.g. a redis GRAPHQL_RESPONSE_CACHE_BACKEND.",
+                id="pmtool.E001",
+            )
+        ]
+    return []
+
+
+@register()
+def check_async_connections(app_configs, **kwargs):
+    """Persistent connections leak under ASGI: each sync_to_async thread opens its own and keeps it."""
+    if not settings.GRAPHQL_ASYNC:
+        return []
+    return [
+        Error(
+            f"Database {alias!r} keeps persistent connections (CONN_MAX_AGE), which leak with GRAPHQL_ASYNC.",
+            hint='Use DB_CONN_MODE="pool" or "none".',
+            id="pmtool.E002",
+        )
+        for alias, database in settings.DATABASES.items()
+        if database.get("CONN_MAX_AGE", 0) != 0
+    ]
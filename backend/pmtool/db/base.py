@@ -0,0 +1,100 @@
+import threading
+import time
+
+from django.db.backends.postgresql import base
+
+from pmtool.db.pool import ConnectionPool
+from pmtool.tracing import record_connection
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+# libpq's PGTransactionStatusType, as reported by psycopg2 and psycopg.
+TRANSACTION_IDLE, TRANSACTION_UNKNOWN = 0, 4
+
+
+def _check(connection, idle_seconds, ping_after=30.0):
+    """Whether an idle psycopg connection can be reused; ping it if idle long enough to have been dropped."""
+    if connection.closed:
+        return False
+    if idle_seconds >= ping_after:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    return True
+
+
+def _reset(connection):
+    """Roll back what a released connection left open; False if it is broken."""
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status == TRANSACTION_UNKNOWN:
+        return False
+    if status != TRANSACTION_IDLE:
+        connection.rollback()
+    return True
+
+
+def get_pool(alias, options):
+    key = (alias, options.get("SIZE", 10), options.get("TIMEOUT", 10.0))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(_check, _reset, max_size=key[1], timeout=key[2])
+        return _pools[key]
+
+
+def pool_stats():
+    """``{alias: snapshot}`` of this process's pools."""
+    with _pools_lock:
+        return {alias: pool.snapshot() for (alias, _, _), pool in _pools.items()}
+
+
+def close_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """The PostgreSQL backend, optionally drawing connections from a process-wide pool.
+
+    With a ``POOL`` entry (``{"SIZE": 10, "TIMEOUT": 10}``) in the database
+    settings, opening a connection borrows one from the pool and closing it
+    gives it back, so with ``CONN_MAX_AGE = 0`` a thread holds a connection
+    only for the length of a request. The time spent opening or waiting for
+    connections is reported to the request's trace.
+    """
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get("POOL")
+        return get_pool(self.alias, options) if options else None
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        started = time.perf_counter()
+        if pool is None:
+            connection = super().get_new_connection(conn_params)
+            record_connection(time.perf_counter() - started, opened=True)
+            return connection
+        opened = []
+
+        def connect():
+            opened.append(True)
+            return super(DatabaseWrapper, self).get_new_connection(conn_params)
+
+        connection, _ = pool.acquire(connect)
+        record_connection(time.perf_counter() - started, opened=bool(opened))
+        return connection
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        if self.in_atomic_block:
+            # close() keeps the connection attached in this case; it must not
+            # be handed to another thread.
+            pool.discard(self.connection)
+        else:
+            pool.release(self.connection)
@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger("pmtool.db")
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """A bounded pool of DB-API connections shared by the threads of a process.
+
+    ``acquire(connect)`` hands out an idle connection, opens one with
+    ``connect()`` while fewer than ``max_size`` are open, or waits up to
+    ``timeout`` seconds for one to be released. ``check(connection,
+    idle_seconds)`` vets an idle connection before reuse and
+    ``reset(connection)`` prepares a released one, returning False when it
+    must be closed instead.
+    """
+
+    def __init__(self, check, reset, max_size=10, timeout=10.0):
+        self.check = check
+        self.reset = reset
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = deque()  # (connection, released at)
+        self._size = 0  # open connections, idle or in use
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self.stats = {
+            "opened": 0,
+            "closed": 0,
+            "acquired": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+        }
+
+    def acquire(self, connect):
+        """Return ``(connection, seconds waited)``."""
+        started = time.monotonic()
+        with self._condition:
+            waited = False
+            while not self._idle and self._size >= self.max_size:
+                remaining = started + self.timeout - time.monotonic()
+                if remaining <= 0:
+                    self.stats["timeouts"] += 1
+                    logger.warning("No database connection free after %.1fs (%d in use)", self.timeout, self._size)
+                    raise PoolTimeout(f"No database connection free after {self.timeout}s")
+                waited = True
+                self._waiting += 1
+                try:
+                    self._condition.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            # Reserve a slot; an idle connection already holds one.
+            idle = self._idle.pop() if self._idle else None
+            if idle is None:
+                self._size += 1
+            wait = time.monotonic() - started
+            self.stats["acquired"] += 1
+            if waited:
+                self.stats["waits"] += 1
+                self.stats["wait_seconds"] += wait
+                self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], wait)
+
+        if idle is not None:
+            connection, released_at = idle
+            if self._safely(self.check, connection, time.monotonic() - released_at):
+                return connection, wait
+            self._close(connection)  # its slot goes to the new connection
+        try:
+            connection = connect()
+        except BaseException:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self.stats["opened"] += 1
+        return connection, wait
+
+    def release(self, connection):
+        keep = self._safely(self.reset, connection)
+        with self._condition:
+            if keep:
+                # Last in, first out: the warmest connections are reused and
+                # the rest can time out on the server side.
+                self._idle.append((connection, time.monotonic()))
+            else:
+                self._size -= 1
+            self._condition.notify()
+        if not keep:
+            self._close(connection)
+
+    def discard(self, connection):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+        self._close(connection)
+
+    def close(self):
+        """Close the idle connections."""
+        with self._condition:
+            idle = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+        for connection in idle:
+            self._close(connection)
+
+    def snapshot(self):
+        with self._condition:
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "waiting": self._waiting,
+                **self.stats,
+            }
+
+    @staticmethod
+    def _safely(function, *args):
+        try:
+            return function(*args)
+        except Exception:
+            return False
+
+    def _close(self, connection):
+        with self._condition:
+            self.stats["closed"] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,137 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger("pmtool.db")
+
+# The replica a GraphQL query reads from while it executes; reads outside
+# one always go to the primary.
+_replica = ContextVar("pmtool_replica", default=None)
+
+# Replay lag of a PostgreSQL standby in seconds; 0 on a primary and on a
+# standby that has replayed everything it received, since the last replayed
+# transaction's timestamp grows while the primary is idle.
+LAG_SQL = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def _pin_cache():
+    return caches[settings.DB_REPLICA_PIN_CACHE]
+
+
+def _pin_key(scope):
+    return f"pmtool:primary-pin:{scope}"
+
+
+def pin_primary(*scopes):
+    """Send reads of ``scopes`` (organization ids or GLOBAL) to the primary for DB_REPLICA_PIN_SECONDS.
+
+    Called on every write, so a client refetching what it just changed never
+    reads a replica that has not replayed the write yet.
+    """
+    if settings.DATABASE_REPLICAS and settings.DB_REPLICA_PIN_SECONDS:
+        _pin_cache().set_many({_pin_key(scope): 1 for scope in scopes}, timeout=settings.DB_REPLICA_PIN_SECONDS)
+
+
+def is_pinned(*scopes):
+    return bool(_pin_cache().get_many([_pin_key(scope) for scope in scopes]))
+
+
+class ReplicaHealth:
+    """Replication lag of each replica, measured at most every DB_REPLICA_CHECK_INTERVAL seconds."""
+
+    def __init__(self):
+        self._checked = {}  # alias -> (monotonic time, healthy)
+        self._lock = threading.Lock()
+
+    def healthy(self, alias):
+        now = time.monotonic()
+        with self._lock:
+            checked = self._checked.get(alias)
+            if checked and now - checked[0] < settings.DB_REPLICA_CHECK_INTERVAL:
+                return checked[1]
+            # Other threads keep the previous answer while this one measures.
+            self._checked[alias] = (now, checked[1] if checked else False)
+        lag = self.lag(alias)
+        healthy = lag is not None and lag <= settings.DB_REPLICA_MAX_LAG
+        if not healthy:
+            logger.warning("Replica %s unavailable or lagging (%s s); reading from the primary", alias, lag)
+        with self._lock:
+            self._checked[alias] = (time.monotonic(), healthy)
+        return healthy
+
+    def lag(self, alias):
+        """Seconds ``alias`` is behind the primary, None when it cannot be reached."""
+        connection = connections[alias]
+        if connection.vendor != "postgresql":
+            return 0.0
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(LAG_SQL)
+                return float(cursor.fetchone()[0])
+        except DatabaseError:
+            connection.close()
+            return None
+
+    def reset(self):
+        with self._lock:
+            self._checked.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+def choose_replica(*scopes):
+    """The replica a query reading ``scopes`` should use, None for the primary.
+
+    The primary is used while ``scopes`` are pinned after a write and when
+    no replica is within DB_REPLICA_MAX_LAG.
+    """
+    if not settings.DATABASE_REPLICAS or is_pinned(*scopes):
+        return None
+    candidates = [alias for alias in settings.DATABASE_REPLICAS if replica_health.healthy(alias)]
+    return random.choice(candidates) if candidates else None
+
+
+@contextmanager
+def replica_reads(alias):
+    """Send the reads of the block to the replica ``alias`` (None: the primary)."""
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    """Route the reads of GraphQL queries to their replica, everything else to the primary.
+
+    A whole query reads from the one replica picked by ``choose_replica()``,
+    so its results are consistent with each other; reads inside a
+    transaction on the primary stay there.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from graphql import parse, validate
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DocumentCache:
+    """Parsed documents and their validation errors, keyed by query hash.
+
+    A GraphQLSyntaxError is cached like a validation error, so a malformed
+    query is also only parsed once.
+    """
+
+    def __init__(self, max_size):
+        self._cache = LRUCache(max_size)
+
+    def get(self, schema, query, rules=None, max_errors=None, digest=None):
+        key = digest or query_hash(query)
+        entry = self._cache.get(key)
+        if entry is None:
+            try:
+                document = parse(query)
+            except Exception as e:
+                entry = (None, [e])
+            else:
+                entry = (document, validate(schema, document, rules, max_errors))
+            self._cache.set(key, entry)
+        return entry
+
+    def clear(self):
+        self._cache.clear()
+
+
+class PersistedQueries:
+    """Query lookup by sha256 for automatic persisted queries.
+
+    Trusted queries come from the registry that ``extract_persisted_queries``
+    builds out of the frontend's operations; others are registered on the
+    fly by clients unless ``GRAPHQL_PERSISTED_QUERIES_ONLY`` is set.
+    """
+
+    def __init__(self, max_size):
+        self._automatic = LRUCache(max_size)
+        self._trusted = None
+
+    @property
+    def trusted(self):
+        if self._trusted is None:
+            self._trusted = load_registry(settings.GRAPHQL_PERSISTED_QUERIES_FILE)
+        return self._trusted
+
+    def get(self, digest):
+        return self.trusted.get(digest) or self._automatic.get(digest)
+
+    def register(self, digest, query):
+        self._automatic.set(digest, query)
+
+    def reload(self):
+        self._trusted = None
+        self._automatic.clear()
+
+
+def load_registry(path):
+    try:
+        with open(path) as registry:
+            return json.load(registry)
+    except FileNotFoundError:
+        return {}
+
+
+document_cache = DocumentCache(settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+persisted_queries = PersistedQueries(settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
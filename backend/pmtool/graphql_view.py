@@ -1,11 +1,531 @@
-from graphene_django.views import GraphQLView
+import asyncio
+import json
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast, validate_schema
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from core.loaders import Loaders
+from core.versions import GLOBAL
+from pmtool.db.routers import choose_replica, replica_reads
+from pmtool.documents import document_cache, persisted_queries, query_hash
+from pmtool.query_cost import QueryCost, cost_budget
+from pmtool.response_cache import response_cache
+from pmtool.tracing import NO_TRACE, Trace, TracingMiddleware, get_trace
+
+
+class Batch:
+    """What the operations of a batched request share: the DataLoaders of its queries."""
+
+    def __init__(self):
+        self._loaders = {}
+
+    def loaders(self, is_async):
+        if is_async not in self._loaders:
+            self._loaders[is_async] = Loaders(is_async=is_async)
+        return self._loaders[is_async]
+
+    def forget(self):
+        """Drop the loaded rows, which a mutation is about to change."""
+        self._loaders.clear()
+
+
+class OperationContext:
+    """The request as seen by one operation of a batch.
+
+    Attributes not set on it are read from the request, so the organization
+    is resolved once per batch; what an operation sets (its cost, cache
+    status, trace) stays on its own context, so operations can execute side
+    by side.
+    """
+
+    def __init__(self, request, batch):
+        self._request = request
+        self.graphql_batch = batch
+        trace = get_trace(request)
+        self.graphql_trace = (
+            NO_TRACE if trace is NO_TRACE else Trace(exposed=trace.exposed, trace_fields=trace.trace_fields)
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._request, name)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ContextGraphQLView(GraphQLView):
-    def get_context(self, request):
+    """GraphQL view taking one operation or, as a JSON array, a batch of them.
+
+    The operations of a batch execute in order against the same resolved
+    organization, and its queries share DataLoaders; the response is the
+    array of their results.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        self.finish_response(request, response)
+        return response
+
+    def finish_response(self, request, response):
+        operations = getattr(request, 'graphql_operations', None) or [request]
+        cache_statuses = [getattr(operation, 'graphql_cache_status', None) for operation in operations]
+        if any(cache_statuses):
+            response['X-GraphQL-Cache'] = ', '.join(status or '-' for status in cache_statuses)
+        for operation in operations:
+            get_trace(operation).log_if_slow(getattr(request, 'organization', None))
+
+    def parse_body(self, request):
+        # Like GraphQLView.parse_body, but a JSON array is a batch of operations.
+        if self.get_content_type(request) != "application/json":
+            return super().parse_body(request)
+        try:
+            data = json.loads(request.body.decode("utf-8"))
+        except (TypeError, ValueError):
+            raise HttpError(HttpResponseBadRequest("POST body sent invalid JSON."))
+        if isinstance(data, list):
+            if not data or len(data) > settings.GRAPHQL_BATCH_MAX_SIZE:
+                raise HttpError(HttpResponseBadRequest(
+                    f"A batch must hold 1 to {settings.GRAPHQL_BATCH_MAX_SIZE} operations."
+                ))
+            if not all(isinstance(entry, dict) for entry in data):
+                raise HttpError(HttpResponseBadRequest("The received data is not a valid JSON query."))
+        elif not isinstance(data, dict):
+            raise HttpError(HttpResponseBadRequest("The received data is not a valid JSON query."))
+        return data
+
+    def batch_contexts(self, request, entries):
+        batch = Batch()
+        request.graphql_operations = [OperationContext(request, batch) for _ in entries]
+        return request.graphql_operations
+
+    def encode_http_error(self, request, data, error):
+        """The response of one batch operation that failed with ``error``, so the others still run."""
+        status_code = error.response.status_code
+        response = {"errors": [self.format_error(error)]}
+        if self.batch:
+            response["id"] = data.get("id")
+            response["status"] = status_code
+        return self.json_encode(request, response), status_code
+
+    def encode_batch(self, responses):
+        # The status of the worst operation, as GraphQLView does for batches.
+        result = "[{}]".format(",".join(content for content, _ in responses))
+        return result, max(status_code for _, status_code in responses)
+
+    def get_middleware(self, request):
+        middleware = super().get_middleware(request)
+        if not get_trace(request).trace_fields:
+            return middleware
+        return [*(middleware or []), TracingMiddleware()]
+
+    def get_context(self, request, is_async=False):
         context = request
         context.organization = getattr(request, 'organization', None)
-        return context
\ No newline at end of file
+        context.is_async = is_async
+        batch = getattr(request, 'graphql_batch', None)
+        if batch is None:
+            context.loaders = Loaders(is_async=is_async)
+        elif request.graphql_operation == OperationType.QUERY:
+            context.loaders = batch.loaders(is_async)
+        else:
+            batch.forget()
+            context.loaders = Loaders(is_async=is_async)
+        return context
+
+    def resolve_persisted_query(self, request, data, query):
+        """Return ``(query, digest)``, following the automatic persisted query protocol."""
+        extensions = request.GET.get('extensions') or data.get('extensions') or {}
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest('Extensions are invalid JSON.'))
+        digest = (extensions.get('persistedQuery') or {}).get('sha256Hash')
+        trusted_only = settings.GRAPHQL_PERSISTED_QUERIES_ONLY
+
+        if not digest:
+            if query and trusted_only:
+                digest = query_hash(query)
+                if persisted_queries.get(digest) is None:
+                    raise GraphQLError('PersistedQueryNotAllowed')
+            return query, None
+        if not query:
+            query = persisted_queries.get(digest)
+            if query is None:
+                raise GraphQLError('PersistedQueryNotFound')
+            return query, digest
+        if query_hash(query) != digest:
+            raise HttpError(HttpResponseBadRequest('provided sha does not match query'))
+        if persisted_queries.get(digest) is None:
+            if trusted_only:
+                raise GraphQLError('PersistedQueryNotAllowed')
+            persisted_queries.register(digest, query)
+        return query, digest
+
+    def prepare_operation(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """Parse, validate and cost the request's operation.
+
+        Returns ``(document, operation_ast, digest, result)``; ``document`` is
+        None when the request ends early with ``result``.
+        """
+        # Mirrors the first half of GraphQLView.execute_graphql_request, but
+        # looks up persisted queries and reuses parsed, validated documents
+        # across requests.
+        request.graphql_cost = None
+        request.graphql_operation = None
+        try:
+            query, digest = self.resolve_persisted_query(request, data, query)
+        except GraphQLError as e:
+            return None, None, None, ExecutionResult(errors=[e])
+
+        if not query:
+            if show_graphiql:
+                return None, None, None, None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return None, None, None, ExecutionResult(data=None, errors=schema_validation_errors)
+
+        document, validation_errors = document_cache.get(
+            schema,
+            query,
+            self.validation_rules,
+            graphene_settings.MAX_VALIDATION_ERRORS,
+            digest=digest,
+        )
+        if document is None:
+            return None, None, None, ExecutionResult(errors=validation_errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if operation_ast is not None:
+            request.graphql_operation = operation_ast.operation
+            if operation_ast.name is not None:
+                get_trace(request).set_operation(operation_ast.name.value)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None, None, None, None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        if validation_errors:
+            return None, None, None, ExecutionResult(data=None, errors=validation_errors)
+
+        if operation_ast is not None and operation_ast.operation == OperationType.SUBSCRIPTION:
+            error = GraphQLError(f"Subscriptions are served over WebSocket at {settings.GRAPHQL_WS_PATH}")
+            return None, None, None, ExecutionResult(data=None, errors=[error])
+
+        if operation_ast is not None:
+            request.graphql_cost = QueryCost(schema, document, operation_ast, variables)
+            cost_errors = request.graphql_cost.errors()
+            if cost_errors:
+                return None, None, None, ExecutionResult(data=None, errors=cost_errors)
+
+        return document, operation_ast, digest or query_hash(query), None
+
+    def get_execute_options(self, request, variables, operation_name, is_async=False):
+        execute_options = {
+            "root_value": self.get_root_value(request),
+            "context_value": self.get_context(request, is_async=is_async),
+            "variable_values": variables,
+            "operation_name": operation_name,
+            "middleware": self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            execute_options["execution_context_class"] = self.execution_context_class
+        return execute_options
+
+    def response_cache_key(self, request, operation_ast, digest, operation_name, variables):
+        """Response cache key of a read operation, or None when it must not be cached."""
+        if (
+            response_cache.backend is None
+            or operation_ast is None
+            or operation_ast.operation != OperationType.QUERY
+            or 'no-cache' in request.headers.get('Cache-Control', '')
+        ):
+            return None
+        return response_cache.key(
+            getattr(request, 'organization', None), digest, operation_name, variables
+        )
+
+    def read_replica(self, request, operation_ast):
+        """The database replica a query reads from, None for the primary."""
+        if operation_ast is None or operation_ast.operation != OperationType.QUERY:
+            return None
+        organization = getattr(request, 'organization', None)
+        return choose_replica(GLOBAL, *([organization.pk] if organization else []))
+
+    def cached_result(self, request, cache_key):
+        data = response_cache.get(cache_key)
+        request.graphql_cache_status = 'MISS' if data is None else 'HIT'
+        return None if data is None else ExecutionResult(data=data)
+
+    def charge_cost(self, request):
+        """Spend the operation's cost from its organization's budget, or answer 429."""
+        cost = getattr(request, 'graphql_cost', None)
+        if cost is None:
+            return
+        allowed, budget = cost_budget.charge(getattr(request, 'organization', None), cost.cost)
+        request.graphql_cost_budget = budget
+        if not allowed:
+            response = HttpResponse(status=429)
+            response['Retry-After'] = str(budget['resetIn'])
+            raise HttpError(
+                response,
+                f"Query cost budget of {budget['limit']} per {settings.GRAPHQL_COST_WINDOW}s exceeded; "
+                f"retry in {budget['resetIn']}s",
+            )
+
+    def get_response(self, request, data, show_graphiql=False):
+        if isinstance(data, list):
+            responses = []
+            for context, entry in zip(self.batch_contexts(request, data), data):
+                try:
+                    responses.append(self.get_response(context, entry))
+                except HttpError as e:
+                    responses.append(self.encode_http_error(context, entry, e))
+            return self.encode_batch(responses)
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+        return self.encode_execution_result(request, execution_result, id, show_graphiql)
+
+    def encode_execution_result(self, request, execution_result, id=None, show_graphiql=False):
+        # Mirrors the tail of GraphQLView.get_response, adding the operation's
+        # cost to the response extensions.
+        status_code = 200
+        if not execution_result:
+            return None, status_code
+
+        response = {}
+        if execution_result.errors:
+            set_rollback()
+            response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+        if execution_result.errors and any(
+            not getattr(e, "path", None) for e in execution_result.errors
+        ):
+            # In a batch an unknown persisted query is answered like the other
+            # operations, so the client can retry just that one with its text.
+            persisted_query_miss = all(e.message == 'PersistedQueryNotFound' for e in execution_result.errors)
+            in_batch = getattr(request, 'graphql_batch', None) is not None
+            status_code = 200 if in_batch and persisted_query_miss else 400
+        else:
+            response["data"] = execution_result.data
+
+        extensions = dict(execution_result.extensions or {})
+        cost = getattr(request, 'graphql_cost', None)
+        if cost is not None:
+            extensions['cost'] = {
+                'requested': cost.cost,
+                'depth': cost.depth,
+                'maximum': settings.GRAPHQL_MAX_QUERY_COST,
+                'budget': getattr(request, 'graphql_cost_budget', None),
+            }
+        trace = get_trace(request)
+        if trace.exposed:
+            extensions['tracing'] = trace.as_dict()
+        if extensions:
+            response["extensions"] = extensions
+
+        if self.batch:
+            response["id"] = id
+            response["status"] = status_code
+
+        return self.json_encode(request, response, pretty=show_graphiql), status_code
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        trace = get_trace(request)
+        with trace.phase('parse'):
+            document, operation_ast, digest, result = self.prepare_operation(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+        if document is None:
+            return result
+        with trace.phase('execute'):
+            return self.execute_document(request, document, operation_ast, digest, variables, operation_name)
+
+    def execute_document(self, request, document, operation_ast, digest, variables, operation_name):
+        schema = self.schema.graphql_schema
+        cache_key = self.response_cache_key(request, operation_ast, digest, operation_name, variables)
+        if cache_key:
+            cached = self.cached_result(request, cache_key)
+            if cached is not None:
+                return cached
+        self.charge_cost(request)
+
+        try:
+            execute_options = self.get_execute_options(request, variables, operation_name)
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            with replica_reads(self.read_replica(request, operation_ast)):
+                result = execute(schema, document, **execute_options)
+            if cache_key and not result.errors:
+                response_cache.set(cache_key, result.data)
+            return result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncContextGraphQLView(ContextGraphQLView):
+    """GraphQL view for the ASGI application.
+
+    Queries execute on the event loop with resolvers awaiting Django's async
+    ORM, so a worker serves other requests while one waits on the database.
+    Mutations keep their transaction and run on the synchronous path in a
+    worker thread.
+    """
+
+    # Django only runs a view as a coroutine when its handlers are async; this
+    # view does everything in dispatch().
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() in ("get", "post"):
+                data = self.parse_body(request)
+                if not (self.graphiql and self.can_display_graphiql(request, data)):
+                    result, status_code = await self.get_response_async(request, data)
+                    response = HttpResponse(
+                        status=status_code, content=result, content_type="application/json"
+                    )
+                    self.finish_response(request, response)
+                    return response
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+            return response
+        # The GraphiQL page and unsupported methods don't touch the database.
+        return super().dispatch(request, *args, **kwargs)
+
+    async def get_response_async(self, request, data):
+        if isinstance(data, list):
+            return await self.get_batch_response_async(request, data)
+        operation = self.prepare_request(request, data)
+        return await self.respond_async(request, operation)
+
+    async def get_batch_response_async(self, request, entries):
+        """Execute a batch; with GRAPHQL_BATCH_PARALLEL, consecutive queries run concurrently.
+
+        Every operation is parsed and validated first. A mutation waits for
+        the operations before it and delays those after it, so the batch
+        still reads its own writes in order.
+        """
+        contexts = self.batch_contexts(request, entries)
+        operations = []
+        for context, entry in zip(contexts, entries):
+            try:
+                operations.append((context, entry, self.prepare_request(context, entry)))
+            except HttpError as e:
+                operations.append((context, entry, e))
+        responses, queries = [], []
+        for context, entry, operation in operations:
+            response = self.respond_batch_entry_async(context, entry, operation)
+            if settings.GRAPHQL_BATCH_PARALLEL and getattr(context, 'graphql_operation', None) == OperationType.QUERY:
+                queries.append(response)
+                continue
+            responses += await asyncio.gather(*queries)
+            queries = []
+            responses.append(await response)
+        responses += await asyncio.gather(*queries)
+        return self.encode_batch(responses)
+
+    async def respond_batch_entry_async(self, request, data, operation):
+        # ``operation`` is the HttpError raised while preparing it, if any.
+        if isinstance(operation, HttpError):
+            return self.encode_http_error(request, data, operation)
+        try:
+            return await self.respond_async(request, operation)
+        except HttpError as e:
+            return self.encode_http_error(request, data, e)
+
+    def prepare_request(self, request, data):
+        """Parse and validate one operation of the request: ``(params, prepared operation)``."""
+        params = self.get_graphql_params(request, data)
+        query, variables, operation_name, _ = params
+        with get_trace(request).phase('parse'):
+            return params, self.prepare_operation(request, data, query, variables, operation_name)
+
+    async def respond_async(self, request, operation):
+        (_, variables, operation_name, id), prepared = operation
+        execution_result = await self.execute_graphql_request_async(request, prepared, variables, operation_name)
+        return self.encode_execution_result(request, execution_result, id)
+
+    async def execute_graphql_request_async(self, request, prepared, variables, operation_name):
+        trace = get_trace(request)
+        document, operation_ast, digest, result = prepared
+        if document is None:
+            return result
+        if operation_ast is None or operation_ast.operation != OperationType.QUERY:
+            with trace.phase('execute'):
+                return await sync_to_async(self.execute_document)(
+                    request, document, operation_ast, digest, variables, operation_name
+                )
+
+        cache_key = await sync_to_async(self.response_cache_key)(
+            request, operation_ast, digest, operation_name, variables
+        )
+        if cache_key:
+            cached = await sync_to_async(self.cached_result)(request, cache_key)
+            if cached is not None:
+                return cached
+        await sync_to_async(self.charge_cost)(request)
+        replica = await sync_to_async(self.read_replica)(request, operation_ast)
+
+        try:
+            with trace.phase('execute'), replica_reads(replica):
+                result = execute(
+                    self.schema.graphql_schema,
+                    document,
+                    **self.get_execute_options(request, variables, operation_name, is_async=True),
+                )
+                if isawaitable(result):
+                    result = await result
+            if cache_key and not result.errors:
+                await sync_to_async(response_cache.set)(cache_key, result.data)
+            return result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
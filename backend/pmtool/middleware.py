@@ -1,15 +1,24 @@
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
-from core.models import Organization
+from core.org_cache import aget_organization, get_organization
+from pmtool.tracing import start_trace
 
 
 class OrganizationMiddleware(MiddlewareMixin):
-    def process_request(self, request):
+    def org_slug(self, request):
         header = getattr(settings, 'ORG_HEADER', 'X-Org-Slug')
-        slug = request.headers.get(header) or request.META.get(f'HTTP_{header.upper().replace("-", "_")}')
-        request.organization = None
-        if slug:
-            try:
-                request.organization = Organization.objects.get(slug=slug)
-            except Organization.DoesNotExist:
-                request.organization = None
\ No newline at end of file
+        if request.path.startswith(tuple(getattr(settings, 'ORG_EXEMPT_PATHS', ()))):
+            return None
+        return request.headers.get(header) or request.META.get(f'HTTP_{header.upper().replace("-", "_")}')
+
+    def process_request(self, request):
+        slug = self.org_slug(request)
+        with start_trace(request).phase('organization'):
+            request.organization = get_organization(slug) if slug else None
+
+    async def __acall__(self, request):
+        # Under ASGI, look the organization up without a thread hop.
+        slug = self.org_slug(request)
+        with start_trace(request).phase('organization'):
+            request.organization = await aget_organization(slug) if slug else None
+        return await self.get_response(request)
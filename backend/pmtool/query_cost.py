@@ -0,0 +1,159 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    get_named_type,
+    get_nullable_type,
+    is_composite_type,
+    is_list_type,
+)
+from graphql.execution.values import get_argument_values
+
+from core.pagination import page_size
+
+
+def _is_connection(graphql_type):
+    return graphql_type.name.endswith("Connection")
+
+
+def _is_edge(graphql_type):
+    return graphql_type.name.endswith("Edge")
+
+
+class QueryCost:
+    """Estimated rows an operation touches, and its depth in fields.
+
+    A connection field fetches one page (its ``first`` argument, clamped like
+    the resolvers do), another list ``GRAPHQL_COST_LIST_SIZE`` rows and an
+    object field one row, per row of its parent. ``edges``, ``node`` and
+    ``pageInfo`` add nothing: they read the page their connection fetched.
+    """
+
+    def __init__(self, schema, document, operation_ast, variables=None):
+        self.schema = schema
+        self.variables = variables or {}
+        self.list_size = settings.GRAPHQL_COST_LIST_SIZE
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+        root = schema.get_root_type(operation_ast.operation)
+        self.cost, self.depth = self._selection_cost(root, operation_ast.selection_set, 1)
+
+    def _rows(self, parent_type, field, node):
+        if _is_connection(parent_type) or _is_edge(parent_type):
+            return 1
+        if _is_connection(get_named_type(field.type)):
+            try:
+                return page_size(get_argument_values(field, node, self.variables).get("first"))
+            except GraphQLError:
+                # Invalid arguments fail at execution; cost them as a default page.
+                return page_size(None)
+        if is_list_type(get_nullable_type(field.type)):
+            return self.list_size
+        return 1
+
+    def _selection_cost(self, parent_type, selection_set, multiplier):
+        cost = depth = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                field = getattr(parent_type, "fields", {}).get(selection.name.value)
+                if field is None or selection.selection_set is None:
+                    depth = max(depth, 1)
+                    continue
+                field_type = get_named_type(field.type)
+                if not is_composite_type(field_type):
+                    continue
+                rows = multiplier * self._rows(parent_type, field, selection)
+                if not (_is_connection(parent_type) or _is_edge(parent_type)):
+                    cost += rows
+                child_cost, child_depth = self._selection_cost(field_type, selection.selection_set, rows)
+                cost += child_cost
+                depth = max(depth, child_depth + 1)
+                continue
+
+            if isinstance(selection, InlineFragmentNode):
+                fragment = selection
+            elif isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments.get(selection.name.value)
+                if fragment is None:
+                    continue
+            else:
+                continue
+            fragment_type = parent_type
+            if fragment.type_condition is not None:
+                fragment_type = self.schema.get_type(fragment.type_condition.name.value)
+            child_cost, child_depth = self._selection_cost(fragment_type, fragment.selection_set, multiplier)
+            cost += child_cost
+            depth = max(depth, child_depth)
+        return cost, depth
+
+    def errors(self):
+        """Errors for operations over the per-operation cost or depth limits."""
+        errors = []
+        if self.cost > settings.GRAPHQL_MAX_QUERY_COST:
+            errors.append(GraphQLError(
+                f"Query cost {self.cost} exceeds the maximum of {settings.GRAPHQL_MAX_QUERY_COST}",
+                extensions={"code": "QUERY_TOO_COSTLY"},
+            ))
+        if self.depth > settings.GRAPHQL_MAX_QUERY_DEPTH:
+            errors.append(GraphQLError(
+                f"Query depth {self.depth} exceeds the maximum of {settings.GRAPHQL_MAX_QUERY_DEPTH}",
+                extensions={"code": "QUERY_TOO_DEEP"},
+            ))
+        return errors
+
+
+class CostBudget:
+    """Per-organization budget of query cost per ``GRAPHQL_COST_WINDOW`` seconds.
+
+    Spent cost is counted per fixed window in the ``GRAPHQL_COST_CACHE``
+    cache, so every worker sharing that cache shares the budget. An
+    organization's ``query_cost_budget`` overrides ``GRAPHQL_COST_BUDGET``;
+    a budget of 0 means unlimited.
+    """
+
+    def limit(self, organization):
+        if organization is not None and organization.query_cost_budget is not None:
+            return organization.query_cost_budget
+        return settings.GRAPHQL_COST_BUDGET
+
+    def charge(self, organization, cost):
+        """Spend ``cost`` of the organization's budget.
+
+        Returns ``(allowed, status)``; nothing is spent when the operation
+        does not fit in what is left of the current window.
+        """
+        limit = self.limit(organization)
+        if not limit or organization is None:
+            return True, None
+        window = settings.GRAPHQL_COST_WINDOW
+        now = time.time()
+        reset_in = int(window - now % window) or window
+        key = f"pmtool:cost:{organization.pk}:{int(now // window)}"
+        cache = caches[settings.GRAPHQL_COST_CACHE]
+        cache.add(key, 0, timeout=window)
+        try:
+            spent = cache.incr(key, cost)
+        except ValueError:
+            # The window expired between add() and incr().
+            cache.set(key, cost, timeout=window)
+            spent = cost
+        allowed = spent <= limit
+        if not allowed:
+            spent -= cost
+            try:
+                cache.decr(key, cost)
+            except ValueError:
+                pass
+        return allowed, {"limit": limit, "remaining": max(limit - spent, 0), "resetIn": reset_in}
+
+
+cost_budget = CostBudget()
@@ -0,0 +1,64 @@
+import json
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.versions import GLOBAL, get_data_versions
+from pmtool.documents import query_hash
+
+
+class ResponseCache:
+    """Results of read operations, keyed by organization, operation and variables.
+
+    Keys embed the organization's data version and the global one, so a
+    mutation invalidates every cached read of its tenant by bumping a counter
+    instead of deleting keys.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def backend(self):
+        alias = getattr(settings, "GRAPHQL_RESPONSE_CACHE", None)
+        return caches[alias] if alias else None
+
+    def key(self, organization, digest, operation_name, variables):
+        scope = organization.pk if organization else "anonymous"
+        org_version, global_version = get_data_versions(scope, GLOBAL)
+        request_hash = query_hash(
+            json.dumps([digest, operation_name, variables or {}], sort_keys=True, default=str)
+        )
+        return f"pmtool:response:{scope}:{org_version}:{global_version}:{request_hash}"
+
+    def get(self, key):
+        data = self.backend.get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return data
+
+    def set(self, key, data):
+        self.backend.set(key, data, settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT)
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+
+response_cache = ResponseCache()
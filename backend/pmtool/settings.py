@@ -70,16 +70,61 @@ WSGI_APPLICATION = "pmtool.wsgi.application"
 ASGI_APPLICATION = "pmtool.asgi.application"
 
 # --- Database (PostgreSQL via Docker) ---
+# DB_CONN_MODE picks how requests get a connection: "none" opens one per
+# request, "persistent" keeps one per worker thread for DB_CONN_MAX_AGE
+# seconds and checks it is alive before reusing it, "pool" shares up to
+# DB_POOL_SIZE connections between the threads of a process, waiting up to
+# DB_POOL_TIMEOUT seconds for a free one (see pmtool/db). Under ASGI
+# (GRAPHQL_ASYNC) Django opens persistent connections in sync_to_async
+# threads and never reuses or closes them, so there the default is "pool"
+# and "persistent" fails the pmtool.E002 check.
+DB_CONN_MODE = os.environ.get(
+    "DB_CONN_MODE", "pool" if os.environ.get("GRAPHQL_ASYNC", "False") == "True" else "persistent"
+)
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "pmtool.db",
         "NAME": os.environ.get("DB_NAME", "pmtool"),
         "USER": os.environ.get("DB_USER", "pmtool"),
         "PASSWORD": os.environ.get("DB_PASSWORD", "pmtool"),
         "HOST": os.environ.get("DB_HOST", "127.0.0.1"),
         "PORT": os.environ.get("DB_PORT", "5432"),
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")) if DB_CONN_MODE == "persistent" else 0,
+        "CONN_HEALTH_CHECKS": DB_CONN_MODE == "persistent",
     }
 }
+if DB_CONN_MODE == "pool":
+    DATABASES["default"]["POOL"] = {
+        "SIZE": int(os.environ.get("DB_POOL_SIZE", "10")),
+        "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+    }
+
+# Read replicas for GraphQL queries, as comma-separated host[:port][/name]
+# entries (e.g. "replica-1,replica-2:5433" or "127.0.0.1/pmtool_replica"),
+# sharing the primary's credentials. Mutations and every other read use the
+# primary. After a write, queries of that organization read from the primary
+# for DB_REPLICA_PIN_SECONDS (tracked in the DB_REPLICA_PIN_CACHE alias,
+# which must be shared by all workers: a locmem cache fails the pmtool.E001
+# check, so point it at e.g. the redis "graphql" alias); a replica more than
+# DB_REPLICA_MAX_LAG seconds behind, checked every DB_REPLICA_CHECK_INTERVAL
+# seconds, is skipped until it catches up.
+DATABASE_REPLICAS = []
+for _number, _replica in enumerate(filter(None, os.environ.get("DB_REPLICA_HOSTS", "").split(",")), 1):
+    _address, _, _name = _replica.strip().partition("/")
+    _host, _, _port = _address.partition(":")
+    DATABASES[f"replica{_number}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _port or DATABASES["default"]["PORT"],
+        "NAME": _name or DATABASES["default"]["NAME"],
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{_number}")
+DATABASE_ROUTERS = ["pmtool.db.routers.ReplicaRouter"]
+DB_REPLICA_PIN_SECONDS = float(os.environ.get("DB_REPLICA_PIN_SECONDS", "10"))
+DB_REPLICA_PIN_CACHE = os.environ.get("DB_REPLICA_PIN_CACHE", "default")
+DB_REPLICA_MAX_LAG = float(os.environ.get("DB_REPLICA_MAX_LAG", "5"))
+DB_REPLICA_CHECK_INTERVAL = float(os.environ.get("DB_REPLICA_CHECK_INTERVAL", "5"))
 
 # --- Internationalization ---
 LANGUAGE_CODE = "en-us"
@@ -95,6 +140,96 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # --- Graphene (GraphQL) ---
 GRAPHENE = {"SCHEMA": "core.schema.schema"}
 
+# Parsed and validated documents kept per process, keyed by query hash
+GRAPHQL_DOCUMENT_CACHE_SIZE = int(os.environ.get("GRAPHQL_DOCUMENT_CACHE_SIZE", "256"))
+
+# Persisted query registry written by `manage.py extract_persisted_queries`.
+# With GRAPHQL_PERSISTED_QUERIES_ONLY, only registered operations are executed.
+GRAPHQL_PERSISTED_QUERIES_FILE = os.environ.get(
+    "GRAPHQL_PERSISTED_QUERIES_FILE", str(BASE_DIR / "persisted_queries.json")
+)
+GRAPHQL_PERSISTED_QUERIES_ONLY = os.environ.get("GRAPHQL_PERSISTED_QUERIES_ONLY", "False") == "True"
+
+# Query cost analysis: an operation's cost estimates the rows it touches
+# (connection pages times the rows of their parents). Operations over
+# GRAPHQL_MAX_QUERY_COST or GRAPHQL_MAX_QUERY_DEPTH are rejected; each
+# organization may spend GRAPHQL_COST_BUDGET per GRAPHQL_COST_WINDOW seconds
+# (0 = unlimited, Organization.query_cost_budget overrides it), counted in
+# the GRAPHQL_COST_CACHE cache alias.
+GRAPHQL_MAX_QUERY_COST = int(os.environ.get("GRAPHQL_MAX_QUERY_COST", "150000"))
+GRAPHQL_MAX_QUERY_DEPTH = int(os.environ.get("GRAPHQL_MAX_QUERY_DEPTH", "12"))
+GRAPHQL_COST_LIST_SIZE = int(os.environ.get("GRAPHQL_COST_LIST_SIZE", "100"))
+GRAPHQL_COST_BUDGET = int(os.environ.get("GRAPHQL_COST_BUDGET", "0"))
+GRAPHQL_COST_WINDOW = int(os.environ.get("GRAPHQL_COST_WINDOW", "60"))
+GRAPHQL_COST_CACHE = os.environ.get("GRAPHQL_COST_CACHE", "default")
+
+# Per-resolver timing and SQL attribution: requests sending GRAPHQL_TRACE_HEADER
+# get it in `extensions.tracing` when GRAPHQL_TRACING is on; operations slower
+# than GRAPHQL_SLOW_OPERATION_MS (0 = off) are logged to "pmtool.slow_operations"
+# with their phases, or with their slowest fields when
+# GRAPHQL_SLOW_OPERATION_FIELDS times every resolver of every request.
+GRAPHQL_TRACING = os.environ.get("GRAPHQL_TRACING", str(DEBUG)) == "True"
+GRAPHQL_TRACE_HEADER = os.environ.get("GRAPHQL_TRACE_HEADER", "X-GraphQL-Trace")
+GRAPHQL_SLOW_OPERATION_MS = int(os.environ.get("GRAPHQL_SLOW_OPERATION_MS", "1000"))
+GRAPHQL_SLOW_OPERATION_FIELDS = os.environ.get("GRAPHQL_SLOW_OPERATION_FIELDS", "False") == "True"
+GRAPHQL_SLOW_OPERATION_TOP_FIELDS = int(os.environ.get("GRAPHQL_SLOW_OPERATION_TOP_FIELDS", "5"))
+
+# Serve /graphql/ with the async view; enable when running under ASGI
+# (e.g. `uvicorn pmtool.asgi:application`).
+GRAPHQL_ASYNC = os.environ.get("GRAPHQL_ASYNC", "False") == "True"
+
+# /graphql/ also takes a JSON array of up to GRAPHQL_BATCH_MAX_SIZE operations,
+# answered with the array of their results. The async view runs consecutive
+# queries of a batch concurrently unless GRAPHQL_BATCH_PARALLEL is off.
+GRAPHQL_BATCH_MAX_SIZE = int(os.environ.get("GRAPHQL_BATCH_MAX_SIZE", "20"))
+GRAPHQL_BATCH_PARALLEL = os.environ.get("GRAPHQL_BATCH_PARALLEL", "True") == "True"
+
+# Subscriptions over WebSocket (graphql-transport-ws) at GRAPHQL_WS_PATH,
+# served by the ASGI application. The in-memory broker only reaches
+# subscribers of the same process; with several processes use
+# "core.events.CacheBroker", which shares events through the
+# GRAPHQL_SUBSCRIPTION_CACHE alias (e.g. redis) and polls it every
+# GRAPHQL_SUBSCRIPTION_POLL_INTERVAL seconds.
+GRAPHQL_WS_PATH = os.environ.get("GRAPHQL_WS_PATH", "/graphql/")
+GRAPHQL_WS_INIT_TIMEOUT = float(os.environ.get("GRAPHQL_WS_INIT_TIMEOUT", "3"))
+GRAPHQL_SUBSCRIPTION_BROKER = os.environ.get("GRAPHQL_SUBSCRIPTION_BROKER", "core.events.InMemoryBroker")
+GRAPHQL_SUBSCRIPTION_CACHE = os.environ.get("GRAPHQL_SUBSCRIPTION_CACHE", "default")
+GRAPHQL_SUBSCRIPTION_POLL_INTERVAL = float(os.environ.get("GRAPHQL_SUBSCRIPTION_POLL_INTERVAL", "0.5"))
+
+# --- Export ---
+# Rows /export/ reads per round trip; a server-side cursor on PostgreSQL, so
+# memory stays flat for any organization size.
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "2000"))
+
+# --- Organization purge ---
+# Rows purge_organizations deletes per statement (and transaction) when it
+# removes a deleted organization's data in the background.
+ORG_PURGE_CHUNK_SIZE = int(os.environ.get("ORG_PURGE_CHUNK_SIZE", "5000"))
+
+# --- Caches ---
+# The GraphQL response cache is opt-in: set GRAPHQL_RESPONSE_CACHE_BACKEND to
+# "locmem" (single process only), "file" or "redis" (shared by all workers),
+# with GRAPHQL_RESPONSE_CACHE_LOCATION as the directory or redis:// URL.
+_cache_backends = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+CACHES = {
+    "default": {"BACKEND": _cache_backends["locmem"]},
+}
+GRAPHQL_RESPONSE_CACHE = None
+GRAPHQL_RESPONSE_CACHE_TIMEOUT = int(os.environ.get("GRAPHQL_RESPONSE_CACHE_TIMEOUT", "300"))
+_response_cache_backend = os.environ.get("GRAPHQL_RESPONSE_CACHE_BACKEND", "")
+if _response_cache_backend:
+    CACHES["graphql"] = {
+        "BACKEND": _cache_backends[_response_cache_backend],
+        "LOCATION": os.environ.get(
+            "GRAPHQL_RESPONSE_CACHE_LOCATION", str(BASE_DIR / ".graphql-cache")
+        ),
+    }
+    GRAPHQL_RESPONSE_CACHE = "graphql"
+
 # --- CORS / CSRF (frontend at http://localhost:5173 by default) ---
 # If env var is not set, allow common local dev origins for Vite
 _default_cors = ["http://localhost:5173", "http://127.0.0.1:5173"]
@@ -114,3 +249,14 @@ CSRF_TRUSTED_ORIGINS = [
 
 # --- Multi-tenancy header name (used by middleware) ---
 ORG_HEADER = os.environ.get("ORG_HEADER", "X-Org-Slug")
+# Paths that never need the tenant, so the middleware skips the lookup
+ORG_EXEMPT_PATHS = ["/admin/", "/" + STATIC_URL]
+
+# --- Organization lookup cache (used by middleware) ---
+# TTL in seconds; 0 disables it. Set ORG_CACHE_INVALIDATION_CHANNEL to a
+# shared CACHES alias to propagate invalidations across worker processes;
+# each process reads it at most once per ORG_CACHE_POLL_INTERVAL seconds.
+ORG_CACHE_TTL = int(os.environ.get("ORG_CACHE_TTL", "60"))
+ORG_CACHE_MAX_SIZE = int(os.environ.get("ORG_CACHE_MAX_SIZE", "1024"))
+ORG_CACHE_INVALIDATION_CHANNEL = os.environ.get("ORG_CACHE_INVALIDATION_CHANNEL") or None
+ORG_CACHE_POLL_INTERVAL = float(os.environ.get("ORG_CACHE_POLL_INTERVAL", "1"))
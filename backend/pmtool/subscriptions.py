@@ -0,0 +1,179 @@
+import asyncio
+import json
+from inspect import isawaitable
+
+from django.conf import settings
+from graphene_django.settings import graphene_settings
+from graphql import ExecutionResult, GraphQLError, OperationType, execute, get_operation_ast, validate_schema
+from graphql.execution import create_source_event_stream
+
+from core.loaders import Loaders
+from core.org_cache import aget_organization
+from pmtool.documents import document_cache
+from pmtool.query_cost import QueryCost
+
+PROTOCOL = "graphql-transport-ws"
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+class SubscriptionContext:
+    """``info.context`` of a subscription event, standing in for the request."""
+
+    def __init__(self, organization):
+        self.organization = organization
+        self.is_async = True
+        self.loaders = Loaders(is_async=True)
+
+
+class GraphQLWebSocket:
+    """One WebSocket connection speaking the graphql-transport-ws protocol.
+
+    The client sends ``connection_init`` first, with the organization slug
+    under the ORG_HEADER key of its payload (browsers cannot set headers on a
+    WebSocket). Every ``subscribe`` then runs until the client sends
+    ``complete`` or disconnects. Each event executes with a fresh context,
+    so data loaded for one event is never served for the next.
+    """
+
+    def __init__(self, scope, receive, send):
+        self.scope = scope
+        self.receive = receive
+        self.send = send
+        self.organization = None
+        self.acknowledged = False
+        self.operations = {}
+
+    async def run(self):
+        message = await self.receive()
+        if message["type"] != "websocket.connect":
+            return
+        if PROTOCOL not in self.scope.get("subprotocols", ()):
+            await self.close(4406, "Subprotocol not acceptable")
+            return
+        await self.send({"type": "websocket.accept", "subprotocol": PROTOCOL})
+        try:
+            while True:
+                if self.acknowledged:
+                    message = await self.receive()
+                else:
+                    message = await asyncio.wait_for(self.receive(), settings.GRAPHQL_WS_INIT_TIMEOUT)
+                if message["type"] == "websocket.disconnect":
+                    break
+                await self.handle(message.get("text") or message.get("bytes"))
+        except asyncio.TimeoutError:
+            await self.close(4408, "Connection initialisation timeout")
+        except ConnectionClosed:
+            pass
+        finally:
+            for task in self.operations.values():
+                task.cancel()
+            await asyncio.gather(*self.operations.values(), return_exceptions=True)
+
+    async def handle(self, text):
+        try:
+            message = json.loads(text)
+            kind = message["type"]
+        except (TypeError, ValueError, KeyError):
+            await self.close(4400, "Invalid message received")
+            raise ConnectionClosed()
+
+        if kind == "connection_init":
+            if self.acknowledged:
+                await self.close(4429, "Too many initialisation requests")
+                raise ConnectionClosed()
+            slug = (message.get("payload") or {}).get(settings.ORG_HEADER)
+            self.organization = await aget_organization(slug) if slug else None
+            self.acknowledged = True
+            await self.send_message({"type": "connection_ack"})
+        elif kind == "ping":
+            await self.send_message({"type": "pong"})
+        elif kind == "pong":
+            pass
+        elif kind == "subscribe":
+            if not self.acknowledged:
+                await self.close(4401, "Unauthorized")
+                raise ConnectionClosed()
+            operation_id = message.get("id")
+            if operation_id in self.operations:
+                await self.close(4409, f"Subscriber for {operation_id} already exists")
+                raise ConnectionClosed()
+            self.operations[operation_id] = asyncio.create_task(
+                self.run_operation(operation_id, message.get("payload") or {})
+            )
+        elif kind == "complete":
+            task = self.operations.pop(message.get("id"), None)
+            if task is not None:
+                task.cancel()
+        else:
+            await self.close(4400, f"Unexpected message type {kind}")
+            raise ConnectionClosed()
+
+    async def run_operation(self, operation_id, payload):
+        try:
+            schema = graphene_settings.SCHEMA.graphql_schema
+            variables = payload.get("variables") or {}
+            operation_name = payload.get("operationName")
+            document, errors = self.prepare(schema, payload.get("query") or "", variables, operation_name)
+            if errors:
+                await self.send_message({"type": "error", "id": operation_id, "payload": [e.formatted for e in errors]})
+                return
+
+            stream = await create_source_event_stream(
+                schema, document, None, SubscriptionContext(self.organization), variables, operation_name
+            )
+            if isinstance(stream, ExecutionResult):
+                await self.send_message(
+                    {"type": "error", "id": operation_id, "payload": [e.formatted for e in stream.errors]}
+                )
+                return
+            try:
+                async for event in stream:
+                    result = execute(
+                        schema, document, event, SubscriptionContext(self.organization), variables, operation_name
+                    )
+                    if isawaitable(result):
+                        result = await result
+                    await self.send_message({"type": "next", "id": operation_id, "payload": result.formatted})
+            except GraphQLError as e:
+                # Raised by a subscribe_* generator, e.g. when access is denied.
+                await self.send_message({"type": "error", "id": operation_id, "payload": [e.formatted]})
+                return
+            finally:
+                await stream.aclose()
+            await self.send_message({"type": "complete", "id": operation_id})
+        finally:
+            if self.operations.get(operation_id) is asyncio.current_task():
+                del self.operations[operation_id]
+
+    def prepare(self, schema, query, variables, operation_name):
+        """Return ``(document, errors)`` for a subscription operation."""
+        errors = validate_schema(schema)
+        if errors:
+            return None, errors
+        document, errors = document_cache.get(schema, query, max_errors=graphene_settings.MAX_VALIDATION_ERRORS)
+        if document is None or errors:
+            return None, errors
+        operation_ast = get_operation_ast(document, operation_name)
+        if operation_ast is None:
+            return None, [GraphQLError("Must provide a valid operation name")]
+        if operation_ast.operation != OperationType.SUBSCRIPTION:
+            return None, [GraphQLError("Only subscriptions are served over WebSocket")]
+        return document, QueryCost(schema, document, operation_ast, variables).errors()
+
+    async def send_message(self, message):
+        await self.send({"type": "websocket.send", "text": json.dumps(message)})
+
+    async def close(self, code, reason):
+        await self.send({"type": "websocket.close", "code": code, "reason": reason})
+
+
+async def graphql_websocket(scope, receive, send):
+    """ASGI application serving GraphQL subscriptions at GRAPHQL_WS_PATH."""
+    if scope["path"] != settings.GRAPHQL_WS_PATH:
+        await receive()
+        await send({"type": "websocket.close", "code": 4404})
+        return
+    await GraphQLWebSocket(scope, receive, send).run()
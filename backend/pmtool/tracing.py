@@ -0,0 +1,230 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from inspect import isawaitable
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger("pmtool.slow_operations")
+
+# (trace, key) the SQL being run right now is attributed to.
+_current = ContextVar("graphql_trace", default=None)
+
+
+class Timing:
+    __slots__ = ("calls", "duration", "sql_count", "sql_duration")
+
+    def __init__(self):
+        self.calls = 0
+        self.duration = 0.0
+        self.sql_count = 0
+        self.sql_duration = 0.0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "duration": round(self.duration * 1000, 3),
+            "sqlCount": self.sql_count,
+            "sqlDuration": round(self.sql_duration * 1000, 3),
+        }
+
+
+class Trace:
+    """Wall time and SQL of one GraphQL request, per phase and per field.
+
+    Phases are the organization lookup, parsing/validation and execution.
+    With ``trace_fields`` every resolver is timed too (TracingMiddleware),
+    aggregated by path without list indices, so the resolvers of
+    ``projects.edges.node.tasks`` add up to one entry whatever the page size.
+    """
+
+    def __init__(self, exposed=False, trace_fields=False):
+        self.exposed = exposed
+        self.trace_fields = trace_fields
+        self.started = time.perf_counter()
+        self.duration = None
+        self.operation_name = None
+        self.sql_count = 0
+        self.sql_duration = 0.0
+        self.connections_opened = 0
+        self.connection_wait = 0.0
+        self.phases = {}
+        self.fields = {}
+        install_sql_tracing()
+
+    @contextmanager
+    def phase(self, name):
+        timing = self.phases.setdefault(name, Timing())
+        token = _current.set((self, timing))
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            timing.calls += 1
+            timing.duration += time.perf_counter() - started
+            _current.reset(token)
+
+    def set_operation(self, operation_name):
+        self.operation_name = operation_name
+
+    def field(self, path):
+        return self.fields.setdefault(path, Timing())
+
+    def record_sql(self, timing, duration):
+        self.sql_count += 1
+        self.sql_duration += duration
+        if timing is not None:
+            timing.sql_count += 1
+            timing.sql_duration += duration
+
+    def finish(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started
+
+    def top_fields(self, limit=None):
+        fields = sorted(self.fields.items(), key=lambda item: item[1].duration, reverse=True)
+        return fields[:limit] if limit else fields
+
+    def as_dict(self):
+        self.finish()
+        return {
+            "duration": round(self.duration * 1000, 3),
+            "sqlCount": self.sql_count,
+            "sqlDuration": round(self.sql_duration * 1000, 3),
+            "connection": {
+                "opened": self.connections_opened,
+                "wait": round(self.connection_wait * 1000, 3),
+            },
+            "phases": {name: timing.as_dict() for name, timing in self.phases.items()},
+            "fields": [dict(path=path, **timing.as_dict()) for path, timing in self.top_fields()],
+        }
+
+    def log_if_slow(self, organization=None):
+        self.finish()
+        threshold = settings.GRAPHQL_SLOW_OPERATION_MS
+        if not threshold or self.duration * 1000 < threshold:
+            return
+        if self.trace_fields:
+            label, timings = "top", self.top_fields(settings.GRAPHQL_SLOW_OPERATION_TOP_FIELDS)
+        else:
+            label, timings = "phases", self.phases.items()
+        breakdown = ", ".join(
+            f"{name} {timing.duration * 1000:.1f}ms/{timing.sql_count}q" for name, timing in timings
+        )
+        logger.warning(
+            "Slow GraphQL operation %s org=%s %.1fms sql=%d/%.1fms %s: %s",
+            self.operation_name or "<anonymous>",
+            getattr(organization, "slug", None),
+            self.duration * 1000,
+            self.sql_count,
+            self.sql_duration * 1000,
+            label,
+            breakdown,
+        )
+
+
+class _NoTrace:
+    exposed = False
+    trace_fields = False
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def set_operation(self, operation_name):
+        pass
+
+    def log_if_slow(self, organization=None):
+        pass
+
+
+NO_TRACE = _NoTrace()
+
+
+def start_trace(request):
+    """Attach a trace to ``request`` when it asks for one or slow operations are logged.
+
+    Resolvers are only timed for a request asking for the trace or with
+    GRAPHQL_SLOW_OPERATION_FIELDS; slow-operation logging alone times the
+    phases, which costs a few clock reads per request rather than per field.
+    """
+    exposed = settings.GRAPHQL_TRACING and bool(request.headers.get(settings.GRAPHQL_TRACE_HEADER))
+    if exposed or settings.GRAPHQL_SLOW_OPERATION_MS:
+        request.graphql_trace = Trace(
+            exposed=exposed, trace_fields=exposed or settings.GRAPHQL_SLOW_OPERATION_FIELDS
+        )
+    else:
+        request.graphql_trace = NO_TRACE
+    return request.graphql_trace
+
+
+def get_trace(request):
+    return getattr(request, "graphql_trace", NO_TRACE)
+
+
+class TracingMiddleware:
+    """Graphene middleware timing every resolver of a traced request.
+
+    Awaitables returned on the async path are timed until they complete.
+    """
+
+    def resolve(self, next, root, info, **args):
+        trace = get_trace(info.context)
+        if not trace.trace_fields:
+            return next(root, info, **args)
+        path = ".".join(str(key) for key in info.path.as_list() if not isinstance(key, int))
+        timing = trace.field(path)
+        token = _current.set((trace, timing))
+        started = time.perf_counter()
+        try:
+            result = next(root, info, **args)
+        finally:
+            _current.reset(token)
+        if isawaitable(result):
+            return self._finish_async(result, trace, timing, started)
+        timing.calls += 1
+        timing.duration += time.perf_counter() - started
+        return result
+
+    async def _finish_async(self, result, trace, timing, started):
+        token = _current.set((trace, timing))
+        try:
+            return await result
+        finally:
+            _current.reset(token)
+            timing.calls += 1
+            timing.duration += time.perf_counter() - started
+
+
+def _trace_sql(execute, sql, params, many, context):
+    current = _current.get()
+    if current is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        trace, timing = current
+        trace.record_sql(timing, time.perf_counter() - started)
+
+
+def record_connection(wait, opened):
+    """Attribute the time spent opening or waiting for a connection to the active trace."""
+    current = _current.get()
+    if current is not None:
+        trace = current[0]
+        trace.connections_opened += int(opened)
+        trace.connection_wait += wait
+
+
+def install_sql_tracing(connection=None, **kwargs):
+    """Attribute queries of this thread's connections (or ``connection``) to the active trace."""
+    for conn in [connection] if connection is not None else connections.all():
+        if _trace_sql not in conn.execute_wrappers:
+            conn.execute_wrappers.append(_trace_sql)
+
+
+connection_created.connect(install_sql_tracing)
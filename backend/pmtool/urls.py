@@ -1,9 +1,15 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
-from pmtool.graphql_view import ContextGraphQLView
+from core.views import export_organization, import_tasks
+from pmtool.graphql_view import AsyncContextGraphQLView, ContextGraphQLView
+
+GraphQLView = AsyncContextGraphQLView if settings.GRAPHQL_ASYNC else ContextGraphQLView
 
 
 urlpatterns = [
 path('admin/', admin.site.urls),
-path('graphql/', ContextGraphQLView.as_view(graphiql=True)),
+path('graphql/', GraphQLView.as_view(graphiql=True)),
+path('export/', export_organization),
+path('import/', import_tasks),
 ]
\ No newline at end of file
@@ -1,9 +1,33 @@
-import { ApolloClient, InMemoryCache, createHttpLink } from '@apollo/client'
+import { ApolloClient, ApolloLink, InMemoryCache } from '@apollo/client'
+import { BatchHttpLink } from '@apollo/client/link/batch-http'
+import { getMainDefinition } from '@apollo/client/utilities'
+import { createSubscriptionLink } from './subscriptionLink'
 import { onError } from '@apollo/client/link/error'
 import { setContext } from '@apollo/client/link/context'
+import { createPersistedQueryLink } from '@apollo/client/link/persisted-queries'
 
 
-const httpLink = createHttpLink({ uri: import.meta.env.VITE_GRAPHQL_URL || 'http://localhost:8000/graphql/' })
+const graphqlUrl = import.meta.env.VITE_GRAPHQL_URL || 'http://localhost:8000/graphql/'
+// Operations issued within batchInterval ms go out as one POST holding an
+// array of operations; the server answers with the array of results.
+const httpLink = new BatchHttpLink({ uri: graphqlUrl, batchMax: 10, batchInterval: 10 })
+
+
+// Subscriptions go over a WebSocket (graphql-transport-ws). Browsers can't set
+// headers on it, so the org slug travels in the connection_init payload.
+const wsLink = createSubscriptionLink(
+import.meta.env.VITE_GRAPHQL_WS_URL || graphqlUrl.replace(/^http/, 'ws'),
+() => ({ 'X-Org-Slug': localStorage.getItem('orgSlug') || 'acme' }),
+)
+
+
+// Send a sha256 of each operation instead of its text; the server falls back
+// to asking for the full query when the hash is unknown.
+const sha256 = async (query: string) => {
+const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(query))
+return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('')
+}
+const persistedQueryLink = createPersistedQueryLink({ sha256 })
 
 
 const errorLink = onError(({ graphQLErrors, networkError }) => {
@@ -14,6 +38,12 @@ if (networkError) console.error('[Network error]:', networkError)
 })
 
 
+// A page fetched with `after` (fetchMore) extends the cached connection; a
+// first page replaces it.
+const mergePages = (existing: any, incoming: any, { args }: { args: Record<string, any> | null }) =>
+args?.after && existing ? { ...incoming, edges: [...existing.edges, ...incoming.edges] } : incoming
+
+
 const authLink = setContext((_, { headers }) => {
 const orgSlug = localStorage.getItem('orgSlug') || 'acme'
 return { headers: { ...headers, 'X-Org-Slug': orgSlug } }
@@ -21,21 +51,25 @@ return { headers: { ...headers, 'X-Org-Slug': orgSlug } }
 
 
 export const client = new ApolloClient({
-link: errorLink.concat(authLink).concat(httpLink),
+link: ApolloLink.split(
+({ query }) => {
+const definition = getMainDefinition(query)
+return definition.kind === 'OperationDefinition' && definition.operation === 'subscription'
+},
+errorLink.concat(wsLink),
+errorLink.concat(authLink).concat(persistedQueryLink).concat(httpLink),
+),
 cache: new InMemoryCache({
 typePolicies: {
 Project: { keyFields: ['id'] },
-Task: { keyFields: ['id'] },
+Task: {
+keyFields: ['id'],
+fields: { comments: { keyArgs: false, merge: mergePages } },
+},
 Query: {
 fields: {
-projects: { 
-  merge(existing = [], incoming: any[]) { return incoming },
-  read(existing = []) { return existing }
-},
-tasks: { 
-  merge(_, incoming: any[]) { return incoming },
-  read(existing = []) { return existing }
-},
+projects: { keyArgs: false, merge: mergePages },
+tasks: { keyArgs: ['projectId'], merge: mergePages },
 }
 }
 }
@@ -47,9 +47,18 @@ export default function ProjectForm({ onDone, project, mode = 'create' }: Projec
       const newProj = data?.createProject?.project;
       if (!newProj) return;
       const existing: any = cache.readQuery({ query: GET_PROJECTS });
+      if (!existing?.projects) return;
       cache.writeQuery({
         query: GET_PROJECTS,
-        data: { projects: [newProj, ...(existing?.projects || [])] },
+        data: {
+          projects: {
+            ...existing.projects,
+            edges: [
+              { __typename: "ProjectEdge", node: newProj },
+              ...existing.projects.edges,
+            ],
+          },
+        },
       });
     },
   });
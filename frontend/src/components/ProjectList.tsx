@@ -1,18 +1,19 @@
 import { useQuery } from "@apollo/client/react";
 import { GET_PROJECTS } from "../graphql/queries";
-import type { Project } from "../types";
+import { nodes, type Project } from "../types";
 import ProjectForm from "./ProjectForm";
 import TaskBoard from "./TaskBoard";
 import { useState } from "react";
 
 export default function ProjectList() {
-  const { data, loading, error, refetch } = useQuery(GET_PROJECTS);
+  const { data, loading, error, refetch, fetchMore } = useQuery(GET_PROJECTS);
   const [selected, setSelected] = useState<Project | null>(null);
 
   if (loading) return <p>Loading projects…</p>;
   if (error) return <p className="text-red-600">Error: {error.message}</p>;
 
-  const projects: Project[] = data?.projects ?? [];
+  const projects: Project[] = nodes(data?.projects);
+  const pageInfo = data?.projects.pageInfo;
   return (
     <div className="grid md:grid-cols-2 gap-6">
       <div>
@@ -52,6 +53,14 @@ export default function ProjectList() {
             </li>
           ))}
         </ul>
+        {pageInfo?.hasNextPage && (
+          <button
+            className="mt-2 text-sm text-indigo-600"
+            onClick={() => fetchMore({ variables: { after: pageInfo.endCursor } })}
+          >
+            Load more projects
+          </button>
+        )}
       </div>
       <div>
         {selected ? (
@@ -1,20 +1,43 @@
 import { useQuery } from "@apollo/client/react";
 import { GET_TASKS } from "../graphql/queries";
-import type { Project, Task } from "../types";
+import { TASK_CHANGED } from "../graphql/subscriptions";
+import { nodes, type Project, type Task } from "../types";
 import TaskForm from "./TaskForm";
 import TaskComments from "./TaskComments";
-import { useState } from "react";
+import { useEffect, useState } from "react";
 
 export default function TaskBoard({ project }: { project: Project }) {
-  const { data, loading, error, refetch } = useQuery(GET_TASKS, {
+  const { data, loading, error, subscribeToMore, fetchMore } = useQuery(GET_TASKS, {
     variables: { projectId: project.id },
   });
   const [selected, setSelected] = useState<Task | null>(null);
 
+  // Changes from any client arrive as events: edits update the cached task in
+  // place, new tasks are appended to the board.
+  useEffect(
+    () =>
+      subscribeToMore({
+        document: TASK_CHANGED,
+        variables: { projectId: project.id },
+        updateQuery: (prev: any, { subscriptionData }: any) => {
+          const task = subscriptionData.data?.taskChanged;
+          if (!task || !prev?.tasks || prev.tasks.edges.some((edge: any) => edge.node.id === task.id)) {
+            return prev;
+          }
+          return {
+            ...prev,
+            tasks: { ...prev.tasks, edges: [...prev.tasks.edges, { __typename: "TaskEdge", node: task }] },
+          };
+        },
+      }),
+    [subscribeToMore, project.id]
+  );
+
   if (loading) return <p>Loading tasks…</p>;
   if (error) return <p className="text-red-600">Error: {error.message}</p>;
 
-  const tasks: Task[] = data?.tasks ?? [];
+  const tasks: Task[] = nodes(data?.tasks);
+  const pageInfo = data?.tasks.pageInfo;
   const groups: Record<string, Task[]> = {
     TODO: [],
     IN_PROGRESS: [],
@@ -26,7 +49,7 @@ export default function TaskBoard({ project }: { project: Project }) {
     <div>
       <div className="flex items-center justify-between mb-2">
         <h3 className="text-xl font-semibold">{project.name} — Tasks</h3>
-        <TaskForm projectId={project.id} onDone={() => refetch()} />
+        <TaskForm projectId={project.id} />
       </div>
       <div className="grid md:grid-cols-3 gap-3">
         {(["TODO", "IN_PROGRESS", "DONE"] as const).map((col) => (
@@ -54,7 +77,6 @@ export default function TaskBoard({ project }: { project: Project }) {
                       projectId={project.id} 
                       task={t} 
                       mode="edit" 
-                      onDone={() => refetch()} 
                     />
                   </div>
                 </li>
@@ -63,6 +85,14 @@ export default function TaskBoard({ project }: { project: Project }) {
           </div>
         ))}
       </div>
+      {pageInfo?.hasNextPage && (
+        <button
+          className="mt-2 text-sm text-indigo-600"
+          onClick={() => fetchMore({ variables: { after: pageInfo.endCursor } })}
+        >
+          Load more tasks
+        </button>
+      )}
 
       {selected && (
         <div className="mt-4 grid md:grid-cols-2 gap-4">
@@ -70,7 +100,7 @@ export default function TaskBoard({ project }: { project: Project }) {
             <div className="font-semibold mb-2">Task Details</div>
             <div className="text-sm">{selected.description || "—"}</div>
           </div>
-          <TaskComments taskId={selected.id} projectId={project.id} />
+          <TaskComments taskId={selected.id} />
         </div>
       )}
     </div>
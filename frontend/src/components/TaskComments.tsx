@@ -1,34 +1,47 @@
 import { useMutation, useQuery } from "@apollo/client/react";
-import { gql } from "@apollo/client";
 import { ADD_TASK_COMMENT } from "../graphql/mutations";
-import { useState } from "react";
+import { GET_TASK_COMMENTS } from "../graphql/queries";
+import { COMMENT_ADDED } from "../graphql/subscriptions";
+import { useEffect, useState } from "react";
+import { nodes } from "../types";
 
-const GET_TASK_COMMENTS = gql`
-  query GetTaskComments($projectId: ID!) {
-    tasks(projectId: $projectId) {
-      id
-      comments {
-        id
-        content
-        authorEmail
-        createdAt
-      }
-    }
-  }
-`;
+// GET_TASK_COMMENTS data with `comment` appended, unless it is already listed.
+const appendComment = (prev: any, comment: any) => {
+  const comments = prev?.task?.comments;
+  if (!comment || !comments || comments.edges.some((edge: any) => edge.node.id === comment.id)) return prev;
+  const added = { __typename: "TaskCommentEdge", node: comment };
+  return { ...prev, task: { ...prev.task, comments: { ...comments, edges: [...comments.edges, added] } } };
+};
 
-export default function TaskComments({ taskId, projectId }: { taskId: string; projectId: string }) {
+export default function TaskComments({ taskId }: { taskId: string }) {
   const [content, setContent] = useState("");
   const [authorEmail, setAuthorEmail] = useState("");
   
-  const { data, refetch } = useQuery(GET_TASK_COMMENTS, {
-    variables: { projectId },
+  const { data, subscribeToMore, fetchMore } = useQuery(GET_TASK_COMMENTS, {
+    variables: { taskId },
   });
+
+  // Comments from other clients arrive over the subscription; ours are added
+  // from the mutation result below, so they show without a WebSocket too.
+  useEffect(
+    () =>
+      subscribeToMore({
+        document: COMMENT_ADDED,
+        variables: { taskId },
+        updateQuery: (prev: any, { subscriptionData }: any) =>
+          appendComment(prev, subscriptionData.data?.commentAdded),
+      }),
+    [subscribeToMore, taskId]
+  );
   
   const [addComment, { loading }] = useMutation(ADD_TASK_COMMENT, {
     variables: { taskId, content, authorEmail },
-    onCompleted: () => {
-      refetch();
+    update: (cache, { data }: any) => {
+      const comment = data?.addTaskComment?.comment;
+      if (!comment) return;
+      cache.updateQuery({ query: GET_TASK_COMMENTS, variables: { taskId } }, (prev: any) =>
+        appendComment(prev, comment)
+      );
     },
   });
 
@@ -39,8 +52,8 @@ export default function TaskComments({ taskId, projectId }: { taskId: string; pr
     setContent("");
   };
 
-  const currentTask = data?.tasks?.find((task: any) => task.id === taskId);
-  const comments = currentTask?.comments || [];
+  const comments = nodes<any>(data?.task?.comments);
+  const pageInfo = data?.task?.comments.pageInfo;
 
   return (
     <div className="bg-white rounded p-4 shadow">
@@ -63,6 +76,14 @@ export default function TaskComments({ taskId, projectId }: { taskId: string; pr
         ) : (
           <p className="text-sm text-gray-500 italic">No comments yet</p>
         )}
+        {pageInfo?.hasNextPage && (
+          <button
+            className="mt-2 text-sm text-indigo-600"
+            onClick={() => fetchMore({ variables: { after: pageInfo.endCursor } })}
+          >
+            Load more comments
+          </button>
+        )}
       </div>
 
       {/* Comment form */}
@@ -1,6 +1,7 @@
 import { useState, useEffect } from "react";
 import { useMutation } from "@apollo/client/react";
 import { CREATE_TASK, UPDATE_TASK } from "../graphql/mutations";
+import { GET_TASKS } from "../graphql/queries";
 import type { Task } from "../types";
 
 export default function TaskForm({
@@ -10,7 +11,7 @@ export default function TaskForm({
   mode = 'create',
 }: {
   projectId: string;
-  onDone: () => void;
+  onDone?: () => void;
   task?: Task | null;
   mode?: 'create' | 'edit';
 }) {
@@ -36,6 +37,20 @@ export default function TaskForm({
         },
       },
     },
+    // Add the new task to the board from the mutation result; the
+    // taskChanged subscription, when the server offers one, only adds
+    // tasks created by other clients.
+    update: (cache, { data }: any) => {
+      const created = data?.createTask?.task;
+      if (!created) return;
+      cache.updateQuery({ query: GET_TASKS, variables: { projectId } }, (prev: any) => {
+        if (!prev?.tasks || prev.tasks.edges.some((edge: any) => edge.node.id === created.id)) return prev;
+        return {
+          ...prev,
+          tasks: { ...prev.tasks, edges: [...prev.tasks.edges, { __typename: "TaskEdge", node: created }] },
+        };
+      });
+    },
   });
 
   const [updateTask, { loading: updateLoading, error: updateError }] = useMutation(UPDATE_TASK, {
@@ -62,7 +77,7 @@ export default function TaskForm({
         await createTask();
       }
       handleClose();
-      onDone();
+      onDone?.();
     } catch (err) {
       console.error(`Failed to ${mode} task:`, err);
     }
@@ -10,10 +10,15 @@ query GetOrganization($id: ID!) { organization(id: $id) { id name slug contactEm
 `
 
 export const GET_PROJECTS = gql`
-query GetProjects { projects { id name description status dueDate taskCount completedTasks completionRate } }
+query GetProjects($after: String) { projects(first: 100, after: $after) { edges { node { id name description status dueDate taskCount completedTasks completionRate } } pageInfo { hasNextPage endCursor } } }
 `
 
 
 export const GET_TASKS = gql`
-query GetTasks($projectId: ID!) { tasks(projectId: $projectId) { id title description status assigneeEmail dueDate } }
-`
\ No newline at end of file
+query GetTasks($projectId: ID!, $after: String) { tasks(projectId: $projectId, first: 100, after: $after) { edges { node { id title description status assigneeEmail dueDate } } pageInfo { hasNextPage endCursor } } }
+`
+
+
+export const GET_TASK_COMMENTS = gql`
+query GetTaskComments($taskId: ID!, $after: String) { task(id: $taskId) { id comments(first: 50, after: $after) { edges { node { id content authorEmail createdAt } } pageInfo { hasNextPage endCursor } } } }
+`
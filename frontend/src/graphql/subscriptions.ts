@@ -0,0 +1,11 @@
+import { gql } from '@apollo/client'
+
+
+// Same task fields as GET_TASKS, so events update the cached board in place.
+export const TASK_CHANGED = gql`
+subscription TaskChanged($projectId: ID!) { taskChanged(projectId: $projectId) { id title description status assigneeEmail dueDate } }
+`
+
+export const COMMENT_ADDED = gql`
+subscription CommentAdded($taskId: ID!) { commentAdded(taskId: $taskId) { id content authorEmail createdAt } }
+`
@@ -0,0 +1,70 @@
+import { ApolloLink } from '@apollo/client'
+import { print } from 'graphql'
+import { Observable, type Observer } from 'rxjs'
+
+
+// Minimal graphql-transport-ws client. All subscriptions share one socket,
+// opened by the first and closed after the last; when the server drops it,
+// it reconnects and subscribes again. Reconnects back off exponentially (with
+// jitter, up to MAX_RETRY_DELAY ms), so a server without WebSocket support,
+// such as the WSGI runserver, is not retried every second forever.
+const MAX_RETRY_DELAY = 60000
+
+export function createSubscriptionLink(url: string, connectionParams: () => Record<string, unknown>) {
+let socket: WebSocket | null = null
+let acknowledged = false
+let lastId = 0
+let failures = 0
+const active = new Map<string, { payload: object; observer: Observer<any> }>()
+
+const send = (message: object) => socket?.send(JSON.stringify(message))
+
+const connect = () => {
+socket = new WebSocket(url, 'graphql-transport-ws')
+socket.onopen = () => send({ type: 'connection_init', payload: connectionParams() })
+socket.onmessage = (event) => {
+const message = JSON.parse(event.data)
+const subscription = active.get(message.id)
+switch (message.type) {
+case 'connection_ack':
+acknowledged = true
+failures = 0
+for (const [id, { payload }] of active) send({ id, type: 'subscribe', payload })
+break
+case 'ping':
+send({ type: 'pong' })
+break
+case 'next':
+subscription?.observer.next(message.payload)
+break
+case 'error':
+active.delete(message.id)
+subscription?.observer.error(new Error(message.payload.map((e: { message: string }) => e.message).join('; ')))
+break
+case 'complete':
+active.delete(message.id)
+subscription?.observer.complete()
+break
+}
+}
+socket.onclose = () => {
+socket = null
+acknowledged = false
+if (!active.size) return
+const delay = Math.min(MAX_RETRY_DELAY, 1000 * 2 ** failures++) * (0.5 + Math.random() / 2)
+setTimeout(() => { if (!socket && active.size) connect() }, delay)
+}
+}
+
+return new ApolloLink((operation) => new Observable((observer) => {
+const id = String(++lastId)
+const payload = { query: print(operation.query), variables: operation.variables, operationName: operation.operationName }
+active.set(id, { payload, observer })
+if (!socket) connect()
+else if (acknowledged) send({ id, type: 'subscribe', payload })
+return () => {
+if (active.delete(id) && acknowledged) send({ id, type: 'complete' })
+if (!active.size) socket?.close(1000)
+}
+}))
+}
@@ -1,3 +1,11 @@
+export interface Connection<T> {
+  edges: { cursor?: string; node: T }[];
+  pageInfo?: { hasNextPage: boolean; endCursor?: string | null };
+}
+
+export const nodes = <T,>(connection?: Connection<T> | null): T[] =>
+  connection?.edges.map((edge) => edge.node) ?? [];
+
 export type ProjectStatus = "ACTIVE" | "COMPLETED" | "ON_HOLD";
 export interface Project {
   id: string;
@@ -20,7 +28,7 @@ export interface Task {
   assigneeEmail?: string;
   dueDate?: string;
   createdAt: string;
-  comments: TaskComment[];
+  comments?: Connection<TaskComment>;
 }
 
 export interface TaskComment {